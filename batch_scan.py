@@ -0,0 +1,128 @@
+'''Command-line entry point for scanning exam cards without the graphical user interface.
+
+Runs a list of exam cards against a model and writes each acquired series to a .npy file. This module does not import PyQt5, so it can run unattended, e.g., on a server without a display.
+
+Example:
+    python batch_scan.py --model MRiLabBrainHighRes --output output/reference_images
+'''
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from simulator.scanner import Scanner
+from simulator.load import load_json, load_model, load_model_catalogue
+from simulator.MRI_data_synthesiser import available_scan_techniques
+
+MODELS_FILE_PATH = 'repository/models/models.json'
+EXAM_CARDS_FILE_PATH = 'repository/exam_cards/exam_cards.json'
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Scan exam cards against a model without the graphical user interface and write the acquired series to disk.")
+    parser.add_argument("--model", required=True, help="Key of the model in the models file.")
+    parser.add_argument("--models-file", default=MODELS_FILE_PATH, help="Path to the .json file that lists the models (default: %(default)s).")
+    parser.add_argument("--exam-cards", default=EXAM_CARDS_FILE_PATH, help="Path to the .json file with the exam cards (default: %(default)s).")
+    parser.add_argument("--cards", nargs="+", default=None, help="Names of the exam cards to scan (default: all exam cards in the file).")
+    parser.add_argument("--output", required=True, help="Directory the acquired series are written to. One .npy file is written per exam card.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Number of worker processes that scan exam cards concurrently (default: %(default)s).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of threads that write acquired series to disk (default: %(default)s).")
+    return parser.parse_args(argv)
+
+
+def file_name_for_card(card_name):
+    # Exam card names are free text (e.g., "Exercise 2&3"), so characters that are not safe in file names are replaced.
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", card_name).strip("_") + ".npy"
+
+
+def select_exam_cards(exam_card_data, card_names, model):
+    '''Return the (name, scan parameters) pairs of the exam cards to scan. Exam cards whose scan technique needs maps the model does not have, e.g., a T2* map, are skipped, as in the graphical user interface.'''
+    if card_names is None:
+        card_names = list(exam_card_data.keys())
+    selected_cards = []
+    for card_name in card_names:
+        if card_name not in exam_card_data:
+            raise ValueError(f"Unknown exam card: {card_name}")
+        scan_parameters = exam_card_data[card_name]
+        if scan_parameters.get("ScanTechnique") not in available_scan_techniques(model):
+            print(f"Skipping {card_name}: model {model.name} does not have the maps that {scan_parameters.get('ScanTechnique')} scans need.")
+            continue
+        selected_cards.append((card_name, scan_parameters))
+    return selected_cards
+
+
+def write_acquired_series(file_path, acquired_data):
+    start = time.perf_counter()
+    np.save(file_path, acquired_data)
+    return time.perf_counter() - start
+
+
+def run_batch(model_name, models_file_path, exam_card_file_path, card_names, output_dir, processes, workers):
+    '''
+    Scan the exam cards against the model and write the acquired series to output_dir. Scans run concurrently in a pool of worker processes (see Scanner.scan_all); each acquired series is handed to a pool of writer threads as soon as its scan has finished, so writing overlaps with the remaining scans.
+
+    Returns:
+    list: One (card name, file path, scan time in s, write time in s) tuple per scanned exam card.
+    '''
+    model_data = load_model_catalogue(models_file_path)
+    if model_name not in model_data:
+        raise ValueError(f"Unknown model: {model_name}. Available models: {', '.join(model_data.keys())}")
+
+    start = time.perf_counter()
+    model = load_model(model_name, model_data[model_name])
+    print(f"Loaded model {model_name} {model.T1map_ms.shape} in {time.perf_counter() - start:.2f} s")
+
+    selected_cards = select_exam_cards(load_json(exam_card_file_path), card_names, model)
+
+    scanner = Scanner()
+    scanner.start_examination("Batch scan", model)
+    for card_name, scan_parameters in selected_cards:
+        scanner.scanlist.add_scanlist_element(card_name, scan_parameters)
+
+    os.makedirs(output_dir, exist_ok=True)
+    results = []
+    scanner.max_scan_workers = max(1, processes)
+    scan_queue = scanner.scan_all()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending_writes = []
+        for scanlist_element in scan_queue.as_completed():
+            if scanlist_element.acquired_data is None:
+                print(f"Scanning {scanlist_element.name} failed: {scanlist_element.scan_item.messages.get('Scan')}", file=sys.stderr)
+                continue
+            scan_time = scan_queue.scan_times[scanlist_element]
+            file_path = os.path.join(output_dir, file_name_for_card(scanlist_element.name))
+            pending_writes.append((scanlist_element.name, file_path, scan_time, executor.submit(write_acquired_series, file_path, scanlist_element.acquired_data)))
+        for card_name, file_path, scan_time, write in pending_writes:
+            results.append((card_name, file_path, scan_time, write.result()))
+    scanner.stop_examination()
+    return results
+
+
+def print_timing_summary(results, total_time):
+    # Scan times are measured in the worker processes, so their total can exceed the wall clock time.
+    print(f"{'Exam card':<30} {'Scan (s)':>10} {'Write (s)':>10}  File")
+    for card_name, file_path, scan_time, write_time in results:
+        print(f"{card_name:<30} {scan_time:>10.3f} {write_time:>10.3f}  {file_path}")
+    scan_total = sum(result[2] for result in results)
+    write_total = sum(result[3] for result in results)
+    print(f"{'Total':<30} {scan_total:>10.3f} {write_total:>10.3f}")
+    print(f"Scanned {len(results)} exam cards in {total_time:.2f} s (wall clock)")
+
+
+def main(argv=None):
+    args = parse_arguments(sys.argv[1:] if argv is None else argv)
+    start = time.perf_counter()
+    try:
+        results = run_batch(args.model, args.models_file, args.exam_cards, args.cards, args.output, args.processes, args.workers)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+    print_timing_summary(results, time.perf_counter() - start)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+'''Command-line benchmark of the MRI data synthesiser.
+
+Times MRIDataSynthesiser.synthesise_MRI_data for every registered scan technique, across model sizes, map dtypes and thread counts, and writes the results to a .json file, so that performance work on the synthesiser can be measured against a baseline. This module does not import PyQt5.
+
+Each case is synthesised --repeats times with a new synthesiser, so that cached relaxation terms of earlier repeats do not flatter the timings, after one warm-up run. Peak memory is measured in a separate run with tracemalloc, which NumPy reports its allocations to, so that the tracing overhead does not affect the timings. Throughput is the number of voxels of the model per second, based on the median time.
+
+The models are synthetic: cubes of the given sizes made of a handful of tissues with typical relaxation times, arranged randomly (with a fixed seed) so that neither the signal calculators nor the Bloch simulation can take shortcuts that a real anatomy would not allow. Models from the models file can be added with --models.
+
+Example:
+    python benchmark_synthesis.py --sizes 64 128 --threads 1 -1 --output benchmark_results.json
+'''
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+from simulator.load import load_model, load_model_catalogue
+from simulator.model import Model
+from simulator.threads import set_worker_threads
+from simulator.MRI_data_synthesiser import MRIDataSynthesiser, available_scan_techniques
+from simulator.validation import default_scan_parameters
+
+MODELS_FILE_PATH = 'repository/models/models.json'
+BENCHMARK_TISSUES = np.array([ # T1 (ms), T2 (ms), T2* (ms), PD of the tissues of the synthetic models: background, white matter, grey matter, CSF, fat, muscle
+    (0, 0, 0, 0),
+    (600, 80, 50, 0.7),
+    (950, 100, 60, 0.8),
+    (4000, 2000, 1500, 1.0),
+    (260, 80, 35, 0.9),
+    (900, 50, 30, 0.75),
+], dtype=np.float64)
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the MRI data synthesiser for every registered scan technique and write the results to a .json file.")
+    parser.add_argument("--techniques", nargs="+", default=None, help="Scan techniques to benchmark (default: all registered techniques).")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[64, 128], help="Edge lengths in voxels of the synthetic cubic models (default: %(default)s).")
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "float64"], help="Dtypes of the maps of the synthetic models (default: %(default)s).")
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, -1], help="Numbers of threads of the FFTs, the noise and the Bloch simulation. -1 means one per CPU core (default: %(default)s).")
+    parser.add_argument("--models", nargs="+", default=[], help="Keys of models in the models file to benchmark as well, with their own maps and dtype.")
+    parser.add_argument("--models-file", default=MODELS_FILE_PATH, help="Path to the .json file that lists the models (default: %(default)s).")
+    parser.add_argument("--parameters", nargs="+", default=[], metavar="KEY=VALUE", help="Scan parameters that override the defaults of scan_parameters.json for all techniques, e.g., ScanPlane=Axial NSlices=20.")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of timed runs per case (default: %(default)s).")
+    parser.add_argument("--output", default="benchmark_results.json", help="Path of the .json file the results are written to (default: %(default)s).")
+    return parser.parse_args(argv)
+
+
+def parse_parameter_overrides(overrides):
+    scan_parameters = {}
+    for override in overrides:
+        key, separator, value = override.partition("=")
+        if not separator:
+            raise ValueError(f"Scan parameters must be given as KEY=VALUE: {override}")
+        try: value = float(value)
+        except ValueError: pass
+        scan_parameters[key] = value
+    return scan_parameters
+
+
+def synthetic_model(size, dtype, seed=0):
+    '''Return a cubic Model of size voxels per edge made of BENCHMARK_TISSUES, arranged randomly with the given seed.'''
+    labels = np.random.default_rng(seed).integers(0, len(BENCHMARK_TISSUES), (size, size, size))
+    maps = BENCHMARK_TISSUES.astype(dtype)[labels]
+    return Model(f"Synthetic {size}^3 {np.dtype(dtype).name}", "Synthetic benchmark model", maps[..., 0], maps[..., 1], maps[..., 2], np.ascontiguousarray(maps[..., 3]))
+
+
+def benchmark_case(scan_parameters, model, repeats):
+    '''Return the wall-clock times in s of repeats runs and the peak memory in bytes that NumPy allocated in one further run.'''
+    MRIDataSynthesiser().synthesise_MRI_data(scan_parameters, model) # warm-up: imports, FFT plans, thread pools
+    times = []
+    for _ in range(repeats):
+        synthesiser = MRIDataSynthesiser() # with an empty relaxation cache
+        start = time.perf_counter()
+        synthesiser.synthesise_MRI_data(scan_parameters, model)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        MRIDataSynthesiser().synthesise_MRI_data(scan_parameters, model)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return times, peak_bytes
+
+
+def environment():
+    # Describes the machine and software the results were measured on, so that results of different runs can be compared
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(techniques, sizes, dtypes, threads, model_names, models_file_path, parameter_overrides, repeats):
+    '''
+    Benchmark every combination of model, scan technique and thread count.
+
+    Returns:
+    list: One dict per case with the model, its shape and dtype, the scan technique, the number of threads, the times of the runs, their median and minimum, the throughput in voxels per second and the peak memory in bytes.
+    '''
+    models = [synthetic_model(size, dtype) for size in sizes for dtype in dtypes]
+    if model_names:
+        model_data = load_model_catalogue(models_file_path)
+        for model_name in model_names:
+            if model_name not in model_data:
+                raise ValueError(f"Unknown model: {model_name}. Available models: {', '.join(model_data.keys())}")
+            models.append(load_model(model_name, model_data[model_name]))
+    base_parameters = {**default_scan_parameters(), **parameter_overrides}
+    results = []
+    for model in models:
+        model_techniques = available_scan_techniques(model)
+        for technique in techniques or model_techniques:
+            if technique not in model_techniques:
+                print(f"Skipping {technique} on {model.name}: the scan technique is unknown or needs maps the model does not have.")
+                continue
+            for thread_count in threads:
+                set_worker_threads(thread_count)
+                times, peak_bytes = benchmark_case({**base_parameters, "ScanTechnique": technique}, model, max(1, repeats))
+                median = statistics.median(times)
+                result = {
+                    "model": model.name,
+                    "shape": list(np.shape(model.T1map_ms)),
+                    "dtype": np.asarray(model.T1map_ms).dtype.name,
+                    "technique": technique,
+                    "threads": thread_count,
+                    "times_s": times,
+                    "median_s": median,
+                    "min_s": min(times),
+                    "voxels_per_s": np.size(model.T1map_ms) / median,
+                    "peak_memory_bytes": peak_bytes,
+                }
+                print(f"{result['model']:<28} {technique:<8} {thread_count:>7} {median:>10.3f} {result['voxels_per_s'] / 1e6:>10.2f} {peak_bytes / 1024**2:>10.1f}")
+                results.append(result)
+    set_worker_threads(-1)
+    return results
+
+
+def main(argv=None):
+    args = parse_arguments(sys.argv[1:] if argv is None else argv)
+    print(f"{'Model':<28} {'Technique':<8} {'Threads':>7} {'Median (s)':>10} {'Mvoxel/s':>10} {'Peak (MB)':>10}")
+    try:
+        results = run_benchmarks(args.techniques, args.sizes, args.dtypes, args.threads, args.models, args.models_file, parse_parameter_overrides(args.parameters), args.repeats)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+    with open(args.output, "w") as file:
+        json.dump({"environment": environment(), "arguments": vars(args), "results": results}, file, indent=4)
+    print(f"Wrote {len(results)} results to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,22 @@
 from views.new_examination_dialog_ui import NewExaminationDialog
 from views.load_examination_dialog_ui import LoadExaminationDialog
 from views.view_model_dialog_ui import ViewModelDialog
-from views.qmodels import DictionaryModel
+from views.qmodels import ExamCardListModel, ScanlistModel
 import views.UI_MainWindowState as UI_state 
 
-from PyQt5.QtWidgets import QListWidgetItem, QShortcut
-from PyQt5.QtGui import QIcon, QKeySequence
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QShortcut, QFileDialog, QMessageBox
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtCore import Qt, QTimer
 
-from simulator.load import load_json, load_model_data
+from simulator.load import load_json, load_model_data, load_model, load_model_catalogue
+from simulator.examination_file import save_examination, read_examination_header, load_examination
+from simulator.exam_card_library import load_exam_card_library
 from simulator.model import Model 
+from simulator.MRI_data_synthesiser import available_scan_techniques
 from simulator.scanlist import ScanItemStatusEnum
 
 from events import EventEnum
+from tracing import span_timer
 import numpy as np
 
 class MainController:
@@ -23,19 +27,32 @@ class MainController:
         self.scanner = scanner
         self.ui = ui
 
-        self._load_examination_dialog_ui = LoadExaminationDialog() # Not yet implemented since it is not yet possible to save/load examinations.
+        self._load_examination_dialog_ui = LoadExaminationDialog()
         self._new_examination_dialog_ui = NewExaminationDialog() 
 
-        self.ui.loadExaminationButton.clicked.connect(lambda: self._load_examination_dialog_ui.exec())
+        self.scanlist_model = ScanlistModel() # Presents the scanlist of the current examination to the scanlistListWidget.
+        self._observed_scan_item = None # The scan item the controller is subscribed to, i.e., the active scan item.
+
+        self.scan_queue = None # Scans queued with the "Scan All" button (see handle_scanAllButton_clicked)
+        self.scan_queue_timer = QTimer() # Regularly collects the results of the queued scans, so that they appear while the remaining scans are still running.
+        self.scan_queue_timer.setInterval(100)
+        self.scan_queue_timer.timeout.connect(self.handle_scan_queue_timer_timeout)
+        self.ui.scanlistListWidget.setModel(self.scanlist_model)
+        self.exam_card_model = ExamCardListModel() # Presents the exam card library to the examCardListView
+        self.ui.examCardListView.setModel(self.exam_card_model)
+
+        self.ui.loadExaminationButton.clicked.connect(self.handle_loadExaminationButton_clicked)
         self.ui.newExaminationButton.clicked.connect(self.handle_newExaminationButton_clicked)
         self.ui.addScanItemButton.clicked.connect(self.handle_addScanItemButton_clicked)
         self.ui.scanlistListWidget.dropEventSignal.connect(self.handle_add_to_scanlist)
-        self.ui.scanlistListWidget.itemClicked.connect(self.handle_scanlistListWidget_clicked)
-        #self.ui.scanlistListWidget.itemDoubleClicked.connect(self.handle_scanlistListWidget_dclicked)
-        self.ui.scanlistListWidget.itemChanged.connect(self.handle_scanlistListWidget_itemChanged)
+        self.ui.examCardSearchLineEdit.textChanged.connect(self.exam_card_model.set_query)
+        self.ui.scanlistListWidget.clicked.connect(self.handle_scanlistListWidget_clicked)
+        #self.ui.scanlistListWidget.doubleClicked.connect(self.handle_scanlistListWidget_dclicked)
         self.ui.scanlistListWidget.itemDeletedSignal.connect(self.handle_scanlistListWidget_itemDeleted)
         self.ui.scanlistListWidget.itemDuplicatedSignal.connect(self.handle_scanlistListWidget_itemDuplicated)
+        self.ui.scanlistListWidget.fitMapSignal.connect(self.handle_scanlistListWidget_fitMap)
         self.ui.viewModelButton.clicked.connect(self.handle_viewModelButton_clicked)
+        self.ui.saveExaminationButton.clicked.connect(self.handle_saveExaminationButton_clicked)
         self.ui.stopExaminationButton.clicked.connect(self.handle_stopExaminationButton_clicked)
         self.ui.parameterFormLayout.formActivatedSignal.connect(self.handle_parameterFormLayout_activated)
         self.ui.scanParametersCancelChangesButton.clicked.connect(self.handle_scanParametersCancelChangesButton_clicked)
@@ -45,6 +62,7 @@ class MainController:
         self.ui.scanParametersSaveChangesButton.clicked.connect(self.handle_scanParametersSaveChangesButton_clicked)
         self.ui.scanParametersResetButton.clicked.connect(self.handle_scanParametersResetButton_clicked)
         self.ui.startScanButton.clicked.connect(self.handle_startScanButton_clicked)  
+        self.ui.scanAllButton.clicked.connect(self.handle_scanAllButton_clicked)
         self.ui.scanPlanningWindow1.dropEventSignal.connect(self.handle_scanPlanningWindow1_dropped)
         self.ui.scanPlanningWindow2.dropEventSignal.connect(self.handle_scanPlanningWindow2_dropped)
         self.ui.scanPlanningWindow3.dropEventSignal.connect(self.handle_scanPlanningWindow3_dropped)
@@ -54,21 +72,24 @@ class MainController:
 
         self._new_examination_dialog_ui.newExaminationCancelButton.clicked.connect(lambda: self._new_examination_dialog_ui.accept())
         self._new_examination_dialog_ui.newExaminationOkButton.clicked.connect(lambda: self.handle_newExaminationOkButton_clicked(self._new_examination_dialog_ui.examNameLineEdit.text(), self._new_examination_dialog_ui.modelComboBox.currentText()))      
+        self._load_examination_dialog_ui.loadExaminationCancelButton.clicked.connect(lambda: self._load_examination_dialog_ui.reject())
+        self._load_examination_dialog_ui.examFileLineEdit.textChanged.connect(self.handle_examFileLineEdit_changed)
+        self._load_examination_dialog_ui.loadExaminationOkButton.clicked.connect(lambda: self.handle_loadExaminationOkButton_clicked(self._load_examination_dialog_ui.examFileLineEdit.text()))
 
-    def handle_scanlistListWidget_itemChanged(self, item):
-        self.scanner.scanlist.rename_scanlist_element(self.ui.scanlistListWidget.row(item), item.text())
-
-    def handle_scanlistListWidget_itemDeleted(self, item):
-        self.scanner.scanlist.remove_scanlist_element(self.ui.scanlistListWidget.row(item))
+    def handle_scanlistListWidget_itemDeleted(self, row):
+        self.scanner.scanlist.remove_scanlist_element(row)
 
-    def handle_scanlistListWidget_itemDuplicated(self, item):
-        print("duplicate signal received", "item:", item)
+    def handle_scanlistListWidget_itemDuplicated(self, row):
+        self.scanner.scanlist.duplicate_scanlist_element(row)
 
-        self.scanner.scanlist.duplicate_scanlist_element(self.ui.scanlistListWidget.row(item))
+    def handle_scanlistListWidget_fitMap(self, row, quantity):
+        try:
+            self.scanner.fit_relaxation_map(row, quantity)
+        except ValueError as error:
+            QMessageBox.warning(self.ui, "Fit map", str(error))
 
     def handle_newExaminationButton_clicked(self):
-        jsonFilePath = 'repository/models/models.json'
-        self.model_data = load_json(jsonFilePath)
+        self.model_data = load_model_catalogue()
         model_names = list(self.model_data.keys())
         self.populate_modelComboBox(model_names)
         self._new_examination_dialog_ui.exec()    
@@ -77,7 +98,55 @@ class MainController:
         self._new_examination_dialog_ui.modelComboBox.clear()
         self._new_examination_dialog_ui.modelComboBox.addItems(list)
 
+    def handle_loadExaminationButton_clicked(self):
+        self.handle_examFileLineEdit_changed(self._load_examination_dialog_ui.examFileLineEdit.text())
+        self._load_examination_dialog_ui.exec()
+
+    def handle_examFileLineEdit_changed(self, file_path):
+        # Only the header of the examination file is read, so the preview stays fast for examinations with many acquired series.
+        if file_path == "":
+            self._load_examination_dialog_ui.examinationInfoLabel.setText("")
+            return
+        try:
+            header = read_examination_header(file_path)
+        except (OSError, ValueError, KeyError) as error:
+            self._load_examination_dialog_ui.examinationInfoLabel.setText(str(error))
+            return
+        self._load_examination_dialog_ui.examinationInfoLabel.setText(f"{header['name']} (model: {header['model']['name']}, scan items: {len(header['scanlist'])})")
+
+    def handle_loadExaminationOkButton_clicked(self, file_path):
+        try:
+            header = read_examination_header(file_path)
+            model_name = header["model"]["name"]
+            self.model_data = load_model_catalogue()
+            if model_name not in self.model_data:
+                raise ValueError(f"The examination was scanned on model {model_name}, which is not available.")
+            model = load_model(model_name, self.model_data[model_name])
+            examination = load_examination(file_path, model)
+        except (OSError, ValueError, KeyError) as error:
+            self._load_examination_dialog_ui.examinationInfoLabel.setText(str(error))
+            return
+        self.scanner.open_examination(examination)
+        self._load_examination_dialog_ui.accept()
+        self.show_examination()
+        self.update_scanlistListWidget(self.scanner.scanlist) # update progress bar
+        if self.scanner.scanlist.active_idx is not None:
+            self.update(EventEnum.SCANLIST_ACTIVE_SCANLIST_ELEMENT_CHANGED, active_idx=self.scanner.scanlist.active_idx) # Display the scan item that was active when the examination was saved
+
+    def handle_saveExaminationButton_clicked(self):
+        file_path, _ = QFileDialog.getSaveFileName(self.ui, "Save examination", self.scanner.examination.name + ".exam", "Examinations (*.exam)")
+        if not file_path:
+            return
+        try:
+            save_examination(self.scanner.examination, file_path)
+        except OSError as error:
+            QMessageBox.warning(self.ui, "Save examination", f"The examination could not be saved: {error}")
+
     def handle_stopExaminationButton_clicked(self):
+        self.stop_scan_queue()
+        if self.scanner.scanlist is not None:
+            self.scanner.scanlist.remove_observer(self)
+        self.observe_scan_item(None)
         self.scanner.stop_examination()
         self.ui.parameterFormLayout.clearForm()
         self.ui.scanlistListWidget.clear()
@@ -97,61 +166,51 @@ class MainController:
         self._new_examination_dialog_ui.modelComboBox.addItems(list)
 
     def handle_addScanItemButton_clicked(self):
-        jsonFilePath = 'repository/exam_cards/exam_cards.json'
-        self.exam_card_data = load_json(jsonFilePath)
+        # The exam card file is only parsed again if it changed since it was last shown (see ExamCardLibrary.refresh), and the examCardListView is only reset if the shown exam cards changed.
+        library = load_exam_card_library()
         self.ui.editingStackedLayout.setCurrentIndex(1)
-        if self.scanner.model.T2smap_ms is None:
-            self.exam_card_data.pop("Exercise 5")
-        self.populate_examCardListView(self.exam_card_data)       
-
-    def populate_examCardListView(self, exam_card_data):
-        self.exam_card_qmodel = DictionaryModel(exam_card_data)
-        self.ui.examCardListView.setModel(self.exam_card_qmodel)
+        # Exam cards whose scan technique needs maps that the model does not have, e.g., gradient echo on a model without a T2* map, are not offered.
+        self.exam_card_model.set_library(library, scan_techniques=available_scan_techniques(self.scanner.model))
 
     def handle_add_to_scanlist(self, selected_indexes):
         # Executed when the user drags and drops items from the examCardListView to the scanlistListWidget.
         for index in selected_indexes:
-            name = self.ui.examCardListView.model().itemFromIndex(index).text()
-            scan_parameters = self.ui.examCardListView.model().get_data(index)
+            name = self.exam_card_model.get_name(index)
+            scan_parameters = self.exam_card_model.get_data(index)
             self.scanner.scanlist.add_scanlist_element(name, scan_parameters)
     
     def update_scanlistListWidget(self, scanlist):
-        self.ui.scanlistListWidget.clear()
-        list = scanlist.scanlist_elements
-        for item in list:
-            list_item = QListWidgetItem(item.name)
-            if item.scan_item.status == ScanItemStatusEnum.READY_TO_SCAN:
-                list_item.setIcon(QIcon("resources/icons/checkmark-outline.png"))  
-            elif item.scan_item.status == ScanItemStatusEnum.BEING_MODIFIED:
-                list_item.setIcon(QIcon("resources/icons/edit-outline.png"))
-            elif item.scan_item.status == ScanItemStatusEnum.INVALID:
-                list_item.setIcon(QIcon("resources/icons/alert-circle-outline.png"))
-            elif item.scan_item.status == ScanItemStatusEnum.COMPLETE:
-                list_item.setIcon(QIcon("resources/icons/checkmark-circle-2-outline.png"))
-            list_item.setFlags(list_item.flags() | Qt.ItemIsEditable)
-            self.ui.scanlistListWidget.addItem(list_item)  
-        active_idx = self.scanner.scanlist.active_idx
-        if active_idx is not None:
-            current_list_item = self.ui.scanlistListWidget.item(active_idx)
-            self.ui.scanlistListWidget.setCurrentItem(current_list_item)
+        # Only rows that changed since the last update are updated in the scanlistListWidget.
+        self.scanlist_model.sync()
+        self.highlight_active_scanlist_element()
         progress = scanlist.get_progress()
         self.ui.scanProgressBar.setValue(int(progress * 100))    
 
-    def handle_scanlistListWidget_clicked(self, item):
-        index = self.ui.scanlistListWidget.row(item)
-        self.scanner.scanlist.active_idx = index
+    def observe_scan_item(self, scan_item):
+        # Subscribe to the given scan item (typically the active scan item) and unsubscribe from the scan item that was observed before, so that the controller only receives events from one scan item at a time.
+        if scan_item is self._observed_scan_item:
+            return
+        if self._observed_scan_item is not None:
+            self._observed_scan_item.remove_observer(self)
+        self._observed_scan_item = scan_item
+        if scan_item is not None:
+            scan_item.add_observer(self)
+
+    def highlight_active_scanlist_element(self):
+        active_idx = self.scanner.scanlist.active_idx
+        if active_idx is not None:
+            self.ui.scanlistListWidget.setCurrentIndex(self.scanlist_model.index(active_idx))
 
-    def handle_scanlistListWidget_dclicked(self, item):
-        print("double clicked")
-        index = self.ui.scanlistListWidget.row(item)
-        if index == self.scanner.scanlist.active_idx:
-            print("double clicked on active item")
-            self.ui.scanlistListWidget.editItem(item)
-        else:
-            print("double clicked on inactive item")
+    def handle_scanlistListWidget_clicked(self, model_index):
+        self.scanner.scanlist.active_idx = model_index.row()
+
+    def handle_scanlistListWidget_dclicked(self, model_index):
+        if model_index.row() == self.scanner.scanlist.active_idx:
+            self.ui.scanlistListWidget.edit(model_index)
 
     def populate_parameterFormLayout(self, scan_item):
-        self.ui.parameterFormLayout.set_parameters(scan_item.scan_parameters)
+        # Parameters the scan item does not have are shown with their default values, so that no values of the previously shown scan item remain in the form.
+        self.ui.parameterFormLayout.set_parameters({**self.ui.parameterFormLayout.default_values, **scan_item.scan_parameters})
              
     def handle_viewModelButton_clicked(self):
         view_model_dialog = ViewModelDialog(self.scanner.model)
@@ -174,43 +233,55 @@ class MainController:
 
 
     def handle_startScanButton_clicked(self):
-        array = self.scanner.scan()
-        self.scanner.scanlist.active_scan_item.status = ScanItemStatusEnum.COMPLETE
-        self.ui.state = UI_state.ScanCompleteState()
-        self.ui.update_UI()        
-        self.ui.scannedImageFrame.update_scanlist_element_name_text_item(self.scanner.active_scanlist_element.name)
-        self.ui.scannedImageFrame.setArray(self.scanner.active_scanlist_element.acquired_data)
-        self.ui.scannedImageFrame.displayArray()
+        # The scan is timed as a whole and per stage when span timing is enabled (see tracing.py); the stages of the last scan are then shown in the status bar.
+        with span_timer.span("scan"):
+            array = self.scanner.scan()
+            self.scanner.scanlist.active_scan_item.status = ScanItemStatusEnum.COMPLETE
+            self.ui.state = UI_state.ScanCompleteState()
+            with span_timer.span("update UI"):
+                self.ui.update_UI()        
+            self.ui.scannedImageFrame.update_scanlist_element_name_text_item(self.scanner.active_scanlist_element.name)
+            self.ui.scannedImageFrame.setArray(self.scanner.active_scanlist_element.acquired_data)
+            self.ui.scannedImageFrame.displayArray()
+        if span_timer.enabled:
+            self.ui.statusBar().showMessage(span_timer.format_breakdown("scan"))
 
         #self.update_scanlistListWidget(self.scanner.scanlist)
 
+    def handle_scanAllButton_clicked(self):
+        # Queue every scan item that is ready to scan. The scans run concurrently in worker processes and their results are collected by handle_scan_queue_timer_timeout.
+        if self.scan_queue is not None and not self.scan_queue.done:
+            return
+        self.scan_queue = self.scanner.scan_all()
+        self.scan_queue_timer.start()
+
+    def handle_scan_queue_timer_timeout(self):
+        if self.scan_queue.poll():
+            self.update_scanlistListWidget(self.scanner.scanlist) # update status icons and progress bar
+        if self.scan_queue.done:
+            self.stop_scan_queue()
+
+    def stop_scan_queue(self):
+        self.scan_queue_timer.stop()
+        if self.scan_queue is not None:
+            self.scan_queue.cancel()
+            self.scan_queue = None
+
     def handle_newExaminationOkButton_clicked(self, exam_name, model_name):
         selected_model_data = self.model_data.get(model_name)
-        description = selected_model_data.get("description", None)
-        t1map_file_path = selected_model_data.get("T1mapFilePath", None)
-        t2map_file_path = selected_model_data.get("T2mapFilePath", None)
-        t2smap_file_path = selected_model_data.get("T2smapFilePath", None)
-        pdmap_file_path = selected_model_data.get("PDmapFilePath", None)
-        t1map = np.load(t1map_file_path)
-        t1map_ms = t1map * 1000
-        t2map = np.load(t2map_file_path)
-        t2map_ms = t2map * 1000
-        if t2smap_file_path is not None:
-            t2smap = np.load(t2smap_file_path)
-            t2smap_ms = t2smap * 1000
-            self.ui.parameterFormLayout.setScanTechniqueComboBox(["SE", "GE"])
-        else: 
-            t2smap_ms = None
-            self.ui.parameterFormLayout.setScanTechniqueComboBox(["SE"])
-
-        pdmap = np.load(pdmap_file_path)
-        model = Model(model_name, description, t1map_ms, t2map_ms, t2smap_ms, pdmap)
+        model = load_model(model_name, selected_model_data)
         self.scanner.start_examination(exam_name, model)
-        self.scanner.scanlist.add_observer(self)
         self._new_examination_dialog_ui.accept()
+        self.show_examination()
+
+    def show_examination(self):
+        # Connect the UI to the examination that the scanner has just started or opened.
+        self.ui.parameterFormLayout.setScanTechniqueComboBox(available_scan_techniques(self.scanner.model))
+        self.scanner.scanlist.add_observer(self)
+        self.scanlist_model.set_scanlist(self.scanner.scanlist)
         self.ui.state = UI_state.ExamState()
-        self.ui.examinationNameLabel.setText(exam_name)
-        self.ui.modelNameLabel.setText(model_name)    
+        self.ui.examinationNameLabel.setText(self.scanner.examination.name)
+        self.ui.modelNameLabel.setText(self.scanner.model.name)
 
             
     def handle_scan_item_status_change(self, status):
@@ -275,26 +346,15 @@ class MainController:
         self.ui.scanPlanningWindow2.displayArray()
         self.ui.scanPlanningWindow3.displayArray()
 
-    def update(self, event):
+    def update(self, event, **payload):
         '''
-        The update() method defines what happens when events are emitted by parts of the scanner that the MainController is observing. The MainController is observing the scanlist, the active scan item, and the scanner. The update() method is called when the scanner notifies the MainController of changes, e.g., when a scan item is added to the scanlist, when the active scan item is changed, when the status of a scan item is changed, when the parameters of a scan item are changed, etc.'''
+        The update() method defines what happens when events are emitted by parts of the scanner that the MainController is observing. The MainController is observing the scanlist, the active scan item, and the scanner. The update() method is called when the scanner notifies the MainController of changes, e.g., when a scan item is added to the scanlist, when the active scan item is changed, when the status of a scan item is changed, when the parameters of a scan item are changed, etc. The payload describes what changed (see events.py), so that only the affected parts of the UI need to be updated.'''
         if event == EventEnum.SCANLIST_ITEM_ADDED:
-            #self.update_scanlistListWidget(self.scanner.scanlist)
-            new_scan_item = self.scanner.scanlist.scanlist_elements[-1].scan_item
-            list_item = QListWidgetItem(new_scan_item.name)
-            if new_scan_item.status == ScanItemStatusEnum.READY_TO_SCAN:
-                list_item.setIcon(QIcon("resources/icons/checkmark-outline.png"))  
-            elif new_scan_item.status == ScanItemStatusEnum.BEING_MODIFIED:
-                list_item.setIcon(QIcon("resources/icons/edit-outline.png"))
-            elif new_scan_item.status == ScanItemStatusEnum.INVALID:
-                list_item.setIcon(QIcon("resources/icons/alert-circle-outline.png"))
-            elif new_scan_item.status == ScanItemStatusEnum.COMPLETE:
-                list_item.setIcon(QIcon("resources/icons/checkmark-circle-2-outline.png"))
-            list_item.setFlags(list_item.flags() | Qt.ItemIsEditable)
-            self.ui.scanlistListWidget.addItem(list_item)  
+            self.scanlist_model.sync()
 
         if event == EventEnum.SCANLIST_ACTIVE_SCANLIST_ELEMENT_CHANGED: 
-            if self.scanner.scanlist.active_idx == None:
+            if payload["active_idx"] == None:
+                self.observe_scan_item(None)
                 self.ui.parameterFormLayout.clearForm()
                 self.ui.state = UI_state.ExamState()
             else:
@@ -303,33 +363,28 @@ class MainController:
                 self.ui.scannedImageFrame.update_scanlist_element_name_text_item(self.scanner.active_scanlist_element.name)
                 self.ui.scannedImageFrame.setArray(self.scanner.active_scanlist_element.acquired_data) # Display acquired series in scannedImageFrame. If it is None, the scannedImageFrame will display a blank image.
                 self.ui.scannedImageFrame.displayArray()
-                current_list_item = self.ui.scanlistListWidget.item(self.scanner.scanlist.active_idx)
-                self.ui.scanlistListWidget.setCurrentItem(current_list_item)
+                self.highlight_active_scanlist_element()
                 self.populate_parameterFormLayout(self.scanner.active_scan_item)
-                self.scanner.active_scan_item.add_observer(self)
+                self.observe_scan_item(self.scanner.active_scan_item)
                 # self.ui.scanPlanningWindow1.setScanVolume(self.scanner.active_scan_item.scan_volume) 
                 # self.ui.scanPlanningWindow2.setScanVolume(self.scanner.active_scan_item.scan_volume)
                 # self.ui.scanPlanningWindow3.setScanVolume(self.scanner.active_scan_item.scan_volume)
 
-        # if event == EventEnum.SCANLIST_ITEM_REMOVED:
-        #     self.update_scanlistListWidget(self.scanner.scanlist)
+        if event == EventEnum.SCANLIST_ITEM_REMOVED:
+            self.scanlist_model.sync()
+            self.highlight_active_scanlist_element()
 
         if event == EventEnum.SCAN_ITEM_STATUS_CHANGED:
-            self.handle_scan_item_status_change(self.scanner.active_scan_item.status)
-            # change icon of active scan item in scanlistListWidget
-            list_item = self.ui.scanlistListWidget.item(self.scanner.scanlist.active_idx)
-            if self.scanner.active_scan_item.status == ScanItemStatusEnum.READY_TO_SCAN:
-                list_item.setIcon(QIcon("resources/icons/checkmark-outline.png"))  
-            elif self.scanner.active_scan_item.status == ScanItemStatusEnum.BEING_MODIFIED:
-                list_item.setIcon(QIcon("resources/icons/edit-outline.png"))
-            elif self.scanner.active_scan_item.status == ScanItemStatusEnum.INVALID:
-                list_item.setIcon(QIcon("resources/icons/alert-circle-outline.png"))
-            elif self.scanner.active_scan_item.status == ScanItemStatusEnum.COMPLETE:
-                list_item.setIcon(QIcon("resources/icons/checkmark-circle-2-outline.png"))
-            #self.update_scanlistListWidget(self.scanner.scanlist)
+            if payload["scan_item"] is self.scanner.active_scan_item:
+                self.handle_scan_item_status_change(payload["new_status"])
+            # change icon of the scan item in scanlistListWidget
+            self.scanlist_model.sync()
 
         if event == EventEnum.SCAN_ITEM_PARAMETERS_CHANGED:
-            self.populate_parameterFormLayout(self.scanner.active_scan_item)
+            # Only the editors of the scan parameters that changed are updated.
+            scan_item = payload["scan_item"]
+            if scan_item is self.scanner.active_scan_item:
+                self.ui.parameterFormLayout.set_parameters({key: scan_item.scan_parameters[key] for key in payload["changed_keys"]})
 
 
             
\ No newline at end of file
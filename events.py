@@ -1,19 +1,112 @@
 from enum import Enum, auto
+from contextlib import contextmanager
+import logging
+import weakref
+
+from tracing import event_tracer, span_timer
+
+logger = logging.getLogger(__name__)
 
 class EventEnum(Enum):
     '''Enum class for events. Each event is represented by a unique value. The values are automatically assigned by the auto() function. The events are used to notify the observers of changes in the model (i.e., model of the model-view-controller architecture which in this app is an abstraction of the scanner).
     
-    In the future it might make sense to create a separate class for each event type, but for now, we will keep it simple and use this enum class. It may also make sense in the future to create Event classes that contain more information about the event, such as the object that triggered the event, the data associated with the event, etc instead of using just an enumeration. '''
+    In the future it might make sense to create a separate class for each event type, but for now, we will keep it simple and use this enum class. Information about what changed is passed along with the event as a payload of keyword arguments (see Subject). The payload of each event is listed next to it below. '''
 
     # Scan volume events
     SCAN_VOLUME_DISPLAY_TRANSLATED = auto() # Event for when the scan volume display is translated, i.e., when the user moves the scan volume display object in a viewing window on the UI
     SCAN_VOLUME_CHANGED = auto() # Event for when the scan volume is updated, i.e., when the scan volume parameters are changed 
     
     # Scanlist events
-    SCANLIST_ITEM_ADDED = auto() # Event for when a scanlist item is added to the scanlist
-    SCANLIST_ITEM_REMOVED = auto() # Event for when a scanlist item is removed from the scanlist
-    SCANLIST_ACTIVE_SCANLIST_ELEMENT_CHANGED = auto() # Event for when the active index of the scanlist is changed OR for when a different scanlist element in the scanlist becomes active
+    SCANLIST_ITEM_ADDED = auto() # Event for when a scanlist item is added to the scanlist. Payload: indices (set of the indices of the added scanlist items)
+    SCANLIST_ITEM_REMOVED = auto() # Event for when a scanlist item is removed from the scanlist. Payload: indices (set of the indices the removed scanlist items had when they were removed)
+    SCANLIST_ACTIVE_SCANLIST_ELEMENT_CHANGED = auto() # Event for when the active index of the scanlist is changed OR for when a different scanlist element in the scanlist becomes active. Payload: active_idx
 
     # Scan item events
-    SCAN_ITEM_STATUS_CHANGED = auto() # Event for when the status of a scanlist element is changed, e.g., from 'BEING_MODIFIED' to 'READY_TO_SCAN'
-    SCAN_ITEM_PARAMETERS_CHANGED = auto() # Event for when the scan parameters of a scan item are changed
\ No newline at end of file
+    SCAN_ITEM_STATUS_CHANGED = auto() # Event for when the status of a scanlist element is changed, e.g., from 'BEING_MODIFIED' to 'READY_TO_SCAN'. Payload: scan_item, old_status, new_status
+    SCAN_ITEM_PARAMETERS_CHANGED = auto() # Event for when the scan parameters of a scan item are changed. Payload: scan_item, changed_keys (set of the keys of the scan parameters that changed)
+
+class Subject:
+    '''Base class for the parts of the scanner that notify observers of events (e.g., the scanlist and scan items). 
+
+    Events carry a payload of keyword arguments that describes what changed, e.g., which scan parameters changed or what the old and new status of a scan item are. Observers receive the payload in their update() method: observer.update(event, **payload). 
+
+    Subscriptions are idempotent: adding an observer that is already subscribed has no effect, so an observer is notified at most once per event. Observers are held by weak reference, so a subject does not keep its observers alive; observers that have been garbage collected are dropped from the subscriptions automatically. Observers should still unsubscribe explicitly with remove_observer() when they are no longer interested in a subject.
+
+    Events emitted inside a batch_events() block are not delivered immediately. Instead, events of the same type are coalesced into a single notification that is delivered when the outermost block exits. Payloads are merged as follows: sets (e.g., changed_keys and indices) are combined, values whose key starts with "old_" keep their first value and all other values take their latest value. A coalesced event whose old_status equals its new_status is dropped, since nothing changed.'''
+
+    def __init__(self):
+        self._observer_refs = [] # weak references to the observers, in order of subscription
+        self._batch_depth = 0
+        self._pending_events = {} # EventEnum -> merged payload, in order of first occurrence
+
+    @property
+    def observers(self):
+        '''The observers that are currently subscribed and still alive.'''
+        observers = []
+        for observer_ref in self._observer_refs:
+            observer = observer_ref()
+            if observer is not None:
+                observers.append(observer)
+        if len(observers) != len(self._observer_refs):
+            self._observer_refs = [weakref.ref(observer) for observer in observers] # drop the references to observers that have been garbage collected
+        return observers
+
+    def has_observer(self, observer) -> bool:
+        return any(observer_ref() is observer for observer_ref in self._observer_refs)
+
+    def add_observer(self, observer):
+        if self.has_observer(observer):
+            return
+        self._observer_refs.append(weakref.ref(observer))
+        logger.debug("Observer %s added to %s", observer, self)
+
+    def remove_observer(self, observer):
+        if not self.has_observer(observer):
+            return
+        self._observer_refs = [observer_ref for observer_ref in self._observer_refs if observer_ref() is not observer]
+        logger.debug("Observer %s removed from %s", observer, self)
+
+    def notify_observers(self, event: EventEnum, **payload):
+        if self._batch_depth > 0:
+            pending_payload = self._pending_events.get(event)
+            if pending_payload is None:
+                self._pending_events[event] = payload
+            else:
+                self._pending_events[event] = merge_payloads(pending_payload, payload)
+            return
+        self._dispatch(event, payload)
+
+    def _dispatch(self, event: EventEnum, payload: dict):
+        with span_timer.span("observer dispatch"):
+            if event_tracer.enabled:
+                event_tracer.dispatch(self, self.observers, event, **payload)
+                return
+            for observer in self.observers:
+                observer.update(event, **payload)
+
+    @contextmanager
+    def batch_events(self):
+        '''Context manager that coalesces the events emitted inside the block (see class docstring). Blocks can be nested; events are delivered when the outermost block exits.'''
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                pending_events, self._pending_events = self._pending_events, {}
+                for event, payload in pending_events.items():
+                    if "old_status" in payload and payload["old_status"] == payload.get("new_status"):
+                        continue
+                    self._dispatch(event, payload)
+
+def merge_payloads(earlier: dict, later: dict) -> dict:
+    '''Merge the payloads of two events of the same type into the payload of a single event (see Subject).'''
+    merged = dict(earlier)
+    for key, value in later.items():
+        if key not in merged:
+            merged[key] = value
+        elif isinstance(value, (set, frozenset)):
+            merged[key] = merged[key] | value
+        elif not key.startswith("old_"):
+            merged[key] = value
+    return merged
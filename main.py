@@ -5,6 +5,8 @@ from simulator.scanner import Scanner
 from controllers.main_ctrl import MainController
 from views.main_view_ui import Ui_MainWindow
 from simulator.load import load_json
+from simulator.validation import load_validator
+from tracing import event_tracer, span_timer
 
 
 class App(QApplication):
@@ -32,6 +34,9 @@ class App(QApplication):
         # Scan parameters are passed to the parameter form layout so that it can create the appropriate QWidget editors for each scan parameter.
         self.main_view.parameterFormLayout.createForm(parameters)
 
+        # The validation rules in the same file are compiled once, so that the form can be validated on every keystroke.
+        self.main_view.parameterFormLayout.validator = load_validator()
+
 
 def main():
     app = App(sys.argv)
@@ -41,7 +46,16 @@ def main():
     default_font.setWeight(55)
     app.setFont(default_font)
 
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+
+    # Dump the traced observer notifications if event tracing was enabled (see tracing.py)
+    if event_tracer.enabled:
+        event_tracer.dump()
+
+    # Close the timing log of the session if span timing was enabled (see tracing.py)
+    span_timer.close()
+
+    sys.exit(exit_code)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
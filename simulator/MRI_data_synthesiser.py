@@ -1,7 +1,28 @@
 from simulator.model import Model
+from simulator.kspace import KSPACE_PARAMETER_KEYS, acquire_kspace, kspace_settings
+from simulator.reslice import GEOMETRY_PARAMETER_KEYS, calculate_slices, relative_slice_thickness
+from simulator.noise import NOISE_PARAMETER_KEYS, REFERENCE_NOISE_FRACTION, add_noise, noise_seed, relative_snr
+from simulator.relaxation import RelaxationCache
+from simulator.echo_train import ECHO_PARAMETER_KEYS, EchoTrainCalculator, echo_times_ms
+from simulator.validation import float_parameter, parse_float_list
+from simulator import bloch
+from tracing import span_timer
 import numpy as np
 from abc import ABC, abstractmethod
 
+SIGNAL_CALCULATOR_REGISTRY = {} # Scan technique -> SignalCalculator subclass. Filled by register_signal_calculator().
+
+def register_signal_calculator(scan_technique):
+    '''Class decorator that registers a SignalCalculator subclass for a scan technique. Registered techniques are offered in the scan technique editor for models that have the maps they need. Add the technique to the "ScanTechnique" choices in scan_parameters/scan_parameters.json as well, so that it passes validation.'''
+    def register(calculator_class):
+        SIGNAL_CALCULATOR_REGISTRY[scan_technique] = calculator_class
+        return calculator_class
+    return register
+
+def available_scan_techniques(model) -> list:
+    '''Return the registered scan techniques whose maps the model has, in order of registration.'''
+    return [scan_technique for scan_technique, calculator_class in SIGNAL_CALCULATOR_REGISTRY.items() if all(getattr(model, attribute, None) is not None for attribute in calculator_class.required_maps)]
+
 class MRIDataSynthesiser:
     def __init__(self):
         self._signal_calculator_factory = SignalCalculatorFactory()
@@ -10,10 +31,40 @@ class MRIDataSynthesiser:
     def signal_calculator_factory(self):
         return self._signal_calculator_factory
 
+    def acquisition_key(self, scan_parameters : dict):
+        '''
+        Return a hashable key that is equal for scan parameters that synthesise the same data from the same model, i.e., scan parameters with the same scan technique that only differ in parameters the scan technique does not use. Returns None if the scan technique is invalid.'''
+        try:
+            signal_calculator = self.signal_calculator_factory.create_signal_calculator(scan_parameters)
+        except ValueError:
+            return None
+        keys = signal_calculator.parameter_keys + GEOMETRY_PARAMETER_KEYS + KSPACE_PARAMETER_KEYS + NOISE_PARAMETER_KEYS + ECHO_PARAMETER_KEYS if signal_calculator.parameter_keys is not None else sorted(scan_parameters)
+        effective_parameters = []
+        for key in keys:
+            value = scan_parameters.get(key)
+            if value == "": # empty optional parameters are the same as missing ones
+                value = None
+            try: effective_parameters.append((key, float(value)))
+            except (TypeError, ValueError): effective_parameters.append((key, value))
+        return (scan_parameters.get("ScanTechnique"), tuple(effective_parameters))
+
     def synthesise_MRI_data(self, scan_parameters : dict, model : Model) -> np.ndarray:
         signal_calculator = self.signal_calculator_factory.create_signal_calculator(scan_parameters)
         if signal_calculator:
-            return signal_calculator.calculate_signal(scan_parameters, model)
+            echo_times = echo_times_ms(scan_parameters)
+            if echo_times is not None: # multi-echo scan: the images have the echoes along a fourth axis
+                signal_calculator = EchoTrainCalculator(signal_calculator, echo_times)
+            with span_timer.span("signal"):
+                signal_array = calculate_slices(signal_calculator, scan_parameters, model)
+            with span_timer.span("k-space"):
+                if signal_array.ndim == 3:
+                    images = acquire_kspace(signal_array, scan_parameters, model.resolution_mm)
+                else:
+                    images = np.stack([acquire_kspace(signal_array[..., echo_idx], scan_parameters, model.resolution_mm) for echo_idx in range(signal_array.shape[3])], axis=-1)
+            with span_timer.span("noise"):
+                snr = relative_snr(scan_parameters, kspace_settings(scan_parameters, signal_array.shape, model.resolution_mm), signal_array.shape, relative_slice_thickness(scan_parameters, model.resolution_mm))
+                noise_sd = REFERENCE_NOISE_FRACTION * float(np.max(model.PDmap)) / snr if snr > 0 else 0.0 # slices of thickness 0 are sampled without noise
+                return add_noise(images, noise_sd, noise_seed(scan_parameters, self.acquisition_key(scan_parameters)))
         else:
             raise ValueError("Invalid scan technique")
 
@@ -21,10 +72,8 @@ class MRIDataSynthesiser:
 class SignalCalculatorFactory:
     def __init__(self):
         self._cache = {}
-        self._calculator_registry = {
-            "SE": SESignalCalculator,
-            "GE": GESignalCalculator
-        }
+        self._calculator_registry = SIGNAL_CALCULATOR_REGISTRY
+        self._relaxation_cache = RelaxationCache() # shared by the signal calculators of this factory
 
     @property
     def cache(self):
@@ -37,6 +86,10 @@ class SignalCalculatorFactory:
     @property
     def calculator_registry(self):
         return self._calculator_registry
+
+    @property
+    def relaxation_cache(self):
+        return self._relaxation_cache
     
     def create_signal_calculator(self, scan_parameters):
         scan_technique = scan_parameters.get("ScanTechnique")
@@ -45,7 +98,7 @@ class SignalCalculatorFactory:
         
         calculator_class = self.calculator_registry.get(scan_technique)
         if calculator_class:
-            signal_calculator = calculator_class()
+            signal_calculator = calculator_class(self.relaxation_cache)
             self.cache[scan_technique] = signal_calculator
             return signal_calculator
         else:
@@ -53,46 +106,157 @@ class SignalCalculatorFactory:
         
 
 class SignalCalculator(ABC):
+    parameter_keys = None # Keys of the scan parameters that calculate_signal() uses. None means all scan parameters.
+    required_maps = ("PDmap", "T1map_ms", "T2map_ms") # Maps of the model that calculate_signal() uses
+    echo_decay_map = "T2map_ms" # Map of the relaxation time with which the signal decays with TE, i.e., the signal is proportional to exp(-TE / map). None if TE affects the signal otherwise. Used for multi-echo scans (see echo_train).
+
+    def __init__(self, relaxation_cache=None):
+        self.relaxation_cache = relaxation_cache if relaxation_cache is not None else RelaxationCache()
+
+    def E1(self, model, time_ms):
+        return self.relaxation_cache.decay(model, "T1map_ms", time_ms)
+
+    def E2(self, model, time_ms):
+        return self.relaxation_cache.decay(model, "T2map_ms", time_ms)
+
+    def E2s(self, model, time_ms):
+        return self.relaxation_cache.decay(model, "T2smap_ms", time_ms)
+
     @abstractmethod
     def calculate_signal(self):
         pass 
 
+@register_signal_calculator("SE")
 class SESignalCalculator(SignalCalculator): 
+    parameter_keys = ("TE_ms", "TR_ms", "TI_ms")
+
     def calculate_signal(self, scan_parameters : dict, model : Model) -> np.ndarray:
         TE = scan_parameters['TE_ms']
         TR = scan_parameters['TR_ms']
         TI = scan_parameters['TI_ms']
 
-        PD = model.PDmap[:, :] 
-        T1 = model.T1map_ms[:, :]
-        T2 = model.T2map_ms[:, :]
+        PD = model.PDmap
 
-        with np.errstate(divide='ignore', invalid='ignore'): # supress warnings about division by zero and invalid values since these are handled in the code
-            signal_array = np.abs(PD * np.exp(np.divide(-TE,T2)) * (1 - 2 * np.exp(np.divide(-TI, T1)) + np.exp(np.divide(-TR, T1))))   
+        signal_array = np.abs(PD * self.E2(model, TE) * (1 - 2 * self.E1(model, TI) + self.E1(model, TR)))
 
         signal_array = np.nan_to_num(signal_array, nan=0) # replace all nan values with 0. This is necessary because the signal_array can contain nan values, for example if both TI and T1 are 0. 
 
         return signal_array
 
+@register_signal_calculator("GE")
 class GESignalCalculator(SignalCalculator):
+    parameter_keys = ("TE_ms", "TR_ms", "FA_deg")
+    required_maps = ("PDmap", "T1map_ms", "T2smap_ms")
+    echo_decay_map = "T2smap_ms"
+
     def calculate_signal(self, scan_parameters : dict, model : Model) -> np.ndarray:
         TE = scan_parameters['TE_ms']
         TR = scan_parameters['TR_ms']
         FA = np.deg2rad(scan_parameters['FA_deg'])
 
-        PD = model.PDmap[:, :] 
-        T1 = model.T1map_ms[:, :]
-        T2s = model.T2smap_ms[:, :]
-
+        PD = model.PDmap
+        E1 = self.E1(model, TR)
+        E2s = self.E2s(model, TE)
 
         with np.errstate(divide='ignore', invalid='ignore'): # supress warnings about division by zero and invalid values since these are handled in the code
-            E1 = np.exp(np.divide(-TR, T1))
-            E2 = np.exp(np.divide(-TE, T2s))
-
-            signal_array = np.abs(np.divide(PD * E2 * np.sin(FA) * (1 - E1), 1 - E1 * np.cos(FA)))
+            signal_array = np.abs(np.divide(PD * E2s * np.sin(FA) * (1 - E1), 1 - E1 * np.cos(FA)))
 
         signal_array = np.nan_to_num(signal_array, nan=0) # replace all nan values with 0. This is necessary because the signal_array can contain nan values, for example if both TI and T1 are 0. 
 
         return signal_array
 
-        
+@register_signal_calculator("IR")
+class IRSignalCalculator(SignalCalculator):
+    '''Inversion recovery spin echo: an inversion pulse TI before the excitation pulse of a spin echo. Magnitude reconstruction, so tissues with negative longitudinal magnetization at the excitation pulse appear bright as well.'''
+    parameter_keys = ("TE_ms", "TR_ms", "TI_ms")
+    null_T1_ms = None # T1 of the tissue whose signal is nulled if TI is 0. None means that TI is used as given.
+
+    def inversion_time(self, scan_parameters):
+        TI = float_parameter(scan_parameters, 'TI_ms', 0.0)
+        if TI > 0 or self.null_T1_ms is None:
+            return TI
+        # Longitudinal magnetization 1 - 2 * exp(-TI / T1) + exp(-TR / T1) is 0 for the nulled tissue
+        return self.null_T1_ms * np.log(2 / (1 + np.exp(-scan_parameters['TR_ms'] / self.null_T1_ms)))
+
+    def calculate_signal(self, scan_parameters : dict, model : Model) -> np.ndarray:
+        TE = scan_parameters['TE_ms']
+        TR = scan_parameters['TR_ms']
+        TI = self.inversion_time(scan_parameters)
+
+        signal_array = np.abs(model.PDmap * self.E2(model, TE) * (1 - 2 * self.E1(model, TI) + self.E1(model, TR)))
+
+        return np.nan_to_num(signal_array, nan=0)
+
+@register_signal_calculator("FLAIR")
+class FLAIRSignalCalculator(IRSignalCalculator):
+    '''Fluid-attenuated inversion recovery: inversion recovery that nulls cerebrospinal fluid if TI is 0.'''
+    null_T1_ms = 4000.0
+
+@register_signal_calculator("STIR")
+class STIRSignalCalculator(IRSignalCalculator):
+    '''Short-TI inversion recovery: inversion recovery that nulls fat if TI is 0.'''
+    null_T1_ms = 260.0
+
+@register_signal_calculator("bSSFP")
+class BalancedSSFPSignalCalculator(SignalCalculator):
+    '''Balanced steady-state free precession, on resonance. The transverse magnetization is refocused every TR, so the steady state depends on T2/T1.'''
+    parameter_keys = ("TE_ms", "TR_ms", "FA_deg")
+
+    def calculate_signal(self, scan_parameters : dict, model : Model) -> np.ndarray:
+        TR = scan_parameters['TR_ms']
+        FA = np.deg2rad(scan_parameters['FA_deg'])
+        E1 = self.E1(model, TR)
+        E2 = self.E2(model, TR)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            signal_array = np.abs(np.divide(model.PDmap * np.sin(FA) * (1 - E1) * self.E2(model, scan_parameters['TE_ms']), 1 - (E1 - E2) * np.cos(FA) - E1 * E2))
+
+        return np.nan_to_num(signal_array, nan=0)
+
+@register_signal_calculator("SPGR")
+class SpoiledGESignalCalculator(SignalCalculator):
+    '''
+    Spoiled gradient echo with an explicit spoiling model. SpoilingEfficiency is the fraction of the transverse magnetization that is destroyed before the next excitation pulse: 1 is ideal spoiling (the Ernst equation, as GE), 0 keeps all of it (the balanced SSFP steady state). The residual transverse magnetization decays with T2 and the echo with T2*.'''
+    parameter_keys = ("TE_ms", "TR_ms", "FA_deg", "SpoilingEfficiency")
+    required_maps = ("PDmap", "T1map_ms", "T2map_ms", "T2smap_ms")
+    echo_decay_map = "T2smap_ms"
+
+    def calculate_signal(self, scan_parameters : dict, model : Model) -> np.ndarray:
+        TR = scan_parameters['TR_ms']
+        FA = np.deg2rad(scan_parameters['FA_deg'])
+        residual_coherence = 1 - min(1.0, max(0.0, float_parameter(scan_parameters, 'SpoilingEfficiency', 1.0)))
+        E1 = self.E1(model, TR)
+        denominator = 1 - E1 * np.cos(FA)
+        if residual_coherence > 0:
+            denominator = denominator - residual_coherence * self.E2(model, TR) * (E1 - np.cos(FA))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            signal_array = np.abs(np.divide(model.PDmap * np.sin(FA) * (1 - E1) * self.E2s(model, scan_parameters['TE_ms']), denominator))
+
+        return np.nan_to_num(signal_array, nan=0)
+
+@register_signal_calculator("TSE")
+class TSESignalCalculator(SignalCalculator):
+    '''Turbo spin echo: EchoTrainLength echoes, EchoSpacing_ms apart, per excitation. TE is the effective echo time, i.e., that of the echo in the centre of k-space. The longitudinal magnetization recovers from the end of the echo train until the next excitation pulse.'''
+    parameter_keys = ("TE_ms", "TR_ms", "EchoTrainLength", "EchoSpacing_ms")
+
+    def calculate_signal(self, scan_parameters : dict, model : Model) -> np.ndarray:
+        echo_train_duration = float_parameter(scan_parameters, 'EchoTrainLength', 1.0) * float_parameter(scan_parameters, 'EchoSpacing_ms', 0.0)
+        recovery_time = max(0.0, scan_parameters['TR_ms'] - echo_train_duration)
+
+        signal_array = np.abs(model.PDmap * self.E2(model, scan_parameters['TE_ms']) * (1 - self.E1(model, recovery_time)))
+
+        return np.nan_to_num(signal_array, nan=0)
+
+@register_signal_calculator("Bloch")
+class BlochSignalCalculator(SignalCalculator):
+    '''Train of NPulses RF pulses, TR apart, simulated with the Bloch equations (see bloch.pulse_train). The flip angles cycle through FlipAngleTrain_deg, or are all FA_deg if it is empty. The signal is read TE after the last pulse, so few pulses show the approach to the steady state that GE, SPGR and bSSFP assume. TI > 0 adds an inversion pulse, RFPhaseIncrement_deg of 180 with SpoilingEfficiency 0 gives balanced SSFP.'''
+    parameter_keys = ("TE_ms", "TR_ms", "TI_ms", "FA_deg", "FlipAngleTrain_deg", "NPulses", "RFPhaseIncrement_deg", "SpoilingEfficiency")
+
+    def calculate_signal(self, scan_parameters : dict, model : Model) -> np.ndarray:
+        flip_angle_train = scan_parameters.get('FlipAngleTrain_deg')
+        flip_angles = parse_float_list(flip_angle_train) if flip_angle_train not in ("", None) else (scan_parameters['FA_deg'],)
+        sequence = bloch.pulse_train(flip_angles, scan_parameters['TR_ms'], scan_parameters['TE_ms'], float_parameter(scan_parameters, 'NPulses', 1.0), TI_ms=float_parameter(scan_parameters, 'TI_ms', 0.0), phase_increment_deg=float_parameter(scan_parameters, 'RFPhaseIncrement_deg', 0.0), spoiling_efficiency=min(1.0, max(0.0, float_parameter(scan_parameters, 'SpoilingEfficiency', 1.0))))
+        signal_array = np.abs(model.PDmap * bloch.simulate(model.T1map_ms, model.T2map_ms, *sequence))
+
+        return np.nan_to_num(signal_array, nan=0)
@@ -0,0 +1,170 @@
+'''Bloch-equation simulation of RF pulse sequences.
+
+simulate() follows the magnetization of every voxel through a list of events: RF pulses, free precession, spoilers and delays in which the magnetization relaxes with T1 and T2. It shows what the closed-form signal equations cannot, e.g., the approach to the steady state and trains of varying flip angles. The simulation is on resonance and without diffusion; a voxel is a single isochromat.
+
+The events are compiled into steps. Events without duration (RF pulses, precession, spoilers) act on all voxels alike, so the events between two delays are multiplied into a single 3 x 3 matrix. Each step applies such a matrix to the magnetization of all voxels at once (a matrix product) and then the relaxation of its delay, per voxel. Voxels are simulated in chunks of CHUNK_SIZE, spread over threads. Models that consist of a limited number of tissues, such as segmented anatomical models, are simulated once per unique (T1, T2) pair rather than once per voxel. A repeated block of events (the period) stops repeating as soon as the magnetization has reached its steady state.
+'''
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from simulator.threads import worker_threads
+
+RFPulse = namedtuple("RFPulse", ("flip_angle_deg", "phase_deg"), defaults=(0.0,)) # Instantaneous rotation around an axis in the transverse plane, at phase_deg from the x axis
+Precession = namedtuple("Precession", ("angle_deg",)) # Rotation of the transverse magnetization around the z axis, e.g., by off-resonance or to follow the phase of an RF phase cycling scheme
+Spoiler = namedtuple("Spoiler", ("efficiency",), defaults=(1.0,)) # Destroys the given fraction of the transverse magnetization
+Delay = namedtuple("Delay", ("duration_ms",)) # Free relaxation with T1 and T2
+
+CHUNK_SIZE = 32768 # Number of voxels simulated at once. Small enough for the magnetization of a chunk to stay in the CPU cache.
+STEADY_STATE_TOLERANCE = 1e-6 # The magnetization (in units of M0) is in its steady state if a period changes it by less than this
+STEADY_STATE_CHECK_INTERVAL = 8 # Number of periods between checks for the steady state
+TISSUE_SAMPLE_SIZE = 4096 # Number of voxels sampled to decide whether simulating the unique tissues is worthwhile
+
+
+def _rotation_z(angle_rad):
+    c, s = np.cos(angle_rad), np.sin(angle_rad)
+    return np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]])
+
+
+def _event_matrix(event):
+    if isinstance(event, RFPulse):
+        c, s = np.cos(np.deg2rad(event.flip_angle_deg)), np.sin(np.deg2rad(event.flip_angle_deg))
+        phase = np.deg2rad(event.phase_deg)
+        return _rotation_z(phase) @ np.array([[1, 0, 0], [0, c, s], [0, -s, c]]) @ _rotation_z(-phase)
+    if isinstance(event, Precession):
+        return _rotation_z(np.deg2rad(event.angle_deg))
+    if isinstance(event, Spoiler):
+        residual = 1 - event.efficiency
+        return np.diag([residual, residual, 1.0])
+    raise ValueError(f"Unknown Bloch event: {event!r}")
+
+
+def compile_events(events):
+    '''Compile events into a list of steps (matrix, duration in ms): the matrix is applied to the magnetization, which then relaxes for the duration. Events without duration are multiplied into the matrix of the next delay.'''
+    steps = []
+    matrix = np.eye(3)
+    for event in events:
+        if isinstance(event, Delay):
+            if event.duration_ms > 0:
+                steps.append((matrix, float(event.duration_ms)))
+                matrix = np.eye(3)
+        else:
+            matrix = _event_matrix(event) @ matrix
+    if not np.array_equal(matrix, np.eye(3)):
+        steps.append((matrix, 0.0))
+    return steps
+
+
+def _relaxation(T1_ms, T2_ms, durations_ms):
+    # (E1, 1 - E1, E2) per voxel for each duration
+    terms = {}
+    with np.errstate(divide='ignore'):
+        for duration_ms in durations_ms:
+            E1 = np.exp(-duration_ms / T1_ms)
+            terms[duration_ms] = (E1, 1 - E1, np.exp(-duration_ms / T2_ms))
+    return terms
+
+
+def _simulate_chunk(T1_ms, T2_ms, preparation, period, n_periods, readout):
+    relaxation = _relaxation(T1_ms, T2_ms, {duration for steps in (preparation, period, readout) for _, duration in steps if duration > 0})
+    state = np.zeros((3, T1_ms.size))
+    state[2] = 1 # fully relaxed
+    buffer = np.empty_like(state)
+
+    def apply(steps, state, buffer):
+        for matrix, duration in steps:
+            np.matmul(matrix, state, out=buffer)
+            state, buffer = buffer, state
+            if duration > 0:
+                E1, recovery, E2 = relaxation[duration]
+                state[:2] *= E2
+                state[2] *= E1
+                state[2] += recovery
+        return state, buffer
+
+    state, buffer = apply(preparation, state, buffer)
+    for period_idx in range(n_periods):
+        check = (period_idx + 1) % STEADY_STATE_CHECK_INTERVAL == 0
+        if check:
+            previous = state.copy()
+        state, buffer = apply(period, state, buffer)
+        if check and np.max(np.abs(state - previous)) < STEADY_STATE_TOLERANCE:
+            break # the remaining periods leave the magnetization unchanged
+    state, buffer = apply(readout, state, buffer)
+    return np.hypot(state[0], state[1])
+
+
+def _unique_tissues(T1_ms, T2_ms):
+    # Return the unique (T1, T2) pairs and the index of each voxel's pair, or None if a sample of the voxels suggests that most pairs are unique
+    keys = (T1_ms.astype(np.float32).view(np.uint32).astype(np.uint64) << np.uint64(32)) | T2_ms.astype(np.float32).view(np.uint32)
+    sample = keys[::max(1, keys.size // TISSUE_SAMPLE_SIZE)]
+    if np.unique(sample).size > sample.size // 2:
+        return None
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    unique_T1 = (unique_keys >> np.uint64(32)).astype(np.uint32).view(np.float32)
+    unique_T2 = (unique_keys & np.uint64(0xFFFFFFFF)).astype(np.uint32).view(np.float32)
+    return unique_T1, unique_T2, inverse
+
+
+def simulate(T1_ms, T2_ms, preparation=(), period=(), n_periods=0, readout=()):
+    '''
+    Simulate a sequence of events for every voxel, starting from fully relaxed magnetization: the preparation events once, the period events n_periods times and the readout events once.
+
+    Parameters:
+    T1_ms, T2_ms (np.ndarray): Relaxation times per voxel, of any (equal) shape. Voxels with a relaxation time of 0 relax instantly.
+    preparation, period, readout (sequence): Events, i.e., RFPulse, Precession, Spoiler and Delay tuples.
+    n_periods (int): Number of times the period is repeated.
+
+    Returns:
+    np.ndarray: The magnitude of the transverse magnetization after the readout events, for an equilibrium magnetization of 1, float32 with the shape of T1_ms.
+    '''
+    shape = np.shape(T1_ms)
+    T1_ms = np.asarray(T1_ms, dtype=np.float64).reshape(-1)
+    T2_ms = np.asarray(T2_ms, dtype=np.float64).reshape(-1)
+    steps = (compile_events(preparation), compile_events(period), int(n_periods), compile_events(readout))
+    tissues = _unique_tissues(T1_ms, T2_ms) if T1_ms.size > TISSUE_SAMPLE_SIZE else None
+    if tissues is not None:
+        T1_ms, T2_ms, inverse = tissues
+        T1_ms, T2_ms = T1_ms.astype(np.float64), T2_ms.astype(np.float64)
+    transverse = np.empty(T1_ms.size, dtype=np.float32)
+
+    def simulate_chunk(start):
+        stop = start + CHUNK_SIZE
+        transverse[start:stop] = _simulate_chunk(T1_ms[start:stop], T2_ms[start:stop], *steps)
+
+    chunks = range(0, T1_ms.size, CHUNK_SIZE)
+    workers = worker_threads()
+    if workers == 1 or len(chunks) <= 1:
+        for start in chunks:
+            simulate_chunk(start)
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            list(executor.map(simulate_chunk, chunks)) # NumPy releases the GIL in the array operations
+    if tissues is not None:
+        transverse = transverse[inverse]
+    return transverse.reshape(shape)
+
+
+def pulse_train(flip_angles_deg, TR_ms, TE_ms, n_pulses, TI_ms=0.0, phase_increment_deg=0.0, spoiling_efficiency=1.0):
+    '''
+    Return the (preparation, period, n_periods, readout) arguments of simulate() for a train of n_pulses RF pulses, TR_ms apart, whose flip angles cycle through flip_angles_deg. The signal is read TE_ms after the last pulse.
+
+    TI_ms > 0 adds an inversion pulse TI_ms before the first pulse. The phase of each pulse is phase_increment_deg more than that of the previous pulse, e.g., 180 for balanced SSFP. Before each pulse, spoiling_efficiency of the transverse magnetization is destroyed.
+
+    The phase increments are simulated in the frame that follows the phase of the pulses, where every pulse has phase 0 and the transverse magnetization precesses by -phase_increment_deg between pulses. The period, one pass through the flip angles, is then the same every time, so the train can stop repeating it in the steady state.'''
+    flip_angles_deg = list(flip_angles_deg)
+    n_pulses = max(1, int(n_pulses))
+    preparation = [RFPulse(180.0), Delay(TI_ms)] if TI_ms > 0 else []
+
+    def pulse(flip_angle_deg):
+        return [Spoiler(spoiling_efficiency), RFPulse(flip_angle_deg)]
+
+    def interval(flip_angle_deg):
+        return pulse(flip_angle_deg) + [Delay(TR_ms), Precession(-phase_increment_deg)]
+
+    period = [event for flip_angle_deg in flip_angles_deg for event in interval(flip_angle_deg)]
+    n_periods = (n_pulses - 1) // len(flip_angles_deg) # all pulses but the last one, in whole passes through the flip angles
+    remaining = [event for pulse_idx in range(n_periods * len(flip_angles_deg), n_pulses - 1) for event in interval(flip_angles_deg[pulse_idx % len(flip_angles_deg)])]
+    readout = remaining + pulse(flip_angles_deg[(n_pulses - 1) % len(flip_angles_deg)]) + [Delay(TE_ms)]
+    return preparation, period, n_periods, readout
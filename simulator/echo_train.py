@@ -0,0 +1,45 @@
+'''Multi-echo acquisitions.
+
+A scan whose EchoTimes_ms parameter lists several echo times, e.g., "10, 20, 40, 80", acquires an echo train: one image per echo time, stacked along a fourth axis after the slices. The echo times replace TE.
+
+The signal of every scan technique depends on the echo time through a single decay factor exp(-TE / T2) or exp(-TE / T2*) (the echo_decay_map of its SignalCalculator). EchoTrainCalculator therefore calculates the signal at the first echo time only and obtains each next echo by multiplying the previous one by the decay between the two echo times. The decay factors come from the relaxation cache of the signal calculator, so equally spaced echoes share one, and the signal of an echo train costs little more than that of a single echo. The later stages, i.e., reslicing, k-space acquisition and noise, process each echo as an image of its own. Signal calculators without an echo_decay_map are evaluated once per echo time.
+'''
+import numpy as np
+
+from simulator.validation import parse_float_list
+
+ECHO_PARAMETER_KEYS = ("EchoTimes_ms",) # Scan parameters that affect EchoTrainCalculator, in addition to those of the wrapped signal calculator
+
+
+def echo_times_ms(scan_parameters):
+    '''Return the echo times of a multi-echo scan as a tuple of floats, or None if EchoTimes_ms is empty or missing. Echo times are separated by commas and/or whitespace.'''
+    value = scan_parameters.get("EchoTimes_ms")
+    if value in ("", None):
+        return None
+    return parse_float_list(value)
+
+
+class EchoTrainCalculator:
+    '''Wraps a SignalCalculator to calculate the signal at several echo times (see the module docstring). calculate_signal() returns the signal with the echoes along an extra last axis.'''
+
+    def __init__(self, signal_calculator, echo_times_ms):
+        self.signal_calculator = signal_calculator
+        self.echo_times_ms = tuple(echo_times_ms)
+
+    def calculate_signal(self, scan_parameters : dict, model) -> np.ndarray:
+        first_echo = self.signal_calculator.calculate_signal({**scan_parameters, "TE_ms": self.echo_times_ms[0]}, model)
+        echoes = np.empty((len(self.echo_times_ms),) + first_echo.shape, dtype=np.float32) # echoes first while they are calculated, so that each echo is contiguous
+        echoes[0] = first_echo
+        decay_map = self.signal_calculator.echo_decay_map
+        for echo_idx in range(1, len(self.echo_times_ms)):
+            echo_time = self.echo_times_ms[echo_idx]
+            if decay_map is None:
+                echoes[echo_idx] = self.signal_calculator.calculate_signal({**scan_parameters, "TE_ms": echo_time}, model)
+                continue
+            step_ms = echo_time - self.echo_times_ms[echo_idx - 1]
+            if step_ms == 0:
+                echoes[echo_idx] = echoes[echo_idx - 1]
+                continue
+            np.multiply(echoes[echo_idx - 1], self.signal_calculator.relaxation_cache.decay(model, decay_map, step_ms), out=echoes[echo_idx])
+            np.nan_to_num(echoes[echo_idx], copy=False, nan=0) # voxels with a relaxation time of 0 and echo times that go back in time
+        return np.moveaxis(echoes, 0, -1)
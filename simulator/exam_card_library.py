@@ -0,0 +1,86 @@
+import bisect
+import os
+import re
+
+from simulator.load import load_json
+
+EXAM_CARDS_FILE_PATH = 'repository/exam_cards/exam_cards.json'
+
+_libraries = {} # file path -> ExamCardLibrary, so that each exam card file is parsed once per process
+
+
+class ExamCardLibrary:
+    '''
+    The exam cards of an exam card file, parsed once and indexed for searching.
+
+    refresh() only reloads the file if its modification time or size changed since it was last loaded, so it is cheap to call every time the exam cards are shown. The library's generation is incremented on every reload, so that views can tell whether they are up to date.
+
+    The search index maps every word in the names and descriptions of the exam cards to the rows of the exam cards that contain it. search() matches each word of the query against the beginnings of the indexed words, so "spin ech" finds the spin echo exam cards.'''
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.generation = 0
+        self.names = [] # Exam card names in file order. The row of an exam card is its position in this list.
+        self.cards = {} # name -> scan parameters
+        self._file_signature = None # (modification time, size) of the file when it was last loaded
+        self._words = [] # Sorted indexed words
+        self._rows_by_word = {} # word -> set of rows
+        self.refresh()
+
+    def refresh(self):
+        '''Reload the exam cards if the file changed since it was last loaded. Returns True if it was reloaded.'''
+        stat = os.stat(self.file_path)
+        file_signature = (stat.st_mtime_ns, stat.st_size)
+        if file_signature == self._file_signature:
+            return False
+        self.cards = load_json(self.file_path)
+        self.names = list(self.cards.keys())
+        self._build_index()
+        self._file_signature = file_signature
+        self.generation += 1
+        return True
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query):
+        '''Return the rows of the exam cards whose name or description contains a word that starts with each word in the query, in file order. An empty query matches every exam card.'''
+        query_words = _words(query)
+        if not query_words:
+            return list(range(len(self.names)))
+        rows = None
+        for query_word in query_words:
+            matching_rows = set()
+            start = bisect.bisect_left(self._words, query_word)
+            for word in self._words[start:]:
+                if not word.startswith(query_word):
+                    break
+                matching_rows |= self._rows_by_word[word]
+            rows = matching_rows if rows is None else rows & matching_rows
+            if not rows:
+                return []
+        return sorted(rows)
+
+    def _build_index(self):
+        rows_by_word = {}
+        for row, name in enumerate(self.names):
+            card = self.cards[name]
+            description = card.get("description", "") if isinstance(card, dict) else ""
+            for word in _words(name + " " + str(description)):
+                rows_by_word.setdefault(word, set()).add(row)
+        self._rows_by_word = rows_by_word
+        self._words = sorted(rows_by_word)
+
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def load_exam_card_library(file_path=EXAM_CARDS_FILE_PATH):
+    '''Return the exam card library of file_path, refreshed if the file changed. The file is only parsed again when it changed.'''
+    library = _libraries.get(file_path)
+    if library is None:
+        library = _libraries[file_path] = ExamCardLibrary(file_path)
+    else:
+        library.refresh()
+    return library
@@ -1,7 +1,13 @@
 from simulator.scanlist import Scanlist
+from simulator.series_store import SeriesStore
 
 class Examination:
     def __init__(self, name, model):
         self.name = name 
         self.model = model 
-        self.scanlist = Scanlist()
+        self.series_store = SeriesStore() # Keeps the acquired series within a memory budget
+        self.scanlist = Scanlist(self.series_store)
+
+    def close(self):
+        # Delete the temporary files of the acquired series that were spilled to disk.
+        self.series_store.close()
@@ -0,0 +1,149 @@
+'''Saving and loading examinations.
+
+An examination file (.exam) consists of a fixed-size preamble, a JSON header and the acquired series. The header describes the examination: its name, the model it was scanned on, and the name, scan parameters, status and messages of every scan item. Each acquired series is stored as a raw block of array data, aligned to BLOCK_ALIGNMENT bytes so that it can be memory-mapped.
+
+A series that is shared by several scan items (see SeriesStore) is stored once.
+
+Loading an examination only reads the preamble and the header. The acquired series are memory-mapped read-only and handed to the examination's series store as they are, so a series is read from disk when it is displayed, not when the examination is opened.
+'''
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from simulator.examination import Examination
+from simulator.MRI_data_synthesiser import MRIDataSynthesiser
+from simulator.scanlist import ScanlistElement, ScanItemStatusEnum
+
+FILE_EXTENSION = ".exam"
+MAGIC = b"EDUMRIEX"
+FORMAT_VERSION = 1
+BLOCK_ALIGNMENT = 4096 # Acquired series start at multiples of this offset (in bytes), which is a multiple of the page size of common platforms.
+_PREAMBLE = struct.Struct("<8sIQQ") # magic, format version, header length, offset of the first acquired series
+
+
+def _align(offset):
+    return -(-offset // BLOCK_ALIGNMENT) * BLOCK_ALIGNMENT
+
+
+def _saved_status(scan_item):
+    # Edits that have not been saved only exist on the UI, so an item that is being modified is saved with the status it returns to when its changes are cancelled.
+    if scan_item.status == ScanItemStatusEnum.BEING_MODIFIED:
+        return ScanItemStatusEnum.READY_TO_SCAN if scan_item.valid else ScanItemStatusEnum.INVALID
+    return scan_item.status
+
+
+def save_examination(examination, file_path):
+    '''
+    Save the examination to file_path. The file is written next to its destination first and then moved into place, so an existing file is only replaced by a complete one.
+
+    Parameters:
+    examination (Examination): The examination to save.
+    file_path (str): Path of the examination file.
+    '''
+    series = []
+    elements = []
+    series_offset = 0
+    saved_series = {} # id of a series -> its block in the file, so that shared series are saved once
+    for scanlist_element in examination.scanlist.scanlist_elements:
+        scan_item = scanlist_element.scan_item
+        element = {
+            "name": scanlist_element.name,
+            "scan_parameters": scan_item.scan_parameters,
+            "scan_parameters_original": scan_item.scan_parameters_original,
+            "status": _saved_status(scan_item).name,
+            "valid": scan_item.valid,
+            "messages": scan_item.messages,
+            "series": None,
+        }
+        acquired_data = scanlist_element.peek_acquired_data() # spilled series are copied from disk without reading them back into memory for good
+        if acquired_data is not None and id(acquired_data) in saved_series:
+            element["series"] = saved_series[id(acquired_data)]
+        elif acquired_data is not None:
+            array = np.ascontiguousarray(acquired_data)
+            element["series"] = {"offset": series_offset, "shape": list(array.shape), "dtype": array.dtype.str}
+            saved_series[id(acquired_data)] = element["series"]
+            series.append((series_offset, array))
+            series_offset = _align(series_offset + array.nbytes)
+        elements.append(element)
+    header = json.dumps({
+        "name": examination.name,
+        "model": {"name": examination.model.name, "shape": list(np.shape(examination.model.T1map_ms))},
+        "active_idx": examination.scanlist.active_idx,
+        "scanlist": elements,
+    }).encode("utf-8")
+    data_offset = _align(_PREAMBLE.size + len(header))
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    file_descriptor, temporary_file_path = tempfile.mkstemp(prefix=".", suffix=FILE_EXTENSION, dir=directory)
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header), data_offset))
+            file.write(header)
+            for offset, array in series:
+                file.seek(data_offset + offset)
+                array.tofile(file)
+            file.truncate(data_offset + series_offset if series else _PREAMBLE.size + len(header))
+        os.replace(temporary_file_path, file_path)
+    except BaseException:
+        if os.path.exists(temporary_file_path):
+            os.remove(temporary_file_path)
+        raise
+
+
+def read_examination_header(file_path):
+    '''
+    Read the header of an examination file without reading any acquired series, e.g., to find out which model it needs before loading it.
+
+    Returns:
+    dict: The header. Its "name" is the name of the examination and its "model" holds the name of the model the examination was scanned on.
+    '''
+    with open(file_path, "rb") as file:
+        preamble = file.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size:
+            raise ValueError(f"{file_path} is not an examination file")
+        magic, version, header_length, data_offset = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ValueError(f"{file_path} is not an examination file")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{file_path} was saved by a newer version of eduMRIsim (format version {version})")
+        header = json.loads(file.read(header_length).decode("utf-8"))
+    header["data_offset"] = data_offset
+    return header
+
+
+def load_examination(file_path, model):
+    '''
+    Load an examination from file_path. The acquired series are memory-mapped read-only and are only read from disk when they are accessed.
+
+    Parameters:
+    file_path (str): Path of the examination file.
+    model (Model): The model the examination was scanned on, i.e., the model named in the file's header (see read_examination_header).
+
+    Returns:
+    Examination: The examination, with the scanlist, scan parameters, statuses and acquired series it had when it was saved.
+    '''
+    header = read_examination_header(file_path)
+    if list(np.shape(model.T1map_ms)) != header["model"]["shape"]:
+        raise ValueError(f"The examination was scanned on model {header['model']['name']} {tuple(header['model']['shape'])}, which does not match model {model.name} {np.shape(model.T1map_ms)}")
+    examination = Examination(header["name"], model)
+    scanlist = examination.scanlist
+    synthesiser = MRIDataSynthesiser()
+    for element in header["scanlist"]:
+        scanlist_element = ScanlistElement(element["name"], element["scan_parameters"], scanlist.series_store)
+        scan_item = scanlist_element.scan_item
+        scan_item.scan_parameters_original = element["scan_parameters_original"]
+        scan_item.valid = element["valid"]
+        scan_item.messages = element["messages"]
+        scan_item.status = ScanItemStatusEnum[element["status"]]
+        series = element["series"]
+        if series is not None:
+            # The series of a complete scan item matches its scan parameters, so it can be shared with scan items that are scanned with the same effective scan parameters later. The series of other scan items may be outdated.
+            acquisition_key = synthesiser.acquisition_key(scan_item.scan_parameters) if scan_item.status == ScanItemStatusEnum.COMPLETE else None
+            if not scanlist_element.reuse_acquired_data(acquisition_key):
+                scanlist_element.store_acquired_data(np.memmap(file_path, dtype=np.dtype(series["dtype"]), mode="r", offset=header["data_offset"] + series["offset"], shape=tuple(series["shape"])), acquisition_key)
+        scanlist.scanlist_elements.append(scanlist_element)
+    scanlist.active_idx = header["active_idx"]
+    return examination
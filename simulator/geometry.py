@@ -0,0 +1,86 @@
+'''Geometry of images and scan volumes in the LPS coordinate system, for planning overlays.
+
+The intersection of a scan volume with an image is computed for all 12 edges of the scan volume at once: the signed distances of the 8 corners to the image plane decide which edges cross the plane, and the crossings follow in closed form by linear interpolation between the corners of those edges. Converting between LPS and pixmap coordinates is a single matrix product, with the matrices computed once per ImageGeometry. This is cheap enough to update the overlays of all planning windows on every mouse move.
+'''
+from functools import cached_property
+import itertools
+
+import numpy as np
+
+BOX_CORNER_SIGNS = np.array(list(itertools.product((-1, 1), repeat=3)), dtype=float) # Corners of a box centred on the origin, in units of half its extent along each axis
+BOX_EDGES = np.array([(corner, corner | bit) for corner in range(8) for bit in (1, 2, 4) if not corner & bit]) # Pairs of indices into BOX_CORNER_SIGNS of corners that differ along one axis only
+PLANE_TOLERANCE_MM = 1e-6 # Corners closer to a plane than this lie on it
+
+
+class ImageGeometry:
+    '''
+    Position of a 2D image in the LPS coordinate system.
+
+    The image is centred on origin_LPS. Its pixmap x axis (columns) points along axisX_LPS and its pixmap y axis (rows) along axisY_LPS. The image extends extentX_mm and extentY_mm along these axes, with pixels of resX_mm by resY_mm. Pixmap coordinates are in pixels, with (0, 0) at the top left corner of the top left pixel, as in Qt.
+
+    The geometry should not be changed after it has been created, since the conversion matrices are cached.'''
+
+    def __init__(self, geometry_parameters: dict):
+        self.origin_LPS = np.asarray(geometry_parameters['origin_LPS'], dtype=float)
+        self.axisX_LPS = np.asarray(geometry_parameters['axisX_LPS'], dtype=float)
+        self.axisY_LPS = np.asarray(geometry_parameters['axisY_LPS'], dtype=float)
+        self.extentX_mm = float(geometry_parameters['extentX_mm'])
+        self.extentY_mm = float(geometry_parameters['extentY_mm'])
+        self.resX_mm = float(geometry_parameters.get('resX_mm', 1))
+        self.resY_mm = float(geometry_parameters.get('resY_mm', 1))
+
+    @cached_property
+    def normal_LPS(self) -> np.ndarray:
+        '''Unit normal of the image plane'''
+        normal = np.cross(self.axisX_LPS, self.axisY_LPS)
+        return normal / np.linalg.norm(normal)
+
+    @cached_property
+    def _pixmap_to_LPS_matrix(self) -> np.ndarray:
+        # Affine 3 x 3 matrix that maps (x, y, 1) in pixmap coordinates to LPS coordinates
+        top_left_LPS = self.origin_LPS - self.extentX_mm / 2 * self.axisX_LPS - self.extentY_mm / 2 * self.axisY_LPS
+        return np.column_stack((self.axisX_LPS * self.resX_mm, self.axisY_LPS * self.resY_mm, top_left_LPS))
+
+    @cached_property
+    def _LPS_to_pixmap_matrix(self) -> np.ndarray:
+        # Affine 2 x 4 matrix that maps (L, P, S, 1) to pixmap coordinates, projecting points onto the image plane
+        linear = np.vstack((self.axisX_LPS / self.resX_mm, self.axisY_LPS / self.resY_mm))
+        return np.column_stack((linear, -linear @ self._pixmap_to_LPS_matrix[:, 2]))
+
+    def LPS_coords_to_pixmap_coords(self, LPS_coords) -> np.ndarray:
+        '''Convert LPS coordinates in millimeters to pixmap coordinates. Accepts a single point or an array of points along the last axis. Points outside the image plane are projected onto it.'''
+        return np.asarray(LPS_coords) @ self._LPS_to_pixmap_matrix[:, :3].T + self._LPS_to_pixmap_matrix[:, 3]
+
+    def pixmap_coords_to_LPS_coords(self, pixmap_coords) -> np.ndarray:
+        '''Convert pixmap coordinates to LPS coordinates in millimeters. Accepts a single point or an array of points along the last axis.'''
+        return np.asarray(pixmap_coords) @ self._pixmap_to_LPS_matrix[:, :2].T + self._pixmap_to_LPS_matrix[:, 2]
+
+
+def box_corners_LPS(origin_LPS, axes_LPS, extents_mm) -> np.ndarray:
+    '''Return the 8 corners (8 x 3, in the order of BOX_CORNER_SIGNS) of a box centred on origin_LPS, with its axes along the columns of axes_LPS (3 x 3) and the given extents along them.'''
+    return origin_LPS + (BOX_CORNER_SIGNS * (np.asarray(extents_mm, dtype=float) / 2)) @ np.asarray(axes_LPS, dtype=float).T
+
+
+def intersect_box_with_image(corners_LPS, image_geometry: ImageGeometry) -> np.ndarray:
+    '''
+    Intersect a box with the plane of an image.
+
+    Parameters:
+    corners_LPS (np.ndarray): The 8 corners of the box, as returned by box_corners_LPS().
+    image_geometry (ImageGeometry): The geometry of the image.
+
+    Returns:
+    np.ndarray: The corners of the polygon in which the box intersects the image plane, in pixmap coordinates (K x 2), ordered by angle around their centroid. Empty (0 x 2) if the box does not intersect the plane in a polygon.
+    '''
+    distances = (corners_LPS - image_geometry.origin_LPS) @ image_geometry.normal_LPS
+    on_plane = np.abs(distances) <= PLANE_TOLERANCE_MM
+    start_distances, end_distances = distances[BOX_EDGES[:, 0]], distances[BOX_EDGES[:, 1]]
+    crossing = (start_distances * end_distances < 0) & ~on_plane[BOX_EDGES[:, 0]] & ~on_plane[BOX_EDGES[:, 1]]
+    fractions = (start_distances[crossing] / (start_distances[crossing] - end_distances[crossing]))[:, None]
+    starts, ends = corners_LPS[BOX_EDGES[crossing, 0]], corners_LPS[BOX_EDGES[crossing, 1]]
+    points_LPS = np.concatenate((corners_LPS[on_plane], starts + fractions * (ends - starts)))
+    if len(points_LPS) < 3:
+        return np.empty((0, 2))
+    points_pixmap = image_geometry.LPS_coords_to_pixmap_coords(points_LPS)
+    offsets = points_pixmap - points_pixmap.mean(axis=0)
+    return points_pixmap[np.argsort(np.arctan2(offsets[:, 1], offsets[:, 0]))]
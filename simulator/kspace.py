@@ -0,0 +1,99 @@
+'''k-space acquisition stage of the MRI data synthesiser.
+
+The signal calculators return the signal of the model in image space, on the voxel grid of the model. acquire_kspace() turns it into the image a scanner would reconstruct for the prescribed field of view, acquisition matrix and partial-Fourier factor. Each slice (the third axis of the maps) is processed as follows:
+
+1. Field of view. The phase-encoding direction (first axis) is not filtered, so anatomy outside the field of view folds back into it (aliasing). The frequency-encoding direction (second axis) is cropped to the field of view, as the readout filter of a scanner would.
+2. The slice is Fourier transformed to k-space. Only the central MatrixPE x MatrixFE samples are kept, so a smaller matrix lowers the resolution and causes truncation (Gibbs) artefacts.
+3. Partial Fourier. Only the first PartialFourier fraction of the phase-encoding lines of the matrix is kept and the rest is zero-filled.
+4. The magnitude of the inverse Fourier transform is the reconstructed slice. It is zero-filled to the voxel grid of the model, so pixels keep the size of the model's voxels.
+
+Slices are transformed in batches of SLICE_BATCH_SIZE, with multi-threaded FFTs (scipy.fft).
+'''
+import math
+
+import numpy as np
+import scipy.fft
+
+from simulator.threads import worker_threads
+from simulator.validation import float_parameter
+
+KSPACE_PARAMETER_KEYS = ("FOVPE_mm", "FOVFE_mm", "MatrixPE", "MatrixFE", "PartialFourier") # Scan parameters that affect acquire_kspace(). Empty or missing values mean: the extent of the model (field of view), the number of voxels in the field of view (matrix), and 1 (partial Fourier).
+SLICE_BATCH_SIZE = 16 # Number of slices transformed at once. Bounds the memory used for k-space to a few slices.
+
+
+def kspace_settings(scan_parameters, shape, resolution_mm):
+    '''
+    Return the (field of view in voxels along PE, along FE, matrix along PE, along FE, partial-Fourier factor) of the scan parameters for maps of the given shape and resolution, or None if the scan parameters prescribe the full model at full resolution, in which case acquire_kspace() would return the signal unchanged.'''
+    fov_pe_mm, fov_fe_mm = float_parameter(scan_parameters, "FOVPE_mm"), float_parameter(scan_parameters, "FOVFE_mm")
+    fov_pe = max(1, round(fov_pe_mm / resolution_mm[0]) if fov_pe_mm is not None else shape[0])
+    fov_fe = max(1, round(fov_fe_mm / resolution_mm[1]) if fov_fe_mm is not None else shape[1])
+    matrix_pe = min(fov_pe, max(1, int(float_parameter(scan_parameters, "MatrixPE", fov_pe)))) # k-space cannot be sampled beyond the resolution of the model
+    matrix_fe = min(fov_fe, max(1, int(float_parameter(scan_parameters, "MatrixFE", fov_fe))))
+    partial_fourier = min(1.0, max(0.5, float_parameter(scan_parameters, "PartialFourier", 1.0)))
+    if (fov_pe, fov_fe, matrix_pe, matrix_fe, partial_fourier) == (shape[0], shape[1], shape[0], shape[1], 1.0):
+        return None
+    return fov_pe, fov_fe, matrix_pe, matrix_fe, partial_fourier
+
+
+def _fold(slices, fov):
+    # Wrap the first axis around a field of view of fov voxels, centred on the centre of the slices, by summing the parts outside the field of view into it.
+    n = slices.shape[0]
+    if fov >= n:
+        before = (fov - n) // 2
+        return np.pad(slices, ((before, fov - n - before), (0, 0), (0, 0)))
+    start = (-((n - fov) // 2)) % fov # position in the field of view of the first voxel
+    total = math.ceil((start + n) / fov) * fov
+    padded = np.pad(slices, ((start, total - start - n), (0, 0), (0, 0)))
+    return padded.reshape(total // fov, fov, *slices.shape[1:]).sum(axis=0)
+
+
+def _crop(slices, fov):
+    # Crop or zero-pad the second axis to a field of view of fov voxels, centred on the centre of the slices.
+    n = slices.shape[1]
+    if fov >= n:
+        before = (fov - n) // 2
+        return np.pad(slices, ((0, 0), (before, fov - n - before), (0, 0)))
+    start = (n - fov) // 2
+    return slices[:, start:start + fov, :]
+
+
+def _sampling_window(size, matrix):
+    # Indices of the first and last + 1 k-space samples of a centred matrix in an fftshifted axis of the given size
+    start = size // 2 - matrix // 2
+    return start, start + matrix
+
+
+def acquire_kspace(signal_array, scan_parameters, resolution_mm=(1.0, 1.0, 1.0)):
+    '''
+    Acquire the signal in k-space with the field of view, matrix and partial-Fourier factor of the scan parameters and reconstruct it (see the module docstring).
+
+    Parameters:
+    signal_array (np.ndarray): Signal of the model in image space, as returned by a SignalCalculator. Slices along the third axis.
+    scan_parameters (dict): The scan parameters. See KSPACE_PARAMETER_KEYS.
+    resolution_mm (tuple): Voxel size of the model.
+
+    Returns:
+    np.ndarray: The reconstructed magnitude images, one slice per slice of the signal, on a grid that covers the field of view with the voxel size of the model. The signal is returned unchanged if the scan parameters prescribe the full model at full resolution.
+    '''
+    settings = kspace_settings(scan_parameters, signal_array.shape, resolution_mm)
+    if settings is None:
+        return signal_array
+    fov_pe, fov_fe, matrix_pe, matrix_fe, partial_fourier = settings
+    pe_start, pe_stop = _sampling_window(fov_pe, matrix_pe)
+    fe_start, fe_stop = _sampling_window(fov_fe, matrix_fe)
+    pe_acquired_stop = pe_start + math.ceil(partial_fourier * matrix_pe) # lines after this one are not acquired
+
+    n_slices = signal_array.shape[2]
+    images = np.empty((fov_pe, fov_fe, n_slices), dtype=np.float32)
+    for first_slice in range(0, n_slices, SLICE_BATCH_SIZE):
+        batch = signal_array[:, :, first_slice:first_slice + SLICE_BATCH_SIZE].astype(np.float32)
+        batch = _crop(_fold(batch, fov_pe), fov_fe)
+        kspace = scipy.fft.fftshift(scipy.fft.fft2(batch, axes=(0, 1), workers=worker_threads()), axes=(0, 1))
+        # Zero the samples outside the acquired part of k-space
+        kspace[:pe_start] = 0
+        kspace[pe_acquired_stop:] = 0
+        kspace[:, :fe_start] = 0
+        kspace[:, fe_stop:] = 0
+        reconstructed = scipy.fft.ifft2(scipy.fft.ifftshift(kspace, axes=(0, 1)), axes=(0, 1), workers=worker_threads(), overwrite_x=True)
+        np.abs(reconstructed, out=images[:, :, first_slice:first_slice + batch.shape[2]])
+    return images
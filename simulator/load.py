@@ -1,11 +1,44 @@
 import json
 import numpy as np
 from scipy.io import loadmat
+from simulator.model import Model
+from simulator.phantom import PHANTOM_CATALOGUE, PHANTOM_GENERATORS
+
+MODELS_FILE_PATH = 'repository/models/models.json'
 
 def load_json(jsonFilePath):
         with open(jsonFilePath, 'r') as json_file:
             data = json.load(json_file)
         return data
+
+def load_model_catalogue(file_path=MODELS_FILE_PATH):
+    '''Return the models that can be scanned: the entries of the models file followed by the generated phantoms of phantom.PHANTOM_CATALOGUE. Entries of the models file take precedence over phantoms with the same key.'''
+    return {**PHANTOM_CATALOGUE, **load_json(file_path)}
+
+def load_model(model_name, model_data):
+    '''Load the tissue property maps of a model and return them as a Model.
+    
+    Args:
+    model_name (str): The key of the model in repository/models/models.json
+    model_data (dict): The entry of the model in the model catalogue (see load_model_catalogue), i.e., its description and the paths to the .npy files of its maps. The T2* map is optional, as is "resolution_mm", the voxel size of the maps (1 mm isotropic if it is not given). Entries of phantoms give "phantom", the generator in phantom.PHANTOM_GENERATORS, and its arguments instead of the paths.
+    
+    Returns:
+    model (Model): The model, with T1, T2 and T2* in milliseconds. T2smap_ms is None if the model has no T2* map.'''
+    if "phantom" in model_data:
+        if model_data["phantom"] not in PHANTOM_GENERATORS:
+            raise ValueError(f"Unknown phantom: {model_data['phantom']}. Available phantoms: {', '.join(PHANTOM_GENERATORS.keys())}")
+        return PHANTOM_GENERATORS[model_data["phantom"]](model_name, model_data)
+    description = model_data.get("description", None)
+    t1map_ms = np.load(model_data["T1mapFilePath"]) * 1000
+    t2map_ms = np.load(model_data["T2mapFilePath"]) * 1000
+    t2smap_file_path = model_data.get("T2smapFilePath", None)
+    if t2smap_file_path is not None:
+        t2smap_ms = np.load(t2smap_file_path) * 1000
+    else:
+        t2smap_ms = None
+    pdmap = np.load(model_data["PDmapFilePath"])
+    resolution_mm = model_data.get("resolution_mm", (1.0, 1.0, 1.0))
+    return Model(model_name, description, t1map_ms, t2map_ms, t2smap_ms, pdmap, resolution_mm)
     
    
 def load_model_data(path_to_data):
@@ -0,0 +1,152 @@
+'''Fitting of relaxation-time maps to acquired series.
+
+A T2 (or T2*) map is fitted to series that differ in echo time only, e.g., spin echo scans with TE 20, 40 and 80 ms or a multi-echo scan. The signal decays as S = A exp(-TE / T2) in every voxel. fit_decay() solves the log-linear least-squares problem ln S = ln A - TE / T2, weighted by S^2 so that the noisy late echoes count less, for all voxels at once from per-voxel sums over the echoes.
+
+A T1 map is fitted to series that differ in TI, TR and/or flip angle only, e.g., an inversion recovery TI series or a variable flip angle gradient echo series. Their signal is not linear in any function of T1, so fit_T1() matches every voxel against a dictionary: the signal of each series for T1_GRID_SIZE T1 values, calculated by the signal calculator of the scan technique. The best match is a matrix product of the normalized voxel signals with the normalized dictionary, and is refined by parabolic interpolation between neighbouring T1 values. The amplitude, i.e., PD and the T2 weighting that all series share, drops out of the normalized match.
+'''
+import numpy as np
+
+from simulator.echo_train import echo_times_ms
+from simulator.model import Model
+from simulator.noise import NOISE_PARAMETER_KEYS
+from simulator.scanlist import ScanItemStatusEnum
+
+FIT_VARIED_PARAMETER_KEYS = {"T1": ("TI_ms", "TR_ms", "FA_deg", "FlipAngleTrain_deg"), "T2": ("TE_ms", "EchoTimes_ms")} # Scan parameters in which the series of a fit may differ
+T1_GRID_SIZE = 256 # Number of T1 values in the dictionary of fit_T1()
+T1_RANGE_MS = (10.0, 10000.0) # Range of the T1 values in the dictionary, logarithmically spaced
+T2_MAX_MS = 10000.0 # Fitted T2 and T2* values are limited to this
+VOXEL_CHUNK_SIZE = 65536 # Number of voxels matched against the dictionary at once. Bounds the memory used for the match scores.
+
+
+def fit_decay(images, times_ms):
+    '''
+    Fit exp(-time / T) to the signal of every voxel (see the module docstring).
+
+    Parameters:
+    images (np.ndarray): Images with the series along the last axis.
+    times_ms (sequence): Echo time of each image of the series.
+
+    Returns:
+    np.ndarray: The relaxation time T in ms per voxel, float32, 0 where the signal does not decay.
+    '''
+    times_ms = np.asarray(times_ms, dtype=np.float64)
+    if np.unique(times_ms).size < 2:
+        raise ValueError("At least two different echo times are needed to fit a T2 map.")
+    signal = np.asarray(images, dtype=np.float64)
+    weights = np.square(signal) * (signal > 0)
+    log_signal = np.log(np.where(signal > 0, signal, 1))
+    sum_w = weights.sum(axis=-1)
+    sum_wt = weights @ times_ms
+    sum_wtt = weights @ np.square(times_ms)
+    sum_wy = np.sum(weights * log_signal, axis=-1)
+    sum_wty = np.sum(weights * log_signal * times_ms, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (sum_w * sum_wty - sum_wt * sum_wy) / (sum_w * sum_wtt - np.square(sum_wt))
+        relaxation_time = -1 / slope
+    relaxation_time = np.where(np.isfinite(relaxation_time) & (relaxation_time > 0), np.minimum(relaxation_time, T2_MAX_MS), 0)
+    return relaxation_time.astype(np.float32)
+
+
+def T1_dictionary(signal_calculator, scan_parameters_list, T1_grid_ms):
+    '''Return the signal (series x T1 values) of a tissue with PD 1 and infinite T2 and T2* for each T1 value, for each set of scan parameters.'''
+    n = len(T1_grid_ms)
+    dictionary_model = Model("T1 dictionary", "", np.asarray(T1_grid_ms, dtype=np.float32), np.full(n, np.inf, dtype=np.float32), np.full(n, np.inf, dtype=np.float32), np.ones(n, dtype=np.float32))
+    return np.stack([signal_calculator.calculate_signal(scan_parameters, dictionary_model) for scan_parameters in scan_parameters_list])
+
+
+def fit_T1(images, scan_parameters_list, signal_calculator):
+    '''
+    Fit T1 to the signal of every voxel by dictionary matching (see the module docstring). The T2 weighting must be the same for all series, i.e., T2 may only enter the signal through the echo time, which must be the same for all series.
+
+    Parameters:
+    images (np.ndarray): Images with the series along the last axis.
+    scan_parameters_list (list): Scan parameters of each image of the series.
+    signal_calculator (SignalCalculator): Signal calculator of the scan technique of the series.
+
+    Returns:
+    np.ndarray: T1 in ms per voxel, float32, 0 where there is no signal.
+    '''
+    if len(scan_parameters_list) < 2:
+        raise ValueError("At least two series are needed to fit a T1 map.")
+    log_T1_grid = np.linspace(*np.log(T1_RANGE_MS), T1_GRID_SIZE)
+    dictionary = T1_dictionary(signal_calculator, scan_parameters_list, np.exp(log_T1_grid)).astype(np.float32)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dictionary = np.nan_to_num(dictionary / np.linalg.norm(dictionary, axis=0))
+    signal = np.asarray(images, dtype=np.float32).reshape(-1, len(scan_parameters_list))
+    T1 = np.zeros(signal.shape[0], dtype=np.float32)
+    step = log_T1_grid[1] - log_T1_grid[0]
+    for start in range(0, signal.shape[0], VOXEL_CHUNK_SIZE):
+        chunk = signal[start:start + VOXEL_CHUNK_SIZE]
+        scores = chunk @ dictionary # proportional to the cosine similarity between the voxel signal and each dictionary entry
+        best = np.argmax(scores, axis=1)
+        rows = np.arange(len(best))
+        inner = np.clip(best, 1, T1_GRID_SIZE - 2)
+        below, centre, above = scores[rows, inner - 1], scores[rows, inner], scores[rows, inner + 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            offset = np.clip(0.5 * (below - above) / (below - 2 * centre + above), -0.5, 0.5) # vertex of the parabola through the three scores
+        offset = np.where((best == inner) & np.isfinite(offset), offset, 0)
+        T1[start:start + VOXEL_CHUNK_SIZE] = np.where(np.any(chunk > 0, axis=1), np.exp(log_T1_grid[best] + offset * step), 0)
+    return T1.reshape(np.shape(images)[:-1])
+
+
+def _image_series(scanlist_element, quantity):
+    # (image, scan parameters) of each image of a scanlist element. The echoes of an echo stack are images of their own in T2 fits; T1 fits use the first echo.
+    data = scanlist_element.acquired_data
+    scan_parameters = scanlist_element.scan_item.scan_parameters
+    echo_times = echo_times_ms(scan_parameters)
+    if data.ndim == 3 or echo_times is None:
+        return [(data, scan_parameters)]
+    if quantity == "T1":
+        return [(data[..., 0], {**scan_parameters, "TE_ms": echo_times[0]})]
+    return [(data[..., echo_idx], {**scan_parameters, "TE_ms": echo_time}) for echo_idx, echo_time in enumerate(echo_times)]
+
+
+def matching_series(scanlist, index, quantity, synthesiser):
+    '''Return the complete scanlist elements that can be fitted together with scanlist element index: those with the same scan technique and the same effective scan parameters (see MRIDataSynthesiser.acquisition_key), except for the parameters the fit varies and the noise parameters.'''
+    def fixed_parameters(scanlist_element):
+        key = synthesiser.acquisition_key(scanlist_element.scan_item.scan_parameters)
+        if key is None:
+            return None
+        return key[0], tuple(item for item in key[1] if item[0] not in FIT_VARIED_PARAMETER_KEYS[quantity] + NOISE_PARAMETER_KEYS)
+
+    reference = fixed_parameters(scanlist.scanlist_elements[index])
+    if reference is None:
+        return []
+    return [scanlist_element for scanlist_element in scanlist.scanlist_elements if scanlist_element.scan_item.status == ScanItemStatusEnum.COMPLETE and scanlist_element.acquired_data is not None and fixed_parameters(scanlist_element) == reference]
+
+
+def fit_relaxation_map(scanlist, index, quantity, synthesiser):
+    '''
+    Fit a relaxation-time map to scanlist element index and the scanlist elements that match it (see matching_series).
+
+    Parameters:
+    scanlist (Scanlist): The scanlist.
+    index (int): Index of the scanlist element.
+    quantity (str): "T1", or "T2" for the relaxation time with which the signal of the scan technique decays with TE, i.e., T2 or T2* (see SignalCalculator.echo_decay_map).
+    synthesiser (MRIDataSynthesiser): Provides the acquisition keys and signal calculators.
+
+    Returns:
+    tuple: (name, scan parameters, map). The map has the shape of the acquired images. The name says what was fitted, e.g., "T2* map (GE 1, GE 2)"; the scan parameters are those of scanlist element index, with that name as their scan technique, so that the map is never scanned or shared as an acquired series.
+
+    Raises:
+    ValueError: If the series do not suffice for the fit.
+    '''
+    series = matching_series(scanlist, index, quantity, synthesiser)
+    if not series:
+        raise ValueError("Only complete scans with a valid scan technique can be fitted.")
+    images, scan_parameters_list = zip(*(image for scanlist_element in series for image in _image_series(scanlist_element, quantity)))
+    images = np.stack(images, axis=-1)
+    scan_parameters = scanlist.scanlist_elements[index].scan_item.scan_parameters
+    signal_calculator = synthesiser.signal_calculator_factory.create_signal_calculator(scan_parameters)
+    if quantity == "T1":
+        fitted_map = fit_T1(images, scan_parameters_list, signal_calculator)
+        name = "T1"
+    elif quantity == "T2":
+        if signal_calculator.echo_decay_map is None:
+            raise ValueError(f"The signal of {scan_parameters['ScanTechnique']} scans does not decay exponentially with TE.")
+        fitted_map = fit_decay(images, [scan_parameters['TE_ms'] for scan_parameters in scan_parameters_list])
+        name = "T2*" if signal_calculator.echo_decay_map == "T2smap_ms" else "T2"
+    else:
+        raise ValueError(f"Unknown quantity: {quantity}")
+    name = f"{name} map ({', '.join(scanlist_element.name for scanlist_element in series)})"
+    return name, {**scan_parameters, "ScanTechnique": name}, fitted_map
@@ -1,8 +1,146 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+MAP_ATTRIBUTES = ("T1map_ms", "T2map_ms", "T2smap_ms", "PDmap") # Attributes of Model that hold tissue property maps. T2smap_ms may be None.
+
 class Model:
-    def __init__(self, name, description, T1map_ms, T2map_ms, T2smap_ms, PDmap):
+    def __init__(self, name, description, T1map_ms, T2map_ms, T2smap_ms, PDmap, resolution_mm=(1.0, 1.0, 1.0)):
         self.name = name
         self.description = description
         self.T1map_ms = T1map_ms
         self.T2map_ms = T2map_ms
         self.T2smap_ms = T2smap_ms
         self.PDmap = PDmap
+        self.resolution_mm = tuple(resolution_mm) # Voxel size along the three axes of the maps. Used to convert fields of view from millimetres to voxels.
+        self._source = None # Model this model was cropped from, see crop()
+        self.region_key = () # Hashable description of the regions this model was cropped with, starting from its source
+
+    @property
+    def source(self):
+        '''The model this model was (possibly repeatedly) cropped from, or the model itself if it is not a crop. Crops of the same source with equal region keys have equal maps, so they can share what is calculated from the maps (see relaxation.RelaxationCache).'''
+        return self if self._source is None else self._source
+
+    def crop(self, region):
+        '''Return a Model of the voxels in region. region indexes the maps: a tuple of slices along their three axes gives maps that are views on the maps of this model, so no map data is copied; a boolean mask gives 1D copies of the selected voxels.'''
+        cropped = Model(self.name, self.description, *(None if getattr(self, attribute) is None else getattr(self, attribute)[region] for attribute in MAP_ATTRIBUTES), self.resolution_mm)
+        cropped._source = self.source
+        cropped.region_key = self.region_key + (_region_key(region),)
+        return cropped
+
+    def share(self, backend="shared_memory", directory=None):
+        '''
+        Place copies of the tissue property maps in memory that other processes can attach to without copying, e.g., the worker processes that synthesise scans.
+
+        Parameters:
+        backend (str): "shared_memory" to use multiprocessing.shared_memory segments, or "memmap" to use memory-mapped .npy files.
+        directory (str): Directory in which the temporary directory holding the memory-mapped files is created (only used by the "memmap" backend). Defaults to the system's temporary directory.
+
+        Returns:
+        SharedModel: Owner of the shared maps. Hand its descriptor to other processes and close it when they no longer need the maps.
+        '''
+        return SharedModel(self, backend, directory)
+
+def _region_key(region):
+    # Hashable key of a region of Model.crop(): slices by their bounds, boolean masks by their shape and a digest of their bits. Other regions get a key of their own, so their crops share nothing.
+    if isinstance(region, tuple) and all(isinstance(axis_slice, slice) for axis_slice in region):
+        return tuple((axis_slice.start, axis_slice.stop, axis_slice.step) for axis_slice in region)
+    if isinstance(region, np.ndarray) and region.dtype == bool:
+        return ("mask", region.shape, hashlib.blake2b(np.packbits(region).tobytes(), digest_size=16).digest())
+    return object()
+
+class SharedModelDescriptor:
+    '''Lightweight, picklable description of a model whose maps have been placed in shared memory or in memory-mapped files by a SharedModel. Sending it to another process costs a few hundred bytes, regardless of the size of the model.'''
+
+    def __init__(self, name, description, backend, maps, resolution_mm):
+        self.name = name
+        self.description = description
+        self.resolution_mm = resolution_mm
+        self.backend = backend
+        self.maps = maps # map attribute -> (shared memory name or file path, shape, dtype string), or None if the model has no such map
+
+    def attach(self) -> Model:
+        '''Return a Model whose maps are read-only views on the shared memory or memory-mapped files. No map data is copied.'''
+        maps = {}
+        buffers = []
+        for attribute, location in self.maps.items():
+            if location is None:
+                maps[attribute] = None
+                continue
+            name_or_path, shape, dtype = location
+            if self.backend == "shared_memory":
+                segment = shared_memory.SharedMemory(name=name_or_path)
+                buffers.append(segment)
+                array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+            else:
+                array = np.load(name_or_path, mmap_mode="r")
+            array.flags.writeable = False
+            maps[attribute] = array
+        model = Model(self.name, self.description, maps["T1map_ms"], maps["T2map_ms"], maps["T2smap_ms"], maps["PDmap"], self.resolution_mm)
+        model._shared_buffers = buffers # The shared memory segments must stay open for as long as the model's maps are in use.
+        return model
+
+class SharedModel:
+    '''
+    Owns the shared copies of the maps of a model (see Model.share).
+
+    The shared memory segments or memory-mapped files exist until close() is called, the SharedModel is used as a context manager and its block exits, or the SharedModel is garbage collected, whichever comes first. Processes that attached to the maps before they were released can keep using them until they detach; processes cannot attach after they were released.'''
+
+    def __init__(self, model, backend="shared_memory", directory=None):
+        if backend not in ("shared_memory", "memmap"):
+            raise ValueError(f"Invalid backend: {backend}")
+        segments = []
+        temporary_directory = None
+        maps = {}
+        try:
+            if backend == "memmap":
+                temporary_directory = tempfile.mkdtemp(prefix="eduMRIsim_model_", dir=directory)
+            for attribute in MAP_ATTRIBUTES:
+                array = getattr(model, attribute)
+                if array is None:
+                    maps[attribute] = None
+                    continue
+                array = np.asarray(array)
+                if backend == "shared_memory":
+                    segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                    segments.append(segment)
+                    np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+                    maps[attribute] = (segment.name, array.shape, array.dtype.str)
+                else:
+                    file_path = os.path.join(temporary_directory, attribute + ".npy")
+                    memory_map = np.lib.format.open_memmap(file_path, mode="w+", dtype=array.dtype, shape=array.shape)
+                    memory_map[...] = array
+                    memory_map.flush()
+                    del memory_map
+                    maps[attribute] = (file_path, array.shape, array.dtype.str)
+        except BaseException:
+            _release_shared_maps(segments, temporary_directory)
+            raise
+        self.descriptor = SharedModelDescriptor(model.name, model.description, backend, maps, model.resolution_mm)
+        self._finalizer = weakref.finalize(self, _release_shared_maps, segments, temporary_directory)
+
+    @property
+    def closed(self):
+        return not self._finalizer.alive
+
+    def close(self):
+        '''Release the shared memory segments or delete the memory-mapped files. Calling close() more than once has no effect.'''
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def _release_shared_maps(segments, temporary_directory):
+    for segment in segments:
+        segment.close()
+        segment.unlink()
+    if temporary_directory is not None:
+        shutil.rmtree(temporary_directory, ignore_errors=True)
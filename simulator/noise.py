@@ -0,0 +1,89 @@
+'''Noise stage of the MRI data synthesiser.
+
+add_noise() adds complex Gaussian noise to the reconstructed images and takes the magnitude, which gives the Rician noise of magnitude MR images. The standard deviation of the noise follows from the relative signal-to-noise ratio of the scan:
+
+    SNR ~ voxel volume * sqrt(number of phase-encoding lines * NSA / pixel bandwidth)
+
+relative to a reference scan of the whole model at its own resolution with NSA 1 and REFERENCE_PIXEL_BANDWIDTH_HZ, whose noise has a standard deviation of REFERENCE_NOISE_FRACTION times the maximum proton density of the model.
+
+The noise is generated per slice, in place and on several threads, from random streams that are derived from a seed: the NoiseSeed scan parameter or, if it is empty, a hash of the effective scan parameters. Scans with the same seed and scan parameters therefore give bit-identical images, also when they are scanned in different processes.
+'''
+import hashlib
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from simulator.threads import worker_threads
+from simulator.validation import float_parameter
+
+NOISE_PARAMETER_KEYS = ("NSA", "PixelBandwidth_Hz", "NoiseSeed") # Scan parameters that affect add_noise(), in addition to the field of view and matrix (see kspace.KSPACE_PARAMETER_KEYS)
+REFERENCE_NOISE_FRACTION = 0.01
+REFERENCE_PIXEL_BANDWIDTH_HZ = 200.0
+SLICE_BATCH_SIZE = 16 # Number of slices a thread adds noise to at once
+
+
+def noise_seed(scan_parameters, acquisition_key):
+    '''Return the seed of the noise of a scan: the NoiseSeed scan parameter, or a hash of the acquisition key (see MRIDataSynthesiser.acquisition_key) if it is empty.'''
+    seed = scan_parameters.get("NoiseSeed")
+    if seed not in ("", None):
+        return int(float(seed))
+    return int.from_bytes(hashlib.sha256(repr(acquisition_key).encode("utf-8")).digest()[:8], "little")
+
+
+def relative_snr(scan_parameters, kspace_settings, shape, relative_slice_thickness=1.0):
+    '''Signal-to-noise ratio of the scan relative to the reference scan (see the module docstring). kspace_settings is the result of kspace.kspace_settings(), None for a scan of the whole model at its own resolution. relative_slice_thickness is the slice thickness relative to the voxel size of the model (see reslice.relative_slice_thickness).'''
+    if kspace_settings is None:
+        fov_pe, fov_fe, matrix_pe, matrix_fe, partial_fourier = shape[0], shape[1], shape[0], shape[1], 1.0
+    else:
+        fov_pe, fov_fe, matrix_pe, matrix_fe, partial_fourier = kspace_settings
+    relative_voxel_area = (fov_pe / matrix_pe) * (fov_fe / matrix_fe) # in-plane voxel size relative to the voxels of the model
+    n_lines = matrix_pe * partial_fourier
+    nsa = float_parameter(scan_parameters, "NSA", 1.0)
+    pixel_bandwidth = float_parameter(scan_parameters, "PixelBandwidth_Hz", REFERENCE_PIXEL_BANDWIDTH_HZ)
+    return relative_voxel_area * relative_slice_thickness * math.sqrt((n_lines * nsa / pixel_bandwidth) / (shape[0] / REFERENCE_PIXEL_BANDWIDTH_HZ))
+
+
+def add_noise(images, noise_sd, seed):
+    '''
+    Add complex Gaussian noise with standard deviation noise_sd to the images and replace them by their magnitude, in place.
+
+    Parameters:
+    images (np.ndarray): Float32 or float64 images, slices along the third axis. Modified in place. Images with further axes, e.g., echo stacks, must be C-contiguous; each of their 2D images is a slice of its own.
+    noise_sd (float): Standard deviation of the real and imaginary parts of the noise.
+    seed (int): Seed of the random streams. Each slice has its own stream, so the noise does not depend on how the slices are divided over threads.
+
+    Returns:
+    np.ndarray: The images.
+    '''
+    if noise_sd <= 0:
+        return images
+    if images.ndim > 3:
+        add_noise(images.reshape(images.shape[0], images.shape[1], -1), noise_sd, seed) # a view, since the images are C-contiguous
+        return images
+    seed_sequences = np.random.SeedSequence(seed).spawn(images.shape[2])
+
+    def add_noise_to_slices(first_slice):
+        real = np.empty(images.shape[:2], dtype=images.dtype)
+        imaginary = np.empty(images.shape[:2], dtype=images.dtype)
+        for slice_idx in range(first_slice, min(first_slice + SLICE_BATCH_SIZE, images.shape[2])):
+            random_generator = np.random.Generator(np.random.SFC64(seed_sequences[slice_idx]))
+            random_generator.standard_normal(out=real, dtype=images.dtype)
+            random_generator.standard_normal(out=imaginary, dtype=images.dtype)
+            real *= noise_sd
+            real += images[:, :, slice_idx]
+            real *= real
+            imaginary *= noise_sd
+            imaginary *= imaginary
+            real += imaginary
+            np.sqrt(real, out=images[:, :, slice_idx])
+
+    batches = range(0, images.shape[2], SLICE_BATCH_SIZE)
+    workers = worker_threads()
+    if workers == 1 or len(batches) == 1:
+        for first_slice in batches:
+            add_noise_to_slices(first_slice)
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as executor:
+            list(executor.map(add_noise_to_slices, batches)) # the random generators release the GIL while they fill the arrays
+    return images
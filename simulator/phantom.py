@@ -0,0 +1,104 @@
+'''Synthetic phantoms.
+
+A phantom is a Model that is generated rather than loaded from files, at any matrix size. Phantoms are listed in the model catalogue (see load.load_model_catalogue) through PHANTOM_CATALOGUE, so they can be chosen like the models in repository/models/models.json. Entries of models.json can generate a phantom as well, e.g., at another matrix size: instead of the paths to the maps, they give "phantom" (a key of PHANTOM_GENERATORS) and "matrix_size".
+
+The Shepp-Logan phantom is the 3D modified Shepp-Logan head: ten ellipsoids in a field of view of SHEPP_LOGAN_FOV_MM. Each ellipsoid is filled with a tissue of PHANTOM_TISSUES, later ellipsoids on top of earlier ones, so the phantom has a skull, grey and white matter, ventricles, lesions and vessels with realistic relaxation times and proton densities. The phantom is generated as a label volume, one ellipsoid at a time and within the bounding box of the ellipsoid only, so a matrix of several hundred voxels cubed takes seconds and the label volume one byte per voxel. The maps are looked up from the labels at the end.
+'''
+import numpy as np
+
+from simulator.model import Model
+
+PHANTOM_TISSUES = { # Tissue: (T1 (ms), T2 (ms), T2* (ms), PD), at 1.5 T
+    "background": (0.0, 0.0, 0.0, 0.0),
+    "scalp": (260.0, 80.0, 35.0, 0.9),
+    "grey matter": (1100.0, 95.0, 60.0, 0.8),
+    "white matter": (650.0, 75.0, 45.0, 0.7),
+    "CSF": (4000.0, 2000.0, 1500.0, 1.0),
+    "lesion": (1400.0, 160.0, 90.0, 0.85),
+    "blood": (1450.0, 250.0, 100.0, 0.9),
+}
+SHEPP_LOGAN_ELLIPSOIDS = ( # Tissue, semi-axes (a, b, c), centre (x, y, z) in units of half the field of view, and z-x-z Euler angles (phi, theta, psi) in degrees, of the modified Shepp-Logan phantom
+    ("scalp", (0.69, 0.92, 0.81), (0.0, 0.0, 0.0), (0.0, 0.0, 0.0)),
+    ("grey matter", (0.6624, 0.874, 0.78), (0.0, -0.0184, 0.0), (0.0, 0.0, 0.0)),
+    ("CSF", (0.11, 0.31, 0.22), (0.22, 0.0, 0.0), (-18.0, 0.0, 10.0)),
+    ("CSF", (0.16, 0.41, 0.28), (-0.22, 0.0, 0.0), (18.0, 0.0, 10.0)),
+    ("white matter", (0.21, 0.25, 0.41), (0.0, 0.35, -0.15), (0.0, 0.0, 0.0)),
+    ("lesion", (0.046, 0.046, 0.05), (0.0, 0.1, 0.25), (0.0, 0.0, 0.0)),
+    ("lesion", (0.046, 0.046, 0.05), (0.0, -0.1, 0.25), (0.0, 0.0, 0.0)),
+    ("blood", (0.046, 0.023, 0.05), (-0.08, -0.605, 0.0), (0.0, 0.0, 0.0)),
+    ("blood", (0.023, 0.023, 0.02), (0.0, -0.606, 0.0), (0.0, 0.0, 0.0)),
+    ("blood", (0.023, 0.046, 0.02), (0.06, -0.605, 0.0), (0.0, 0.0, 0.0)),
+)
+SHEPP_LOGAN_FOV_MM = 240.0 # Extent of the phantom's matrix along each axis
+SLAB_SIZE = 32 # Number of planes of an ellipsoid's bounding box that are labelled at once. Bounds the memory used for the coordinates.
+
+
+def _euler_rotation(phi_deg, theta_deg, psi_deg):
+    # Rotation matrix of z-x-z Euler angles. Its rows are the axes of the ellipsoid.
+    phi, theta, psi = np.deg2rad((phi_deg, theta_deg, psi_deg))
+    def rotation_z(angle):
+        return np.array([[np.cos(angle), np.sin(angle), 0], [-np.sin(angle), np.cos(angle), 0], [0, 0, 1]])
+    rotation_x = np.array([[1, 0, 0], [0, np.cos(theta), np.sin(theta)], [0, -np.sin(theta), np.cos(theta)]])
+    return rotation_z(psi) @ rotation_x @ rotation_z(phi)
+
+
+def ellipsoid_labels(matrix_size, ellipsoids, tissue_labels):
+    '''
+    Return a label volume (matrix_size cubed, uint8) in which each ellipsoid is filled with the label of its tissue, later ellipsoids on top of earlier ones.
+
+    Parameters:
+    matrix_size (int): Number of voxels along each axis. Voxel centres span the field of view [-1, 1] along each axis.
+    ellipsoids (sequence): (tissue, semi-axes, centre, Euler angles) per ellipsoid, as in SHEPP_LOGAN_ELLIPSOIDS.
+    tissue_labels (dict): Tissue -> label.
+    '''
+    labels = np.zeros((matrix_size,) * 3, dtype=np.uint8)
+    coordinates = (np.arange(matrix_size, dtype=np.float32) + 0.5) * (2 / matrix_size) - 1 # voxel centres
+    for tissue, semi_axes, centre, angles in ellipsoids:
+        rotation = _euler_rotation(*angles)
+        centre = np.asarray(centre, dtype=np.float32)
+        scaled_rotation = (rotation / np.asarray(semi_axes)[:, None]).astype(np.float32) # maps offsets from the centre to the unit sphere
+        half_extent = np.sqrt(np.sum(np.square(rotation * np.asarray(semi_axes)[:, None]), axis=0)) # half the extent of the bounding box along each axis
+        start = np.clip(np.searchsorted(coordinates, centre - half_extent), 0, matrix_size)
+        stop = np.clip(np.searchsorted(coordinates, centre + half_extent, side="right"), 0, matrix_size)
+        if np.any(start >= stop):
+            continue
+        x = coordinates[start[0]:stop[0], None, None] - centre[0]
+        y = coordinates[None, start[1]:stop[1], None] - centre[1]
+        for slab_start in range(start[2], stop[2], SLAB_SIZE):
+            slab_stop = min(slab_start + SLAB_SIZE, stop[2])
+            z = coordinates[None, None, slab_start:slab_stop] - centre[2]
+            distance = sum(np.square(scaled_rotation[axis, 0] * x + scaled_rotation[axis, 1] * y + scaled_rotation[axis, 2] * z) for axis in range(3))
+            box = labels[start[0]:stop[0], start[1]:stop[1], slab_start:slab_stop]
+            box[distance <= 1] = tissue_labels[tissue]
+    return labels
+
+
+def shepp_logan_phantom(model_name, model_data):
+    '''Generate the 3D modified Shepp-Logan phantom (see the module docstring) at model_data["matrix_size"] voxels (default 128) along each axis, in a field of view of model_data["fov_mm"] (default SHEPP_LOGAN_FOV_MM).'''
+    matrix_size = int(model_data.get("matrix_size", 128))
+    fov_mm = float(model_data.get("fov_mm", SHEPP_LOGAN_FOV_MM))
+    tissue_labels = {tissue: label for label, tissue in enumerate(PHANTOM_TISSUES)}
+    # The ellipsoids are given with y pointing anterior and the maps are in LPS order, so the phantom is flipped along y
+    labels = ellipsoid_labels(matrix_size, SHEPP_LOGAN_ELLIPSOIDS, tissue_labels)[:, ::-1, :]
+    tissue_maps = np.array(list(PHANTOM_TISSUES.values()), dtype=np.float32)
+    T1map_ms, T2map_ms, T2smap_ms, PDmap = (tissue_maps[:, column][labels] for column in range(4))
+    resolution_mm = (fov_mm / matrix_size,) * 3
+    return Model(model_name, model_data.get("description"), T1map_ms, T2map_ms, T2smap_ms, PDmap, resolution_mm)
+
+
+PHANTOM_GENERATORS = {"shepp_logan": shepp_logan_phantom} # Value of "phantom" in a catalogue entry -> function(model name, entry) that generates the Model
+
+PHANTOM_CATALOGUE = {
+    "SheppLogan128": {
+        "name": "Shepp-Logan phantom (128)",
+        "description": "3D modified Shepp-Logan head phantom of 128 x 128 x 128 voxels with realistic relaxation times and proton densities. Data includes T1, T2, T2* and PD maps.",
+        "phantom": "shepp_logan",
+        "matrix_size": 128,
+    },
+    "SheppLogan256": {
+        "name": "Shepp-Logan phantom (256)",
+        "description": "3D modified Shepp-Logan head phantom of 256 x 256 x 256 voxels with realistic relaxation times and proton densities. Data includes T1, T2, T2* and PD maps.",
+        "phantom": "shepp_logan",
+        "matrix_size": 256,
+    },
+}
@@ -0,0 +1,57 @@
+from collections import OrderedDict
+import weakref
+
+import numpy as np
+
+RELAXATION_CACHE_BUDGET_MB = 512 # Memory that cached relaxation terms may use. The least recently used terms are dropped beyond it.
+
+
+class RelaxationCache:
+    '''
+    Cache of the per-voxel relaxation terms exp(-time / relaxation time) of models, e.g., E1 = exp(-TR / T1) and E2 = exp(-TE / T2).
+
+    The signal calculators of a synthesiser share one cache, so terms that scan techniques have in common are calculated once: switching a scan between, e.g., SE, IR and TSE with the same TR reuses exp(-TR / T1). Terms are float32 and read-only. They are cached per source model and crop region (see Model.source), so the temporary crops that reslicing creates for every scan, e.g., of the same slab with SE and then IR, share their terms. Terms are dropped when the source model is garbage collected.'''
+
+    def __init__(self, budget_bytes=None):
+        self.budget_bytes = RELAXATION_CACHE_BUDGET_MB * 1024**2 if budget_bytes is None else budget_bytes
+        self._terms = OrderedDict() # (id of source model, region key, map attribute, time in ms) -> term, least recently used first
+        self._n_bytes = 0
+        self._finalizers = {} # id of source model -> finalizer that drops the terms of the model and its crops
+
+    @property
+    def n_bytes(self):
+        return self._n_bytes
+
+    def decay(self, model, map_attribute, time_ms):
+        '''Return exp(-time_ms / map) for the map attribute of the model (e.g., "T1map_ms"), per voxel. Voxels whose relaxation time is 0 give 0, or NaN if time_ms is 0 too.'''
+        source = model.source
+        key = (id(source), model.region_key, map_attribute, float(time_ms))
+        term = self._terms.get(key)
+        if term is not None:
+            self._terms.move_to_end(key)
+            return term
+        with np.errstate(divide='ignore', invalid='ignore'): # relaxation times of 0 are handled by the signal calculators
+            term = np.divide(-float(time_ms), getattr(model, map_attribute), dtype=np.float32)
+            np.exp(term, out=term)
+        term.flags.writeable = False
+        if id(source) not in self._finalizers:
+            self._finalizers[id(source)] = weakref.finalize(source, self._forget, id(source))
+        self._terms[key] = term
+        self._n_bytes += term.nbytes
+        while self._n_bytes > self.budget_bytes and len(self._terms) > 1:
+            _, dropped_term = self._terms.popitem(last=False)
+            self._n_bytes -= dropped_term.nbytes
+        return term
+
+    def clear(self):
+        for finalizer in self._finalizers.values():
+            finalizer.detach()
+        self._finalizers.clear()
+        self._terms.clear()
+        self._n_bytes = 0
+
+    def _forget(self, model_id):
+        # Drop the terms of a model that has been garbage collected
+        self._finalizers.pop(model_id, None)
+        for key in [key for key in self._terms if key[0] == model_id]:
+            self._n_bytes -= self._terms.pop(key).nbytes
@@ -0,0 +1,167 @@
+'''Slice selection stage of the MRI data synthesiser.
+
+Scans whose parameters prescribe a scan plane (see scan_volume.ScanVolume) image the slices of their scan volume, which may be angulated and off-centre, instead of the slices of the model. calculate_slices() does this as follows:
+
+1. The slices are sampled on a grid with the in-plane voxel size of the model. The grid covers the field of view in the frequency-encoding direction and, so that the k-space stage can fold anatomy outside the field of view back into it, at least the extent of the model in the phase-encoding direction.
+2. The signal calculator only calculates the signal of the model voxels that the slices read (see 3). The cost of a scan therefore depends on the number of pixels and the slice thickness, not on the angulation of the slices or the gaps between them.
+3. Each pixel is the average signal over the thickness of its slice: the average along the axis of the model that is closest to the slice direction, over the part of that axis that lies within the slice. The averages are differences of two samples of the cumulative sum of the signal along that axis, so they cost the same for any slice thickness. The samples are taken by trilinear interpolation, for all pixels of SLICE_BATCH_SIZE slices at once. A slice thickness of 0 samples the signal at the centres of the pixels. Pixels outside the model are 0.
+
+Scans without a scan plane image the slices of the model along its third axis, as before. Multi-echo scans (see echo_train) are resliced echo by echo, with the echoes along a fourth axis.
+'''
+import itertools
+import math
+
+import numpy as np
+from scipy.ndimage import map_coordinates
+
+from simulator.scan_volume import ScanVolume, prescribes_scan_volume
+
+GEOMETRY_PARAMETER_KEYS = ("ScanPlane", "NSlices", "SliceThickness_mm", "SliceGap_mm", "OffCenterRL_mm", "OffCenterAP_mm", "OffCenterFH_mm", "RLAngle_deg", "APAngle_deg", "FHAngle_deg") # Scan parameters that affect calculate_slices(), in addition to the field of view (see kspace.KSPACE_PARAMETER_KEYS)
+SLICE_BATCH_SIZE = 16 # Number of slices interpolated at once. Bounds the memory used for the sampling coordinates.
+READ_FRACTION_THRESHOLD = 0.5 # If the slices may read more than this fraction of the voxels in their bounding box, the signal of the whole box is calculated rather than that of the voxels that are read
+
+
+class SliceGrid:
+    '''
+    The pixel centres of the slices of a scan volume, in voxel index coordinates of a model: pixel (i, j) of slice k lies at origin + i * step_pe + j * step_fe + slice_offsets[k].
+
+    The slices are averaged along slab_axis, the axis of the model that is closest to the slice direction. The part of that axis that lies within the slice extends half_thickness voxels on either side of a pixel.'''
+
+    def __init__(self, scan_volume, shape, resolution_mm):
+        resolution_mm = np.asarray(resolution_mm, dtype=float)
+        half_extent_mm = np.asarray(shape) * resolution_mm / 2
+        centre_idx = (np.asarray(shape) - 1) / 2
+
+        def model_half_extent_mm(axis_LPS):
+            # Half the extent of the model along an axis through the centre of the scan volume
+            return np.sum(np.abs(axis_LPS) * half_extent_mm) + abs(np.dot(scan_volume.origin_LPS, axis_LPS))
+
+        half_pe_mm = max((scan_volume.extentX_mm or 0) / 2, model_half_extent_mm(scan_volume.axisX_LPS))
+        half_fe_mm = scan_volume.extentY_mm / 2 if scan_volume.extentY_mm is not None else model_half_extent_mm(scan_volume.axisY_LPS)
+        self.shape = (max(1, round(2 * half_pe_mm / resolution_mm[0])), max(1, round(2 * half_fe_mm / resolution_mm[1])), scan_volume.N_slices)
+        self.step_pe = scan_volume.axisX_LPS * resolution_mm[0] / resolution_mm
+        self.step_fe = scan_volume.axisY_LPS * resolution_mm[1] / resolution_mm
+        first_pixel_mm = -(self.shape[0] - 1) / 2 * resolution_mm[0] * scan_volume.axisX_LPS - (self.shape[1] - 1) / 2 * resolution_mm[1] * scan_volume.axisY_LPS
+        self.origin = (scan_volume.origin_LPS + first_pixel_mm) / resolution_mm + centre_idx
+        self.slice_offsets = np.outer(scan_volume.slice_positions_mm, scan_volume.axisZ_LPS) / resolution_mm
+        self.slab_axis = int(np.argmax(np.abs(scan_volume.axisZ_LPS)))
+        self.half_thickness = (scan_volume.slice_thickness_mm or 0) / 2 / abs(scan_volume.axisZ_LPS[self.slab_axis]) / resolution_mm[self.slab_axis]
+
+    @property
+    def voxels_read_per_pixel(self):
+        '''Upper bound on the number of voxels read per pixel: those within the thickness of the slice along slab_axis, and their neighbours along the other two axes.'''
+        return 4 * (math.ceil(2 * self.half_thickness) + 2)
+
+    def coordinates(self, first_slice, stop_slice):
+        '''Return the coordinates of the pixels of slices first_slice to stop_slice - 1, with shape (3, pixels along PE, pixels along FE, slices).'''
+        i = np.arange(self.shape[0], dtype=np.float32)[:, None, None]
+        j = np.arange(self.shape[1], dtype=np.float32)[None, :, None]
+        return np.stack([(self.origin[axis] + self.slice_offsets[first_slice:stop_slice, axis]).astype(np.float32)[None, None, :] + i * np.float32(self.step_pe[axis]) + j * np.float32(self.step_fe[axis]) for axis in range(3)])
+
+    def bounding_box(self, shape):
+        '''Return the index ranges of the voxels of a model of the given shape that the slices read, as a tuple of slices, or None if the slices lie outside the model.'''
+        corners = np.array([self.origin + i * self.step_pe + j * self.step_fe + offset for i in (0, self.shape[0] - 1) for j in (0, self.shape[1] - 1) for offset in self.slice_offsets[[0, -1]]])
+        slab_extent = np.zeros(3)
+        slab_extent[self.slab_axis] = self.half_thickness
+        start = np.maximum(np.floor(corners.min(axis=0) - slab_extent).astype(int), 0)
+        stop = np.minimum(np.floor(corners.max(axis=0) + slab_extent).astype(int) + 2, shape)
+        if np.any(start >= stop):
+            return None
+        return tuple(slice(axis_start, axis_stop) for axis_start, axis_stop in zip(start, stop))
+
+    def read_mask(self, box):
+        '''Return a boolean mask of the voxels in box (see bounding_box()) that the slices read.'''
+        box_start = np.array([axis_slice.start for axis_slice in box], dtype=np.float32)
+        box_shape = np.array([axis_slice.stop - axis_slice.start for axis_slice in box])
+        read = np.zeros(tuple(box_shape), dtype=bool)
+        slab_offsets = np.zeros(3, dtype=np.float32)
+        slab_offsets[self.slab_axis] = self.half_thickness
+        for first_slice in range(0, self.shape[2], SLICE_BATCH_SIZE):
+            first_voxels = np.floor(self.coordinates(first_slice, min(first_slice + SLICE_BATCH_SIZE, self.shape[2])).reshape(3, -1) - (box_start + slab_offsets)[:, None]).astype(np.intp)
+            for offset in itertools.product(*(range(math.ceil(2 * self.half_thickness) + 2) if axis == self.slab_axis else range(2) for axis in range(3))):
+                idx = first_voxels + np.array(offset)[:, None]
+                inside = np.all((idx >= 0) & (idx < box_shape[:, None]), axis=0)
+                read[tuple(idx[:, inside])] = True
+        return read
+
+
+def calculate_slices(signal_calculator, scan_parameters, model):
+    '''
+    Calculate the signal of the slices that the scan parameters prescribe (see the module docstring).
+
+    Parameters:
+    signal_calculator (SignalCalculator): Calculates the signal of (part of) the model.
+    scan_parameters (dict): The scan parameters. See GEOMETRY_PARAMETER_KEYS.
+    model (Model): The model.
+
+    Returns:
+    np.ndarray: The signal, slices along the third axis, on a grid with the in-plane voxel size of the model. Echo stacks keep their echoes along a fourth axis.
+    '''
+    if not prescribes_scan_volume(scan_parameters):
+        return signal_calculator.calculate_signal(scan_parameters, model)
+    scan_volume = _scan_volume(scan_parameters, model.resolution_mm)
+    shape = model.PDmap.shape
+    grid = SliceGrid(scan_volume, shape, model.resolution_mm)
+    box = grid.bounding_box(shape)
+    if box is None: # the signal of no voxels, for the shape of its echo axis if any
+        return np.zeros(grid.shape + signal_calculator.calculate_signal(scan_parameters, model.crop(np.zeros(shape, dtype=bool))).shape[1:], dtype=np.float32)
+    box_start = np.array([axis_slice.start for axis_slice in box], dtype=np.float32)
+    box_shape = tuple(axis_slice.stop - axis_slice.start for axis_slice in box)
+    box_model = model.crop(box)
+    if grid.voxels_read_per_pixel * np.prod(grid.shape) > READ_FRACTION_THRESHOLD * np.prod(box_shape): # the slices may read most of the box
+        signal_array = signal_calculator.calculate_signal(scan_parameters, box_model)
+    else: # calculate the signal of the voxels that the slices read only
+        read = grid.read_mask(box)
+        read_signal = signal_calculator.calculate_signal(scan_parameters, box_model.crop(read))
+        signal_array = np.zeros(box_shape + read_signal.shape[1:], dtype=np.float32)
+        signal_array[read] = read_signal
+
+    slices = np.zeros(grid.shape + signal_array.shape[3:], dtype=np.float32)
+    if signal_array.ndim == 3:
+        _sample_slices(grid, signal_array, box_start, slices)
+    else: # echo stack (see echo_train.EchoTrainCalculator): the echoes are sampled one after the other
+        for echo_idx in range(signal_array.shape[3]):
+            slices[..., echo_idx] = _sample_slices(grid, np.ascontiguousarray(signal_array[..., echo_idx]), box_start, np.empty(grid.shape, dtype=np.float32))
+    return slices
+
+
+def _sample_slices(grid, signal_array, box_start, slices):
+    # Sample the slices of the grid from the signal of the bounding box starting at box_start, into slices
+    box_shape = signal_array.shape
+    slab_axis, half_thickness = grid.slab_axis, grid.half_thickness
+    if half_thickness > 0:
+        # cumulative_signal[..., m, ...] along the slab axis is the integral of the signal up to the boundary between voxels m - 1 and m of the box
+        cumulative_shape = list(box_shape)
+        cumulative_shape[slab_axis] += 1
+        cumulative_signal = np.zeros(cumulative_shape)
+        np.cumsum(signal_array, axis=slab_axis, dtype=np.float64, out=cumulative_signal[tuple(slice(1, None) if axis == slab_axis else slice(None) for axis in range(3))])
+    for first_slice in range(0, grid.shape[2], SLICE_BATCH_SIZE):
+        stop_slice = min(first_slice + SLICE_BATCH_SIZE, grid.shape[2])
+        coordinates = grid.coordinates(first_slice, stop_slice)
+        coordinates -= box_start[:, None, None, None]
+        if half_thickness == 0:
+            slices[:, :, first_slice:stop_slice] = map_coordinates(signal_array, coordinates, output=np.float32, order=1, mode="constant", cval=0.0, prefilter=False)
+            continue
+        boundary = coordinates[slab_axis] + 0.5 # position of the pixels between the boundaries of the voxels along the slab axis
+        coordinates[slab_axis] = np.clip(boundary + half_thickness, 0, box_shape[slab_axis]) # the signal beyond the box is 0, so the integral is constant there
+        upper = map_coordinates(cumulative_signal, coordinates, order=1, mode="constant", cval=0.0, prefilter=False)
+        coordinates[slab_axis] = np.clip(boundary - half_thickness, 0, box_shape[slab_axis])
+        lower = map_coordinates(cumulative_signal, coordinates, order=1, mode="constant", cval=0.0, prefilter=False)
+        slices[:, :, first_slice:stop_slice] = (upper - lower) / (2 * half_thickness)
+    return slices
+
+
+def _scan_volume(scan_parameters, resolution_mm):
+    scan_volume = ScanVolume()
+    scan_volume.set_scan_volume_geometry(scan_parameters)
+    if scan_volume.slice_thickness_mm is None: # slices as thick as the voxels of the model
+        scan_volume.slice_thickness_mm = float(np.dot(np.abs(scan_volume.axisZ_LPS), resolution_mm))
+    return scan_volume
+
+
+def relative_slice_thickness(scan_parameters, resolution_mm):
+    '''Return the slice thickness relative to the voxel size of the model along the slice direction, which scales the signal-to-noise ratio. 1 for scans without a scan plane.'''
+    if not prescribes_scan_volume(scan_parameters):
+        return 1.0
+    scan_volume = _scan_volume(scan_parameters, resolution_mm)
+    return scan_volume.slice_thickness_mm / float(np.dot(np.abs(scan_volume.axisZ_LPS), resolution_mm))
@@ -0,0 +1,130 @@
+import time
+from concurrent.futures import as_completed
+
+from simulator.MRI_data_synthesiser import MRIDataSynthesiser
+from simulator.threads import set_worker_threads
+from simulator.scanlist import ScanItemStatusEnum
+from tracing import span_timer
+
+# Model and synthesiser of a worker process. They are set once per worker by initialise_worker(), so that the model does not have to be sent along with every scan.
+_worker_model = None
+_worker_synthesiser = None
+
+def initialise_worker(shared_model_descriptor):
+    '''Initializer of the worker processes of the scan pool (see Scanner.scan_all). The worker attaches to the maps that the scanner placed in shared memory, so the maps are neither pickled nor copied per worker.'''
+    global _worker_model, _worker_synthesiser
+    _worker_model = shared_model_descriptor.attach()
+    _worker_synthesiser = MRIDataSynthesiser()
+    set_worker_threads(1) # the workers already run in parallel
+    span_timer.disable() # the timing log belongs to the application's process
+
+def scan_in_worker(scan_parameters):
+    '''Acquire the data of a single scan in a worker process. Returns the acquired data and the time it took to acquire it in seconds.'''
+    start = time.perf_counter()
+    acquired_data = _worker_synthesiser.synthesise_MRI_data(scan_parameters, _worker_model)
+    acquired_data *= 1000
+    return acquired_data, time.perf_counter() - start
+
+class ScanQueue:
+    '''
+    Runs the scans of a list of scanlist elements concurrently in a pool of worker processes.
+
+    Each scanlist element is submitted to the pool with a copy of its scan parameters at the time of submission. Scanlist elements with the same acquisition key, i.e., the same effective scan parameters (see MRIDataSynthesiser.acquisition_key), are submitted once and share the acquired series. Scanlist elements whose acquisition key matches a series in the series store that was acquired before are not submitted at all; they share that series when the results are first collected, or are submitted then if the series was removed from the store in the meantime. Results are applied to the scanlist elements as they finish (not in scanlist order): the acquired data is stored in the element's acquired_data and the status of its scan item is set to COMPLETE. A result is discarded if the scan item was modified while it was being scanned, i.e., if its status is no longer READY_TO_SCAN or its acquisition key is no longer the one it was submitted with (its scan parameters were edited and saved again while it was queued). If a scan fails, the scan item's status is set to INVALID and the error is stored in its messages.
+
+    Results are applied in the process that owns the scanlist, either by calling poll() regularly (e.g., from a timer in the UI) or by iterating over as_completed().'''
+
+    def __init__(self, executor, scanlist_elements, acquisition_key, series_store=None):
+        self._executor = executor
+        self._acquisition_key = acquisition_key
+        groups = {} # acquisition key -> scanlist elements
+        ungrouped = [] # scanlist elements without an acquisition key (invalid scan technique) are scanned on their own, so that each of them reports its own error
+        for scanlist_element in scanlist_elements:
+            key = acquisition_key(scanlist_element.scan_item.scan_parameters)
+            if key is None:
+                ungrouped.append((None, [scanlist_element]))
+            else:
+                groups.setdefault(key, []).append(scanlist_element)
+        self._reused = [] # (acquisition key, scanlist elements) of series that were acquired before
+        self._pending = {} # future -> (acquisition key, scanlist elements)
+        for key, group in list(groups.items()) + ungrouped:
+            if key is not None and series_store is not None and series_store.find(key) is not None: # the series is only shared once the result is applied, when the scan items are known to be unchanged
+                self._reused.append((key, group))
+            else:
+                self._submit(key, group)
+        self.n_scans = len(scanlist_elements)
+        self.scan_times = {} # scanlist element -> time in seconds it took to acquire its data (0 for shared series that were acquired before)
+
+    @property
+    def n_finished(self):
+        return self.n_scans - sum(len(group) for _, group in self._reused) - sum(len(group) for _, group in self._pending.values())
+
+    @property
+    def done(self):
+        return len(self._pending) == 0 and len(self._reused) == 0
+
+    def poll(self):
+        '''Apply the results of the scans that have finished since the last call. Does not block. Returns the scanlist elements whose results were applied.'''
+        applied = self._apply_reused()
+        finished = [future for future in self._pending if future.done()]
+        for future in finished:
+            applied.extend(self._apply_result(future))
+        return applied
+
+    def as_completed(self):
+        '''Block until the scans finish, applying each result as soon as its scan has finished. Yields the scanlist elements in the order in which their scans finish.'''
+        yield from self._apply_reused()
+        for future in as_completed(list(self._pending)):
+            yield from self._apply_result(future)
+
+    def cancel(self):
+        '''Cancel the scans that have not started yet. Scans that are already running are left to finish, but their results are discarded.'''
+        for future in self._pending:
+            future.cancel()
+        self._pending = {}
+        self._reused = []
+
+    def _is_current(self, scanlist_element, key):
+        # Whether a result acquired with the given key still applies to the scanlist element
+        scan_item = scanlist_element.scan_item
+        return scan_item.status == ScanItemStatusEnum.READY_TO_SCAN and self._acquisition_key(scan_item.scan_parameters) == key
+
+    def _submit(self, key, group):
+        self._pending[self._executor.submit(scan_in_worker, dict(group[0].scan_item.scan_parameters))] = (key, group)
+
+    def _apply_reused(self):
+        applied = []
+        for key, group in self._reused:
+            current = [scanlist_element for scanlist_element in group if self._is_current(scanlist_element, key)]
+            if current and not current[0].reuse_acquired_data(key): # the series was removed from the store since the scans were queued
+                self._submit(key, current)
+                applied.extend(scanlist_element for scanlist_element in group if scanlist_element not in current)
+                continue
+            for scanlist_element in current:
+                scanlist_element.reuse_acquired_data(key)
+                self.scan_times[scanlist_element] = 0.0
+                scanlist_element.scan_item.status = ScanItemStatusEnum.COMPLETE
+            applied.extend(group)
+        self._reused = []
+        return applied
+
+    def _apply_result(self, future):
+        key, group = self._pending.pop(future)
+        try:
+            acquired_data, scan_time = future.result()
+        except Exception as error:
+            for scanlist_element in group:
+                scan_item = scanlist_element.scan_item
+                if self._is_current(scanlist_element, key):
+                    scan_item.messages["Scan"] = f"Scan failed: {error}"
+                    scan_item.valid = False
+                    scan_item.status = ScanItemStatusEnum.INVALID
+            return group
+        for scanlist_element in group:
+            scan_item = scanlist_element.scan_item
+            if not self._is_current(scanlist_element, key):
+                continue
+            self.scan_times[scanlist_element] = scan_time
+            if not scanlist_element.reuse_acquired_data(key): # the first scanlist element of the group stores the series, the others share it
+                scanlist_element.store_acquired_data(acquired_data, key)
+            scan_item.status = ScanItemStatusEnum.COMPLETE
+        return group
@@ -0,0 +1,113 @@
+import numpy as np
+
+from events import EventEnum, Subject
+from simulator.geometry import ImageGeometry, box_corners_LPS, intersect_box_with_image
+from simulator.validation import float_parameter
+
+SCAN_PLANE_AXES = { # Scan plane -> axes X (phase encoding), Y (frequency encoding) and Z (slice direction) of the scan volume in LPS coordinates, before angulation
+    "Axial": ((1, 0, 0), (0, 1, 0), (0, 0, 1)),
+    "Sagittal": ((0, 1, 0), (0, 0, -1), (-1, 0, 0)),
+    "Coronal": ((1, 0, 0), (0, 0, -1), (0, 1, 0)),
+}
+
+
+def prescribes_scan_volume(scan_parameters: dict) -> bool:
+    '''Return True if the scan parameters prescribe a scan volume, i.e., if their "ScanPlane" is one of SCAN_PLANE_AXES. Scans without a scan plane image the slices of the model.'''
+    return scan_parameters.get("ScanPlane") in SCAN_PLANE_AXES
+
+
+def _rotation_matrix(axis, angle_deg):
+    # Rotation matrix of angle_deg degrees around the L (0), P (1) or S (2) axis
+    angle_rad = np.deg2rad(angle_deg)
+    cos, sin = np.cos(angle_rad), np.sin(angle_rad)
+    i, j = [other_axis for other_axis in range(3) if other_axis != axis]
+    rotation_matrix = np.eye(3)
+    rotation_matrix[i, i] = cos
+    rotation_matrix[j, j] = cos
+    rotation_matrix[i, j] = -sin if axis != 1 else sin
+    rotation_matrix[j, i] = sin if axis != 1 else -sin
+    return rotation_matrix
+
+
+class ScanVolume(Subject):
+    ''' The scan volume defines the rectangular volume to be scanned next. Its orientation with respect to the LPS coordinate system is defined by the axisX_LPS, axisY_LPS and axisZ_LPS parameters. The extent of the scan volume in the X, Y and Z directions is defined by the extentX_mm, extentY_mm and extentZ_mm parameters. The position of the center of the volume with respect to the LPS coordinate system is defined by the origin_LPS parameter.
+
+    The X axis is the phase-encoding direction and the Y axis the frequency-encoding direction of the slices; the slices are stacked along the Z axis. extentX_mm and extentY_mm are None if the field of view is left empty, i.e., if it covers the whole model. slice_thickness_mm is None if the slice thickness is left empty. '''
+    def __init__(self):
+        super().__init__()
+        self.axisX_LPS = None
+        self.axisY_LPS = None
+        self.axisZ_LPS = None
+        self.extentX_mm = None
+        self.extentY_mm = None
+        self.origin_LPS = None
+        self.N_slices = None
+        self.slice_thickness_mm = None
+        self.slice_gap_mm = None
+
+    @property
+    def extentZ_mm(self):
+        return self.N_slices * (self.slice_thickness_mm or 0) + (self.N_slices - 1) * self.slice_gap_mm
+
+    @property
+    def slice_positions_mm(self) -> np.ndarray:
+        '''Z coordinates of the centres of the slices in scan volume coordinates'''
+        return -self.extentZ_mm / 2 + np.arange(self.N_slices) * ((self.slice_thickness_mm or 0) + self.slice_gap_mm) + (self.slice_thickness_mm or 0) / 2
+
+    @property
+    def conversion_matrix(self) -> np.ndarray:
+        '''Affine transformation matrix that converts scan volume coordinates to LPS coordinates'''
+        conversion_matrix = np.eye(4)
+        conversion_matrix[:3, 0] = self.axisX_LPS
+        conversion_matrix[:3, 1] = self.axisY_LPS
+        conversion_matrix[:3, 2] = self.axisZ_LPS
+        conversion_matrix[:3, 3] = self.origin_LPS
+        return conversion_matrix
+
+    def set_scan_volume_geometry(self, scan_parameters: dict):
+        '''Set the geometry from the scan parameters. Empty geometry parameters take their defaults: a single slice through the centre of the model, without angulation.'''
+        self.N_slices = int(float_parameter(scan_parameters, 'NSlices', 1))
+        self.slice_gap_mm = float_parameter(scan_parameters, 'SliceGap_mm', 0.0)
+        self.slice_thickness_mm = float_parameter(scan_parameters, 'SliceThickness_mm', None)
+        self.extentX_mm = float_parameter(scan_parameters, 'FOVPE_mm', None)
+        self.extentY_mm = float_parameter(scan_parameters, 'FOVFE_mm', None)
+        self.origin_LPS = np.array([float_parameter(scan_parameters, 'OffCenterRL_mm', 0.0), float_parameter(scan_parameters, 'OffCenterAP_mm', 0.0), float_parameter(scan_parameters, 'OffCenterFH_mm', 0.0)])
+
+        # Rotate the axes of the scan plane around the RL axis first, then around the AP axis and finally around the FH axis
+        rotation_matrix = _rotation_matrix(2, float_parameter(scan_parameters, 'FHAngle_deg', 0.0)) @ _rotation_matrix(1, float_parameter(scan_parameters, 'APAngle_deg', 0.0)) @ _rotation_matrix(0, float_parameter(scan_parameters, 'RLAngle_deg', 0.0))
+        self.axisX_LPS, self.axisY_LPS, self.axisZ_LPS = (rotation_matrix @ np.array(axis, dtype=float) for axis in SCAN_PLANE_AXES[scan_parameters['ScanPlane']])
+
+        self.notify_observers(EventEnum.SCAN_VOLUME_CHANGED)
+
+    def translate_scan_volume(self, translation_vector_LPS: np.ndarray):
+        # translate the scan volume by the translation vector (which is in LPS coordinates)
+        self.origin_LPS = self.origin_LPS + translation_vector_LPS
+        self.notify_observers(EventEnum.SCAN_VOLUME_CHANGED)
+
+    def scan_volume_mm_coords_to_LPS_coords(self, scan_volume_mm_coords) -> np.ndarray:
+        '''Convert scan volume coordinates to LPS coordinates, both in millimeters. Accepts a single point or an array of points along the last axis.'''
+        return np.asarray(scan_volume_mm_coords) @ self.conversion_matrix[:3, :3].T + self.origin_LPS
+
+    def LPS_coords_to_scan_volume_mm_coords(self, LPS_coords) -> np.ndarray:
+        '''Convert LPS coordinates to scan volume coordinates, both in millimeters. Accepts a single point or an array of points along the last axis.'''
+        return (np.asarray(LPS_coords) - self.origin_LPS) @ self.conversion_matrix[:3, :3] # the axes are orthonormal, so the inverse of the rotation is its transpose
+
+    def get_image_geometry_of_slice(self, slice_number: int, image_shape: tuple, resolution_mm=(1.0, 1.0)) -> ImageGeometry:
+        '''Return the ImageGeometry of a slice of the scan volume whose image has image_shape (rows along the phase-encoding direction, columns along the frequency-encoding direction) and pixels of resolution_mm (along the rows, along the columns).'''
+        origin_slice_LPS = self.scan_volume_mm_coords_to_LPS_coords(np.array([0, 0, self.slice_positions_mm[slice_number]]))
+        return ImageGeometry({
+            'origin_LPS': origin_slice_LPS,
+            'axisX_LPS': self.axisY_LPS, # the columns of the image run along the frequency-encoding direction
+            'axisY_LPS': self.axisX_LPS,
+            'extentX_mm': image_shape[1] * resolution_mm[1],
+            'extentY_mm': image_shape[0] * resolution_mm[0],
+            'resX_mm': resolution_mm[1],
+            'resY_mm': resolution_mm[0],
+        })
+
+    def compute_intersection_with_image(self, image_geometry: ImageGeometry) -> np.ndarray:
+        '''Return the corners of the polygon in which the scan volume intersects the plane of an image, in pixmap coordinates and ordered around the polygon (see geometry.intersect_box_with_image). Empty if the field of view is not set, since the scan volume then has no extent.'''
+        if self.extentX_mm is None or self.extentY_mm is None:
+            return np.empty((0, 2))
+        corners_LPS = box_corners_LPS(self.origin_LPS, self.conversion_matrix[:3, :3], (self.extentX_mm, self.extentY_mm, self.extentZ_mm))
+        return intersect_box_with_image(corners_LPS, image_geometry)
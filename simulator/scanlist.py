@@ -1,12 +1,17 @@
 from enum import Enum, auto
-from events import EventEnum
+from events import EventEnum, Subject
+from simulator.validation import load_validator
+import logging
 import numpy as np
 
-class Scanlist:
-    def __init__(self):
+logger = logging.getLogger(__name__)
+
+class Scanlist(Subject):
+    def __init__(self, series_store=None):
+        super().__init__()
+        self.series_store = series_store # Store that keeps the acquired series of the scanlist elements within a memory budget (see SeriesStore). If None, acquired series are kept in memory.
         self.scanlist_elements = []
         self._active_idx = None
-        self.observers = []
 
     @property
     def active_idx(self):
@@ -15,41 +20,53 @@ class Scanlist:
     @active_idx.setter
     def active_idx(self, idx):
         self._active_idx = idx
-        print("Active scanlist element index set to", idx)
-        self.notify_observers(EventEnum.SCANLIST_ACTIVE_SCANLIST_ELEMENT_CHANGED)
+        logger.debug("Active scanlist element index set to %s", idx)
+        self.notify_observers(EventEnum.SCANLIST_ACTIVE_SCANLIST_ELEMENT_CHANGED, active_idx=idx)
 
     def add_scanlist_element(self, name, scan_parameters):
-        new_scanlist_element = ScanlistElement(name, scan_parameters)
-        self.scanlist_elements.append(new_scanlist_element)
-        self.notify_observers(EventEnum.SCANLIST_ITEM_ADDED)
-        if self.active_idx is None:
-            self.active_idx = 0        
+        with self.batch_events():
+            new_scanlist_element = ScanlistElement(name, scan_parameters, self.series_store)
+            self.scanlist_elements.append(new_scanlist_element)
+            self.notify_observers(EventEnum.SCANLIST_ITEM_ADDED, indices={len(self.scanlist_elements) - 1})
+            if self.active_idx is None:
+                self.active_idx = 0        
     
+    def add_derived_scanlist_element(self, name, scan_parameters, data):
+        '''Add a scanlist element that holds a series derived from acquired series, e.g., a fitted relaxation-time map (see simulator.map_fitting), and make it the active one. It is complete from the start, so it is not scanned.'''
+        with self.batch_events():
+            self.add_scanlist_element(name, scan_parameters)
+            scanlist_element = self.scanlist_elements[-1]
+            scanlist_element.acquired_data = data
+            scanlist_element.scan_item.status = ScanItemStatusEnum.COMPLETE
+            self.active_idx = len(self.scanlist_elements) - 1
+
     def duplicate_scanlist_element(self, index):
-        self.add_scanlist_element(self.scanlist_elements[index].name, self.scanlist_elements[index].scan_item.scan_parameters)
-        # change active index to the newly added scanlist element
-        self.active_idx = len(self.scanlist_elements) - 1
+        with self.batch_events():
+            self.add_scanlist_element(self.scanlist_elements[index].name, self.scanlist_elements[index].scan_item.scan_parameters)
+            # change active index to the newly added scanlist element
+            self.active_idx = len(self.scanlist_elements) - 1
 
     def remove_scanlist_element(self, index):
-        del self.scanlist_elements[index]
-        print("Scanlist element removed at index", index, "active index is", self.active_idx)
-        if index == self.active_idx:
-            print("index removed", index, "is equal to active index", self.active_idx)
-            if len(self.scanlist_elements) == 0:
-                self.active_idx = None # if the removed scanlist element was the only one in the list, the active index should be set to None
-            #else:
-                # if index == len(self.scanlist_elements):
-                #     self.active_idx -= 1 # if the removed scanlist element was at the end of the list, the active index should be decremented by 1 
-            elif index == 0:
-                    self.active_idx = 0
+        with self.batch_events(): # observers are notified once the scanlist element has been removed and the active index has been updated
+            self.scanlist_elements[index].acquired_data = None # release the acquired series from the series store
+            del self.scanlist_elements[index]
+            logger.debug("Scanlist element removed at index %s, active index is %s", index, self.active_idx)
+            if index == self.active_idx:
+                if len(self.scanlist_elements) == 0:
+                    self.active_idx = None # if the removed scanlist element was the only one in the list, the active index should be set to None
+                #else:
+                    # if index == len(self.scanlist_elements):
+                    #     self.active_idx -= 1 # if the removed scanlist element was at the end of the list, the active index should be decremented by 1 
+                elif index == 0:
+                        self.active_idx = 0
+                else:
+                        self.active_idx -= 1
             else:
-                    self.active_idx -= 1
-        else:
-            if index < self.active_idx:
-                self.active_idx -= 1 # if the removed scanlist element was before the active index, the active index should be decremented by 1
-            else:
-                self.notify_observers(EventEnum.SCANLIST_ACTIVE_SCANLIST_ELEMENT_CHANGED) # if the removed scanlist element was after the active index, the active index should not change, however, a different scanlist element becomes active, so the observers should be notified
-        self.notify_observers(EventEnum.SCANLIST_ITEM_REMOVED)
+                if index < self.active_idx:
+                    self.active_idx -= 1 # if the removed scanlist element was before the active index, the active index should be decremented by 1
+                else:
+                    self.notify_observers(EventEnum.SCANLIST_ACTIVE_SCANLIST_ELEMENT_CHANGED, active_idx=self.active_idx) # if the removed scanlist element was after the active index, the active index should not change, however, a different scanlist element becomes active, so the observers should be notified
+            self.notify_observers(EventEnum.SCANLIST_ITEM_REMOVED, indices={index})
 
 
     @property
@@ -75,19 +92,6 @@ class Scanlist:
         self.scanlist_elements[index].scan_item.name = name
         self.scanlist_elements[index].name = name
 
-    def add_observer(self, observer):
-        self.observers.append(observer)
-        print("Observer", observer, "added to", self)
-
-    def notify_observers(self, event: EventEnum):
-        for observer in self.observers:
-            print("Subject", self, "is updating observer", observer, "with event", event)
-            observer.update(event)
-            
-    def remove_observer(self, observer):
-        self.observers.remove(observer)
-        print("Observer", observer, "removed from", self)
-
     @property
     def active_scanlist_element(self):
         return self.scanlist_elements[self.active_idx]
@@ -100,11 +104,56 @@ class ScanItemStatusEnum(Enum):
     COMPLETE = auto() # The scan item has been applied to "scan" the anatomical model. The acquired data is available.
 
 class ScanlistElement:
-    def __init__(self, name, scan_parameters):
+    def __init__(self, name, scan_parameters, series_store=None):
         self.scan_item = ScanItem(name, scan_parameters)
-        self.acquired_data = None
+        self._series_store = series_store
+        self._series_key = None # Key of the acquired series in the series store
+        self._acquired_data = None # Acquired series if there is no series store
         self._name = name
 
+    @property
+    def acquired_data(self):
+        if self._series_store is None:
+            return self._acquired_data
+        if self._series_key is None:
+            return None
+        return self._series_store.get(self._series_key)
+
+    def peek_acquired_data(self):
+        # Like acquired_data, but a spilled series is not read back into memory (see SeriesStore.peek)
+        if self._series_store is None or self._series_key is None:
+            return self.acquired_data
+        return self._series_store.peek(self._series_key)
+
+    @acquired_data.setter
+    def acquired_data(self, acquired_data):
+        self.store_acquired_data(acquired_data)
+
+    def store_acquired_data(self, acquired_data, acquisition_key=None):
+        # The acquisition key identifies the effective scan parameters the data was acquired with (see MRIDataSynthesiser.acquisition_key), so that scanlist elements with the same effective scan parameters can share it (see reuse_acquired_data).
+        if self._series_store is None:
+            self._acquired_data = acquired_data
+            return
+        if self._series_key is not None:
+            self._series_store.release(self._series_key)
+            self._series_key = None
+        if acquired_data is not None:
+            self._series_key = self._series_store.put(acquired_data, acquisition_key)
+
+    def reuse_acquired_data(self, acquisition_key):
+        '''Share the series that another scanlist element acquired with the same effective scan parameters, instead of scanning again. Returns False if there is no such series.'''
+        if self._series_store is None or acquisition_key is None:
+            return False
+        key = self._series_store.find(acquisition_key)
+        if key is None:
+            return False
+        if key != self._series_key:
+            self._series_store.share(key)
+            if self._series_key is not None:
+                self._series_store.release(self._series_key)
+            self._series_key = key
+        return True
+
     @property
     def name(self):
         return self._name
@@ -114,15 +163,15 @@ class ScanlistElement:
         self._name = name
         self.scan_item.name = name
 
-class ScanItem: 
+class ScanItem(Subject): 
     def __init__(self, name, scan_parameters):
+        super().__init__()
         self.name = name
         self._scan_parameters = {}
         for key, value in scan_parameters.items():
             self._scan_parameters[key] = value
         # self.scan_volume = ScanVolume()
         # self.scan_volume.add_observer(self) # Scan item adds itself to scan volume as an observer so that it can receive notifications that the scan volume has changed. It receives notifications when changes are caused by user interactions with the scan volume display on viewing windows on the UI. 
-        self.observers = []
         self.scan_parameters = scan_parameters
         self._scan_parameters_original = {}
         for key, value in scan_parameters.items():
@@ -137,8 +186,11 @@ class ScanItem:
     
     @status.setter
     def status(self, status):
+        old_status = self._status
+        if status == old_status:
+            return
         self._status = status
-        self.notify_observers(EventEnum.SCAN_ITEM_STATUS_CHANGED)
+        self.notify_observers(EventEnum.SCAN_ITEM_STATUS_CHANGED, scan_item=self, old_status=old_status, new_status=status)
 
     @property
     def scan_parameters(self):
@@ -146,12 +198,17 @@ class ScanItem:
     
     @scan_parameters.setter
     def scan_parameters(self, scan_parameters):
+        changed_keys = set()
         for key, value in scan_parameters.items():
             try: 
-                self._scan_parameters[key] = float(value) 
+                value = float(value) 
             except: 
-                self._scan_parameters[key] = value
-        self.notify_observers(EventEnum.SCAN_ITEM_PARAMETERS_CHANGED)
+                pass
+            if key not in self._scan_parameters or self._scan_parameters[key] != value:
+                changed_keys.add(key)
+            self._scan_parameters[key] = value
+        if changed_keys:
+            self.notify_observers(EventEnum.SCAN_ITEM_PARAMETERS_CHANGED, scan_item=self, changed_keys=changed_keys)
 
     @property
     def scan_parameters_original(self):
@@ -170,310 +227,29 @@ class ScanItem:
             self.status = ScanItemStatusEnum.INVALID
 
     def reset_parameters(self):      
-        self.scan_parameters = self.scan_parameters_original
-        self.valid = True
-        self.messages = {}
-        self.status = ScanItemStatusEnum.READY_TO_SCAN    
+        with self.batch_events():
+            self.scan_parameters = self.scan_parameters_original
+            # The parameter form may show edits that were never saved, so all parameters are reported as changed.
+            self.notify_observers(EventEnum.SCAN_ITEM_PARAMETERS_CHANGED, scan_item=self, changed_keys=set(self.scan_parameters))
+            self.valid = True
+            self.messages = {}
+            self.status = ScanItemStatusEnum.READY_TO_SCAN    
 
     def validate_scan_parameters(self, scan_parameters):
-        '''This whole function will need to be deleted or changed. For now I am pretending that the scan parameters are valid.'''
-        self.valid = True
-        self.messages = {}
-        
-        try: scan_parameters["TE_ms"] = float(scan_parameters["TE_ms"])
-
-        except: 
-            self.valid = False
-            self.messages["TE_ms"] = "TE must be a number."
-
-        if isinstance(scan_parameters["TE_ms"], float):
-            if scan_parameters["TE_ms"] < 0:
-                self.valid = False
-                self.messages["TE_ms"] = "TE cannot be a negative number."
-
-        try: scan_parameters["TR_ms"] = float(scan_parameters["TR_ms"])
-        except: 
-            self.valid = False
-            self.messages["TR_ms"] = "TR must be a number."
-        
-        if isinstance(scan_parameters["TR_ms"], float):
-            if scan_parameters["TR_ms"] < 0:
-                self.valid = False
-                self.messages["TR_ms"] = "TR cannot be a negative number."
-
-        try: scan_parameters["TI_ms"] = float(scan_parameters["TI_ms"])
-        except: 
-            self.valid = False
-            self.messages["TI_ms"] = "TI must be a number."
-
-        if isinstance(scan_parameters["TI_ms"], float):
-            if scan_parameters["TI_ms"] < 0:
-                self.valid = False
-                self.messages["TI_ms"] = "TI cannot be a negative number."
+        # The validation rules are declared in scan_parameters/scan_parameters.json (see simulator.validation). All invalid parameters are reported at once in self.messages.
+        self.messages = load_validator().validate(scan_parameters)
+        self.valid = len(self.messages) == 0
 
-        try: scan_parameters["FA_deg"] = float(scan_parameters["FA_deg"])
-        except: 
-            self.valid = False
-            self.messages["FA_deg"] = "FA must be a number."
+        with self.batch_events(): # observers are notified of the parameter and status changes once, after both have been applied
+            self.scan_parameters = scan_parameters
 
-        if isinstance(scan_parameters["FA_deg"], float):
-            if scan_parameters["FA_deg"] < 0:
-                self.valid = False
-                self.messages["FA_deg"] = "FA cannot be a negative number."
-
-        self.scan_parameters = scan_parameters
-  
-
-        if self.valid == True:
-            self.status = ScanItemStatusEnum.READY_TO_SCAN
-            
-        else:
-            self.status = ScanItemStatusEnum.INVALID
+            if self.valid == True:
+                self.status = ScanItemStatusEnum.READY_TO_SCAN
+                
+            else:
+                self.status = ScanItemStatusEnum.INVALID
 
     # def update(self, event):
     #         if event == EventEnum.SCAN_VOLUME_CHANGED:
     #             parameters = self.scan_volume.get_parameters()
     #             self.scan_parameters = parameters 
-
-    def add_observer(self, observer):
-        self.observers.append(observer)
-        print("Observer", observer, "added to", self)
-
-    def notify_observers(self, event: EventEnum):
-        for observer in self.observers:
-            print("Subject", self, "is updating observer", observer, "with event", event)
-            observer.update(event)
-            
-    def remove_observer(self, observer):
-        self.observers.remove(observer)
-        print("Observer", observer, "removed from", self)
-           
-""" class ScanVolume:
-    ''' The scan volume defines the rectangular volume to be scanned next. Its orientation with respect to the LPS coordinate system is defined by the axisX_LPS, axisY_LPS and axisZ_LPS parameters. The extent of the scan volume in the X, Y and Z directions is defined by the extentX_mm, extentY_mm and extentZ_mm parameters. The position of the center of the volume with respect to the LPS coordinate system is defined by the origin_LPS parameter. '''
-    def __init__(self):
-        self.axisX_LPS = None
-        self.axisY_LPS = None
-        self.axisZ_LPS = None
-        self.extentX_mm = None
-        self.extentY_mm = None
-        self._extentZ_mm = None # See property extentZ_mm:  N_slices * slice_thickness_mm + (N_slices - 1) * slice_gap_mm
-        self.resX_mm = 1
-        self.resY_mm = 1
-        # resolution in Z direction is the slice thickness
-        self.origin_LPS = None
-        self.N_slices = None
-        self.slice_thickness_mm = None
-        self.slice_gap_mm = None
-
-        self.observers = []
-
-    @property
-    def extentZ_mm(self):
-        return self.N_slices * self.slice_thickness_mm + (self.N_slices - 1) * self.slice_gap_mm
-     
-    @property
-    def conversion_matrix(self) -> np.ndarray:
-        '''Affine transformation matrix that converts scan volume coordinates to LPS coordinates'''
-        return np.array([[self.axisX_LPS[0], self.axisY_LPS[0], self.axisZ_LPS[0], self.origin_LPS[0]], [self.axisX_LPS[1], self.axisY_LPS[1], self.axisZ_LPS[1], self.origin_LPS[1]], [self.axisX_LPS[2], self.axisY_LPS[2], self.axisZ_LPS[2], self.origin_LPS[2]], [0, 0, 0, 1]])
-   
-    def set_scan_volume_geometry(self, scan_parameters: dict):
-        self.N_slices = int(float(scan_parameters['NSlices']))
-        self.slice_gap_mm = float(scan_parameters['SliceGap_mm'])
-        self.slice_thickness_mm = float(scan_parameters['SliceThickness_mm'])
-        self.extentX_mm = float(scan_parameters['FOVPE_mm'])
-        self.extentY_mm = float(scan_parameters['FOVFE_mm'])
-        if scan_parameters['ScanPlane'] == 'Axial':
-            self.axisX_LPS = np.array([1, 0, 0])
-            self.axisY_LPS = np.array([0, 1, 0])
-            self.axisZ_LPS = np.array([0, 0, 1])
-        if scan_parameters['ScanPlane'] == 'Sagittal':
-            self.axisX_LPS = np.array([0, 1, 0])
-            self.axisY_LPS = np.array([0, 0, -1])
-            self.axisZ_LPS = np.array([-1, 0, 0])
-        if scan_parameters['ScanPlane'] == 'Coronal':
-            self.axisX_LPS = np.array([1, 0, 0])
-            self.axisY_LPS = np.array([0, 0, -1])
-            self.axisZ_LPS = np.array([0, 1, 0])
-        self.resXmm = 1
-        self.resYmm = 1
-
-        self.origin_LPS = np.array([float(scan_parameters['OffCenterRL_mm']), float(scan_parameters['OffCenterAP_mm']), float(scan_parameters['OffCenterFH_mm'])])
-
-        # rotate the axes according to the angle parameters
-
-        # first rotate around RL axis
-        angleRL_deg = scan_parameters.get('RLAngle_deg', 0)
-        # make sure angleRL is type float
-        angleRL_deg = float(angleRL_deg)
-        # rotate the LPS axes by the angleRL
-        angleRL_rad = np.deg2rad(angleRL_deg)
-        rotation_matrix_RL = np.array([[1, 0, 0], [0, np.cos(angleRL_rad), -np.sin(angleRL_rad)], [0, np.sin(angleRL_rad), np.cos(angleRL_rad)]])
-        self.axisX_LPS = np.dot(rotation_matrix_RL, self.axisX_LPS)
-        self.axisY_LPS = np.dot(rotation_matrix_RL, self.axisY_LPS)
-        self.axisZ_LPS = np.dot(rotation_matrix_RL, self.axisZ_LPS)
-
-        # then rotate around AP axis             
-        angleAP_deg = scan_parameters.get('APAngle_deg', 0)
-        # make sure angleAP is type float
-        angleAP_deg = float(angleAP_deg)
-        # rotate the LPS axes by the angleAP
-        angleAP_rad = np.deg2rad(angleAP_deg)
-        rotation_matrix_AP = np.array([[np.cos(angleAP_rad), 0, np.sin(angleAP_rad)], [0, 1, 0], [-np.sin(angleAP_rad), 0, np.cos(angleAP_rad)]])
-        self.axisX_LPS = np.dot(rotation_matrix_AP, self.axisX_LPS)
-        self.axisY_LPS = np.dot(rotation_matrix_AP, self.axisY_LPS)
-        self.axisZ_LPS = np.dot(rotation_matrix_AP, self.axisZ_LPS)
-
-        # finally rotate around FH axis
-        angleFH_deg = scan_parameters.get('FHAngle_deg', 0)
-        # make sure angleFH is type float
-        angleFH_deg = float(angleFH_deg)
-        # rotate the LPS axes by the angleFH
-        angleFH_rad = np.deg2rad(angleFH_deg)
-        rotation_matrix_FH = np.array([[np.cos(angleFH_rad), -np.sin(angleFH_rad), 0], [np.sin(angleFH_rad), np.cos(angleFH_rad), 0], [0, 0, 1]])
-        self.axisX_LPS = np.dot(rotation_matrix_FH, self.axisX_LPS)
-        self.axisY_LPS = np.dot(rotation_matrix_FH, self.axisY_LPS)
-        self.axisZ_LPS = np.dot(rotation_matrix_FH, self.axisZ_LPS)        
-
-        self.notify_observers(EventEnum.SCAN_VOLUME_CHANGED)
-
-    def compute_intersection_with_acquired_image(self, acquired_image: AcquiredImage) -> list[np.array]:
-        # compute the intersection of the scan volume with the acquired image and return a list of the corners of the polygon that represents the intersection. The corners are in pixmap coordinates and are ordered in a clockwise manner.
-
-        # list the edges of the scan volume in scan volume coordinates. For each edge, find the intersection points (if any) with the 2D acquired image. 
-        edges = self._list_edges_of_scan_volume()
-        list_intersection_pts_LPS = []
-        acquired_image_geometry = acquired_image.image_geometry
-        origin_acq_im = acquired_image_geometry.origin_LPS
-        axisX_acq_im = acquired_image_geometry.axisX_LPS
-        axisY_acq_im = acquired_image_geometry.axisY_LPS
-        for edge in edges:
-            start_pt_line_LPS = self.scan_volume_mm_coords_to_LPS_coords(edge[0])
-            end_pt_line_LPS = self.scan_volume_mm_coords_to_LPS_coords(edge[1])
-            intersection_pts_LPS = self._line_plane_intersection(origin_acq_im, axisX_acq_im, axisY_acq_im, start_pt_line_LPS, end_pt_line_LPS)
-            if intersection_pts_LPS is not None:
-                for pt in intersection_pts_LPS:
-                    list_intersection_pts_LPS.append(pt)
-
-        # convert the intersection points from LPS coordinates to pixmap coordinates
-        list_intersection_pts_pixmap = []
-        for pt_LPS in list_intersection_pts_LPS:
-            pt_pixmap = acquired_image_geometry.LPS_coords_to_pixmap_coords(pt_LPS)
-            list_intersection_pts_pixmap.append(pt_pixmap)
-
-        # sort the 2D intersection points in a clockwise manner
-        # find the centroid of the intersection points
-        centroid = np.mean(list_intersection_pts_pixmap, axis=0)
-        list_intersection_pts_pixmap = sorted(list_intersection_pts_pixmap, key=lambda pt: np.arctan2(pt[1] - centroid[1], pt[0] - centroid[0]))
-
-        return list_intersection_pts_pixmap
-
-    def _get_geometry_parameters(self) -> dict:
-        geometry_parameters = {}
-        geometry_parameters['axisX_LPS'] = self.axisX_LPS
-        geometry_parameters['axisY_LPS'] = self.axisY_LPS
-        geometry_parameters['extentX_mm'] = self.extentX_mm
-        geometry_parameters['extentY_mm'] = self.extentY_mm
-        geometry_parameters['resX_mm'] = self.resX_mm
-        geometry_parameters['resY_mm'] = self.resY_mm
-        return geometry_parameters
-
-    def get_image_geometry_of_slice(self, slice_number: int) -> ImageGeometry:
-        '''This function returns the ImageGeometry of each slice in the scan volume.'''
-        origin_slice_in_scan_volume_coords = np.array([0, 0, -self.extentZ_mm / 2 + slice_number * (self.slice_thickness_mm + self.slice_gap_mm) + self.slice_thickness_mm / 2])
-        origin_slice_in_LPS_coords = self.scan_volume_mm_coords_to_LPS_coords(origin_slice_in_scan_volume_coords)
-        geometry_parameters = self._get_geometry_parameters()
-        geometry_parameters['origin_LPS'] = origin_slice_in_LPS_coords
-        return ImageGeometry(geometry_parameters)
-
-    def translate_scan_volume(self, translation_vector_LPS: np.ndarray):
-        # translate the scan volume by the translation vector (which is in LPS coordinates)
-        self.origin_LPS += translation_vector_LPS
-        self.notify_observers(EventEnum.SCAN_VOLUME_CHANGED)
-
-    def scan_volume_mm_coords_to_LPS_coords(self, scan_volume_mm_coords: tuple) -> tuple:
-        '''Convert scan volume coordinates to LPS coordinates. The scan volume coordinates are in millimeters, and the LPS coordinates are in millimeters. '''
-        x, y, z = scan_volume_mm_coords
-
-        L, P, S, one = np.dot(self.conversion_matrix, np.array([x, y, z, 1]))
-
-        return (L, P, S)
-    
-    def LPS_coords_to_scan_volume_mm_coords(self, LPS_coords: tuple) -> tuple:
-        '''Convert LPS coordinates to scan volume coordinates. The LPS coordinates are in millimeters, and the scan volume coordinates are in millimeters. '''
-
-        L, P, S = LPS_coords
-
-        x, y, z, one = np.dot(np.linalg.inv(self.conversion_matrix), np.array([L, P, S, 1]))
-
-        return (x, y, z)
-    
-    def _list_edges_of_scan_volume(self) -> list[tuple]:
-        '''list the edges of the scan volume in scan volume coordinates'''
-        # Define the corners of the FOV in FOV coordinates
-        front_top_left = np.array([-self.extentX_mm / 2, -self.extentY_mm / 2, -self.extentZ_mm / 2])
-        front_top_right = np.array([self.extentX_mm / 2, -self.extentY_mm / 2, -self.extentZ_mm / 2])
-        front_bottom_right = np.array([self.extentX_mm / 2, self.extentY_mm / 2, -self.extentZ_mm / 2])
-        front_bottom_left = np.array([-self.extentX_mm / 2, self.extentY_mm / 2, -self.extentZ_mm / 2])
-        back_top_left = np.array([-self.extentX_mm / 2, -self.extentY_mm / 2, self.extentZ_mm / 2])
-        back_top_right = np.array([self.extentX_mm / 2, -self.extentY_mm / 2, self.extentZ_mm / 2])
-        back_bottom_right = np.array([self.extentX_mm / 2, self.extentY_mm / 2, self.extentZ_mm / 2])
-        back_bottom_left = np.array([-self.extentX_mm / 2, self.extentY_mm / 2, self.extentZ_mm / 2]) 
-
-        # List the edges of the scan volume in scan volume coordinates. Each edge is a tuple containing the coordinates of the two endpoints of the edge.
-        edges = [
-            (front_top_left, front_top_right),
-            (front_top_right, front_bottom_right),
-            (front_bottom_right, front_bottom_left),
-            (front_bottom_left, front_top_left),
-            (back_top_left, back_top_right),
-            (back_top_right, back_bottom_right),
-            (back_bottom_right, back_bottom_left),
-            (back_bottom_left, back_top_left),
-            (front_top_left, back_top_left),
-            (front_top_right, back_top_right),
-            (front_bottom_right, back_bottom_right),
-            (front_bottom_left, back_bottom_left)
-        ]
-
-        return edges 
-
-    def _line_plane_intersection(self, origin_plane, axisX_plane, axisY_plane, start_pt_line, end_pt_line) -> list[np.array]:
-        
-        # Convert inputs to numpy arrays
-        origin_plane = np.array(origin_plane)
-        axisX_plane = np.array(axisX_plane)
-        axisY_plane = np.array(axisY_plane)
-        start_pt_line = np.array(start_pt_line)
-        end_pt_line = np.array(end_pt_line)
-
-        # Direction vector of the line
-        line_dir = end_pt_line - start_pt_line
-
-        # Matrix and vector to solve for the intersection point
-        mat = np.column_stack((line_dir, -axisX_plane, -axisY_plane))
-        vec = origin_plane - start_pt_line
-
-        # Create list to store intersection points
-        intersection_pts = []
-
-        # Check if the matrix is singular
-        if np.linalg.matrix_rank(mat) < 3:
-            # The line is parallel to the plane
-            mat2 = np.column_stack((-axisX_plane, -axisY_plane, vec)) 
-            if np.linalg.matrix_rank(mat2) == 3:
-                # The line is parallel to the plane and does not lie on the plane
-                return None
-            else:
-                # The line is parallel to the plane and lies on the plane
-                intersection_pts.append(start_pt_line)
-                intersection_pts.append(end_pt_line)
-                return intersection_pts
-        if self.valid == True:
-            self.status = ScanItemStatusEnum.READY_TO_SCAN
-            
-        else:
-            self.status = ScanItemStatusEnum.INVALID
-             """
-
-
-        
\ No newline at end of file
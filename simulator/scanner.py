@@ -1,5 +1,12 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
 from simulator.examination import Examination
 from simulator.MRI_data_synthesiser import MRIDataSynthesiser
+from simulator.map_fitting import fit_relaxation_map
+from simulator.scan_queue import ScanQueue, initialise_worker
+from simulator.scanlist import ScanItemStatusEnum
+from tracing import span_timer
 
 class Scanner:
     """
@@ -9,6 +16,9 @@ class Scanner:
 
         self._MRI_data_synthesiser = MRIDataSynthesiser()
         self._examination = None 
+        self._scan_pool = None # Pool of worker processes used by scan_all(). Created on first use and shut down when the examination stops.
+        self._shared_model = None # Maps of the model placed in shared memory for the workers of the scan pool. Released together with the pool.
+        self.max_scan_workers = None # Maximum number of worker processes used by scan_all(). None means one per CPU core.
     
     def scan(self):
         """
@@ -17,16 +27,69 @@ class Scanner:
         :return: Data synthesized from the active scan item and model.
         :rtype: np.array
         """
-        acquired_data = self._MRI_data_synthesiser.synthesise_MRI_data(self.active_scan_item.scan_parameters, self.model)     
-        self.scanlist.active_scanlist_element.acquired_data = 1000*acquired_data
+        scanlist_element = self.scanlist.active_scanlist_element
+        acquisition_key = self._MRI_data_synthesiser.acquisition_key(self.active_scan_item.scan_parameters)
+        if scanlist_element.reuse_acquired_data(acquisition_key): # another scanlist element was already scanned with the same effective scan parameters
+            return scanlist_element.acquired_data
+        with span_timer.span("synthesis"):
+            acquired_data = self._MRI_data_synthesiser.synthesise_MRI_data(self.active_scan_item.scan_parameters, self.model)     
+        with span_timer.span("scaling"):
+            acquired_data *= 1000 # in place, so that the series is not held in memory twice
+        scanlist_element.store_acquired_data(acquired_data, acquisition_key)
         return acquired_data
 
+    def scan_all(self):
+        """
+        Queues every scanlist element that is ready to scan and scans them concurrently in a pool of worker processes. The maps of the model are placed in shared memory once, when the pool is created, and the worker processes attach to them (see Model.share). Scanlist elements with the same effective scan parameters are scanned once and share the acquired series, also with elements that were scanned before.
+
+        :return: The queue of scans. Results are applied to the scanlist elements as they are collected from the queue (see ScanQueue).
+        :rtype: ScanQueue
+        """
+        ready_scanlist_elements = [scanlist_element for scanlist_element in self.scanlist.scanlist_elements if scanlist_element.scan_item.status == ScanItemStatusEnum.READY_TO_SCAN]
+        if self._scan_pool is None:
+            self._shared_model = self.model.share()
+            # Workers are spawned rather than forked: forking would copy the state of the GUI and of the FFT and noise thread pools of this process mid-flight
+            self._scan_pool = ProcessPoolExecutor(max_workers=self.max_scan_workers, mp_context=multiprocessing.get_context("spawn"), initializer=initialise_worker, initargs=(self._shared_model.descriptor,))
+        return ScanQueue(self._scan_pool, ready_scanlist_elements, self._MRI_data_synthesiser.acquisition_key, self.scanlist.series_store)
+
+    def fit_relaxation_map(self, index, quantity):
+        """
+        Fits a T1 ("T1") or T2/T2* ("T2") map to the acquired series of scanlist element index and the complete scanlist elements that match it, and adds the map to the scanlist as a complete scanlist element (see simulator.map_fitting).
+
+        :raises ValueError: If the series do not suffice for the fit.
+        """
+        name, scan_parameters, fitted_map = fit_relaxation_map(self.scanlist, index, quantity, self._MRI_data_synthesiser)
+        self.scanlist.add_derived_scanlist_element(name, scan_parameters, fitted_map)
+
     def start_examination(self, exam_name, model):
+        self._close_examination()
         self.examination = Examination(exam_name, model)
 
+    def open_examination(self, examination):
+        # Continue an examination that was saved earlier (see simulator.examination_file).
+        self._close_examination()
+        self.examination = examination
+
     def stop_examination(self):
+        self._close_examination()
         self.examination = None
 
+    def _close_examination(self):
+        self._shutdown_scan_pool()
+        try:
+            self.examination.close()
+        except AttributeError: # no examination has been started yet
+            pass
+
+    def _shutdown_scan_pool(self):
+        if self._scan_pool is not None:
+            self._scan_pool.shutdown(wait=False, cancel_futures=True)
+            self._scan_pool = None
+        if self._shared_model is not None:
+            # Workers that are still running keep their own mapping of the maps, so the shared memory can be unlinked without waiting for them.
+            self._shared_model.close()
+            self._shared_model = None
+
     @property 
     def model(self):
         try:
@@ -0,0 +1,150 @@
+import logging
+import os
+import shutil
+import tempfile
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BUDGET_MB = 2048 # Can be overridden with the environment variable EDUMRISIM_SERIES_MEMORY_BUDGET_MB
+
+
+def default_memory_budget_bytes():
+    return int(float(os.environ.get("EDUMRISIM_SERIES_MEMORY_BUDGET_MB", DEFAULT_MEMORY_BUDGET_MB)) * 1024**2)
+
+
+class _StoredSeries:
+    __slots__ = ("array", "on_disk", "acquisition_key", "n_references")
+
+    def __init__(self, array, on_disk, acquisition_key):
+        self.array = array # The series in memory, or None if it has been spilled
+        self.on_disk = on_disk # Read-only memory map of the series on disk, or None if the series has never been spilled
+        self.acquisition_key = acquisition_key # See MRIDataSynthesiser.acquisition_key
+        self.n_references = 1
+
+
+class SeriesStore:
+    '''
+    Keeps the acquired series of an examination within a memory budget.
+
+    Series are kept in memory as long as the total size of the series in memory does not exceed the memory budget. When it does, the least recently used series are spilled to temporary files and dropped from memory. A spilled series is read back into memory the next time it is requested with get(), e.g., when it is displayed. Series that are already on disk when they are stored (memory maps, e.g., the series of a loaded examination) are not copied until they are requested.
+
+    Stored series are read-only. Because a series never changes once it is stored, its temporary file is written only the first time it is spilled and is reused afterwards, and a series can be shared by several scanlist elements: a series that is stored with an acquisition key can be found with find() and shared with share(), so that scanlist elements that were scanned with the same effective scan parameters hold a single copy. A series is removed when every scanlist element that shares it has released it. Changing the series of one scanlist element means storing a new series for it (copy-on-write), which leaves the series of the other scanlist elements untouched.
+
+    The temporary file of a series is deleted when the series is removed, and any remaining temporary files when the store is closed or garbage collected.'''
+
+    def __init__(self, memory_budget_bytes=None, directory=None):
+        self.memory_budget_bytes = default_memory_budget_bytes() if memory_budget_bytes is None else memory_budget_bytes
+        self._parent_directory = directory # Directory in which the temporary directory for spilled series is created. None means the system's temporary directory.
+        self._spill_directory = None # Created when the first series is spilled
+        self._finalizer = None
+        self._entries = OrderedDict() # key -> _StoredSeries, ordered from least to most recently used
+        self._keys_by_acquisition = {} # acquisition key -> key of the series that was acquired with it
+        self._next_key = 0
+        self._resident_bytes = 0
+
+    @property
+    def resident_bytes(self):
+        '''Total size of the series that are currently in memory.'''
+        return self._resident_bytes
+
+    def put(self, array, acquisition_key=None):
+        '''Store a series and return the key with which it can be requested. If an acquisition key is given, the series can be found with find(acquisition_key).'''
+        key = self._next_key
+        self._next_key += 1
+        if acquisition_key is not None:
+            self._keys_by_acquisition[acquisition_key] = key
+        if isinstance(array, np.memmap):
+            self._entries[key] = _StoredSeries(None, array, acquisition_key)
+            return key
+        array = np.asarray(array)
+        array.flags.writeable = False
+        self._entries[key] = _StoredSeries(array, None, acquisition_key)
+        self._resident_bytes += array.nbytes
+        self._enforce_budget()
+        return key
+
+    def get(self, key):
+        '''Return a stored series, reading it back into memory if it has been spilled. The series becomes the most recently used one.'''
+        entry = self._entries[key]
+        self._entries.move_to_end(key)
+        if entry.array is None:
+            entry.array = np.array(entry.on_disk)
+            entry.array.flags.writeable = False
+            self._resident_bytes += entry.array.nbytes
+            logger.debug("Series %s read back into memory (%d bytes)", key, entry.array.nbytes)
+            self._enforce_budget()
+        return entry.array
+
+    def peek(self, key):
+        '''Return a stored series without reading it back into memory and without making it the most recently used one: the series in memory if it is resident, otherwise a read-only memory map of it on disk. Used to save series, which should not push the series that are being viewed out of memory.'''
+        entry = self._entries[key]
+        return entry.array if entry.array is not None else entry.on_disk
+
+    def find(self, acquisition_key):
+        '''Return the key of the series that was stored with the acquisition key, or None if there is no such series.'''
+        return self._keys_by_acquisition.get(acquisition_key)
+
+    def share(self, key):
+        '''Add a reference to a stored series, e.g., for a scanlist element that was scanned with the same effective scan parameters as the series. Every reference must be released with release().'''
+        self._entries[key].n_references += 1
+        return key
+
+    def release(self, key):
+        '''Release a reference to a series. The series is removed from the store, and its temporary file deleted, when its last reference is released. Arrays that were returned by get() remain valid.'''
+        entry = self._entries[key]
+        entry.n_references -= 1
+        if entry.n_references > 0:
+            return
+        del self._entries[key]
+        if entry.acquisition_key is not None and self._keys_by_acquisition.get(entry.acquisition_key) == key:
+            del self._keys_by_acquisition[entry.acquisition_key]
+        if entry.array is not None:
+            self._resident_bytes -= entry.array.nbytes
+        entry.on_disk = None
+        file_path = self._spill_path(key)
+        if file_path is not None and os.path.exists(file_path): # series that were on disk when they were stored, e.g., in an examination file, have no temporary file
+            try:
+                os.remove(file_path)
+            except OSError: # still mapped elsewhere (on Windows); deleted with the directory when the store is closed
+                logger.debug("Temporary file of series %s could not be deleted", key)
+
+    def close(self):
+        '''Remove all series and delete the temporary files. Calling close() more than once has no effect.'''
+        self._entries.clear()
+        self._keys_by_acquisition.clear()
+        self._resident_bytes = 0
+        if self._finalizer is not None:
+            self._finalizer()
+        self._spill_directory = None # a series that is spilled after closing gets a new temporary directory
+        self._finalizer = None
+
+    def _enforce_budget(self):
+        # The most recently used series is never spilled, so a series that is larger than the budget on its own stays in memory while it is in use.
+        for key in list(self._entries)[:-1]:
+            if self._resident_bytes <= self.memory_budget_bytes:
+                break
+            if self._entries[key].array is not None:
+                self._spill(key)
+
+    def _spill(self, key):
+        entry = self._entries[key]
+        if entry.on_disk is None:
+            if self._spill_directory is None:
+                self._spill_directory = tempfile.mkdtemp(prefix="eduMRIsim_series_", dir=self._parent_directory)
+                self._finalizer = weakref.finalize(self, shutil.rmtree, self._spill_directory, ignore_errors=True)
+            file_path = self._spill_path(key)
+            np.save(file_path, entry.array)
+            entry.on_disk = np.load(file_path, mmap_mode="r")
+        self._resident_bytes -= entry.array.nbytes
+        entry.array = None
+        logger.debug("Series %s spilled to disk", key)
+
+    def _spill_path(self, key):
+        # Temporary file of a spilled series, or None if no series has been spilled yet
+        if self._spill_directory is None:
+            return None
+        return os.path.join(self._spill_directory, f"{key}.npy")
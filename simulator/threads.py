@@ -0,0 +1,14 @@
+'''Number of threads of the multithreaded stages of the synthesiser: the FFTs (kspace), the noise (noise) and the Bloch simulation (bloch).'''
+import os
+
+WORKER_THREADS = -1 # -1 means one per CPU core. The scan pool sets it to 1 in its worker processes, which already run in parallel.
+
+
+def set_worker_threads(threads):
+    global WORKER_THREADS
+    WORKER_THREADS = threads
+
+
+def worker_threads():
+    '''Return the number of threads a stage may use.'''
+    return (os.cpu_count() or 1) if WORKER_THREADS == -1 else WORKER_THREADS
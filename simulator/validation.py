@@ -0,0 +1,149 @@
+'''Validation of scan parameters.
+
+The validation rules are declared next to the editors of the scan parameters in scan_parameters/scan_parameters.json:
+
+- "data_type": "float" means the value must be a number, "int" that it must be a whole number and "float_list" that it must be one or more numbers separated by commas and/or whitespace. Parameters that are edited with a QComboBox must be one of the items in their "default_value" list.
+- "minimum" and "maximum" are inclusive bounds on the value, or on each number of a "float_list".
+- "less_than" is the key of another parameter whose value the value must be less than, e.g., TE must be less than TR.
+- "optional": true means the value may be left empty. Empty values pass all checks.
+- "symbol" is the short name used in messages, e.g., "TE". It defaults to the parameter's "name".
+
+compile_validator() turns the rules into a ScanParameterValidator once, so that validating a set of scan parameters is a single pass over a list of precompiled checks. This is fast enough to validate the parameter form on every keystroke.
+'''
+from functools import lru_cache
+import re
+
+from simulator.load import load_json
+
+SCAN_PARAMETERS_FILE_PATH = "scan_parameters/scan_parameters.json"
+
+
+class ScanParameterValidator:
+    def __init__(self, field_checks, cross_checks):
+        self._field_checks = field_checks # (key, converter, message if conversion fails, [(check, message), ...], optional) per parameter
+        self._cross_checks = cross_checks # (key, other key, check, message) per constraint between two parameters
+
+    def validate(self, scan_parameters):
+        '''
+        Validate the scan parameters. Keys that have no rules, e.g., "description", are ignored.
+
+        Returns:
+        dict: Parameter key -> message for every invalid parameter. The scan parameters are valid if it is empty.
+        '''
+        messages = {}
+        values = {}
+        for key, convert, conversion_message, checks, optional in self._field_checks:
+            if optional and scan_parameters.get(key) in ("", None):
+                continue
+            try:
+                value = convert(scan_parameters.get(key))
+            except (TypeError, ValueError):
+                messages[key] = conversion_message
+                continue
+            for check, message in checks:
+                if not check(value):
+                    messages[key] = message
+                    break
+            else:
+                values[key] = value
+        for key, other_key, check, message in self._cross_checks:
+            if key in values and other_key in values and not check(values[key], values[other_key]):
+                messages[key] = message
+        return messages
+
+
+def _integer(value):
+    value = float(value)
+    if not value.is_integer():
+        raise ValueError(value)
+    return int(value)
+
+
+def float_parameter(scan_parameters, key, default=None):
+    '''Return the value of a "float" scan parameter as a float, or default if it is empty or missing.'''
+    value = scan_parameters.get(key)
+    if value in ("", None):
+        return default
+    return float(value)
+
+
+def parse_float_list(value):
+    '''Parse the value of a "float_list" parameter into a tuple of floats. Numbers are separated by commas and/or whitespace; a single number may be given as an int or float.'''
+    if isinstance(value, (int, float)):
+        return (float(value),)
+    values = tuple(float(number) for number in re.split(r"[,\s]+", value.strip()) if number)
+    if not values:
+        raise ValueError(value)
+    return values
+
+
+def _each(check):
+    # Apply a check of a single value to each number of a float_list
+    return lambda values, *other_values: all(check(value, *other_values) for value in values)
+
+
+def _choice(options):
+    def convert(value):
+        if value not in options:
+            raise ValueError(value)
+        return value
+    return convert
+
+
+def compile_validator(parameter_definitions):
+    '''Compile the validation rules of the scan parameters (see the module docstring) into a ScanParameterValidator.'''
+    symbols = {definition["key"]: definition.get("symbol", definition["name"]) for definition in parameter_definitions}
+    field_checks = []
+    cross_checks = []
+    for definition in parameter_definitions:
+        key = definition["key"]
+        symbol = symbols[key]
+        unit = " " + definition["unit"] if definition.get("unit") else ""
+        checks = []
+        if definition.get("data_type") == "float":
+            convert = float
+            conversion_message = f"{symbol} must be a number."
+        elif definition.get("data_type") == "int":
+            convert = _integer
+            conversion_message = f"{symbol} must be a whole number."
+        elif definition.get("data_type") == "float_list":
+            convert = parse_float_list
+            conversion_message = f"{symbol} must be numbers separated by commas."
+        elif definition["editor"] == "QComboBox":
+            options = tuple(definition["default_value"])
+            convert = _choice(options)
+            conversion_message = f"{symbol} must be one of {', '.join(options)}."
+        else:
+            continue
+        if "minimum" in definition:
+            minimum = definition["minimum"]
+            message = f"{symbol} cannot be a negative number." if minimum == 0 else f"{symbol} cannot be less than {minimum}{unit}."
+            checks.append((lambda value, minimum=minimum: value >= minimum, message))
+        if "maximum" in definition:
+            maximum = definition["maximum"]
+            checks.append((lambda value, maximum=maximum: value <= maximum, f"{symbol} cannot be more than {maximum}{unit}."))
+        if "less_than" in definition:
+            other_key = definition["less_than"]
+            cross_checks.append((key, other_key, lambda value, other_value: value < other_value, f"{symbol} must be less than {symbols[other_key]}."))
+        if definition.get("data_type") == "float_list":
+            checks = [(_each(check), message) for check, message in checks]
+            cross_checks = [(check_key, other_key, _each(check) if check_key == key else check, message) for check_key, other_key, check, message in cross_checks]
+        field_checks.append((key, convert, conversion_message, checks, definition.get("optional", False)))
+    return ScanParameterValidator(field_checks, cross_checks)
+
+
+@lru_cache(maxsize=None)
+def load_validator(file_path=SCAN_PARAMETERS_FILE_PATH):
+    '''Return the validator compiled from the scan parameter definitions in file_path. The file is read and compiled once per process.'''
+    return compile_validator(load_json(file_path))
+
+
+def default_scan_parameters(file_path=SCAN_PARAMETERS_FILE_PATH):
+    '''Return the default scan parameters of scan_parameters.json: the default value of each line edit and the first item of each combo box.'''
+    scan_parameters = {}
+    for definition in load_json(file_path):
+        value = definition["default_value"][0] if definition["editor"] == "QComboBox" else definition["default_value"]
+        try: value = float(value)
+        except (TypeError, ValueError): pass
+        scan_parameters[definition["key"]] = value
+    return scan_parameters
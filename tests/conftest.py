@@ -0,0 +1,24 @@
+'''Shared fixtures of the tests. The tests run from the repository root, since the application reads its .json files by relative paths.'''
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+from simulator.load import load_model, load_model_catalogue
+from simulator.validation import default_scan_parameters
+
+
+@pytest.fixture(scope="session")
+def model():
+    '''The 128^3 Shepp-Logan phantom of the model catalogue.'''
+    return load_model("SheppLogan128", load_model_catalogue()["SheppLogan128"])
+
+
+@pytest.fixture
+def scan_parameters():
+    '''The default scan parameters of scan_parameters.json, with spin echo as the scan technique.'''
+    return {**default_scan_parameters(), "ScanTechnique": "SE"}
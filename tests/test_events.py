@@ -0,0 +1,96 @@
+import gc
+import weakref
+
+from events import EventEnum, Subject
+from simulator.scanlist import ScanItem, ScanItemStatusEnum, Scanlist
+
+
+class RecordingObserver:
+    def __init__(self):
+        self.notifications = []
+
+    def update(self, event, **payload):
+        self.notifications.append((event, payload))
+
+
+def _observed(subject):
+    observer = RecordingObserver()
+    subject.add_observer(observer)
+    return observer
+
+
+def test_events_are_delivered_with_their_payload():
+    subject = Subject()
+    observer = _observed(subject)
+    subject.notify_observers(EventEnum.SCANLIST_ACTIVE_SCANLIST_ELEMENT_CHANGED, active_idx=3)
+    assert observer.notifications == [(EventEnum.SCANLIST_ACTIVE_SCANLIST_ELEMENT_CHANGED, {"active_idx": 3})]
+
+
+def test_events_in_nested_batches_are_coalesced_when_the_outermost_batch_exits():
+    subject = Subject()
+    observer = _observed(subject)
+    with subject.batch_events():
+        subject.notify_observers(EventEnum.SCAN_ITEM_PARAMETERS_CHANGED, changed_keys={"TE_ms"})
+        with subject.batch_events():
+            subject.notify_observers(EventEnum.SCAN_ITEM_STATUS_CHANGED, old_status=ScanItemStatusEnum.READY_TO_SCAN, new_status=ScanItemStatusEnum.BEING_MODIFIED)
+            subject.notify_observers(EventEnum.SCAN_ITEM_PARAMETERS_CHANGED, changed_keys={"TR_ms"})
+        subject.notify_observers(EventEnum.SCAN_ITEM_STATUS_CHANGED, old_status=ScanItemStatusEnum.BEING_MODIFIED, new_status=ScanItemStatusEnum.INVALID)
+        assert observer.notifications == []
+    assert observer.notifications == [
+        (EventEnum.SCAN_ITEM_PARAMETERS_CHANGED, {"changed_keys": {"TE_ms", "TR_ms"}}),
+        (EventEnum.SCAN_ITEM_STATUS_CHANGED, {"old_status": ScanItemStatusEnum.READY_TO_SCAN, "new_status": ScanItemStatusEnum.INVALID}),
+    ]
+
+
+def test_status_changes_that_cancel_out_are_dropped():
+    subject = Subject()
+    observer = _observed(subject)
+    with subject.batch_events():
+        subject.notify_observers(EventEnum.SCAN_ITEM_STATUS_CHANGED, old_status=ScanItemStatusEnum.READY_TO_SCAN, new_status=ScanItemStatusEnum.BEING_MODIFIED)
+        subject.notify_observers(EventEnum.SCAN_ITEM_STATUS_CHANGED, old_status=ScanItemStatusEnum.BEING_MODIFIED, new_status=ScanItemStatusEnum.READY_TO_SCAN)
+    assert observer.notifications == []
+
+
+def test_scanlist_items_added_in_a_batch_are_all_notified():
+    scanlist = Scanlist()
+    observer = _observed(scanlist)
+    with scanlist.batch_events():
+        for name in ("First", "Second", "Third"):
+            scanlist.add_scanlist_element(name, {"ScanTechnique": "SE"})
+        scanlist.remove_scanlist_element(0)
+        scanlist.remove_scanlist_element(1)
+    notifications = dict(observer.notifications)
+    assert notifications[EventEnum.SCANLIST_ITEM_ADDED] == {"indices": {0, 1, 2}}
+    assert notifications[EventEnum.SCANLIST_ITEM_REMOVED] == {"indices": {0, 1}}
+
+
+def test_validating_scan_parameters_notifies_the_changed_keys_once():
+    scan_parameters = {"ScanTechnique": "SE", "TE_ms": 14.0, "TR_ms": 864.0, "TI_ms": 0.0, "FA_deg": 90.0}
+    scan_item = ScanItem("SE", scan_parameters)
+    observer = _observed(scan_item)
+    scan_item.validate_scan_parameters({**scan_parameters, "TE_ms": 20.0, "TR_ms": 600.0})
+    parameter_notifications = [payload for event, payload in observer.notifications if event == EventEnum.SCAN_ITEM_PARAMETERS_CHANGED]
+    assert len(parameter_notifications) == 1
+    assert parameter_notifications[0]["changed_keys"] == {"TE_ms", "TR_ms"}
+
+
+def test_adding_an_observer_twice_notifies_it_once():
+    subject = Subject()
+    observer = _observed(subject)
+    subject.add_observer(observer)
+    subject.notify_observers(EventEnum.SCANLIST_ITEM_ADDED, indices={0})
+    assert len(observer.notifications) == 1
+    subject.remove_observer(observer)
+    subject.remove_observer(observer) # removing an observer that is not subscribed has no effect
+    assert subject.observers == []
+
+
+def test_subject_does_not_keep_its_observers_alive():
+    subject = Subject()
+    observer = _observed(subject)
+    observer_ref = weakref.ref(observer)
+    del observer
+    gc.collect()
+    assert observer_ref() is None
+    assert subject.observers == []
+    subject.notify_observers(EventEnum.SCANLIST_ITEM_ADDED, indices={0}) # garbage collected observers are skipped
@@ -0,0 +1,39 @@
+import numpy as np
+
+from simulator.examination_file import load_examination, read_examination_header, save_examination
+from simulator.scanlist import ScanItemStatusEnum
+from simulator.scanner import Scanner
+
+
+def test_round_trip(tmp_path, model, scan_parameters):
+    scanner = Scanner()
+    scanner.start_examination("Round trip", model)
+    scanlist = scanner.scanlist
+    scanlist.add_scanlist_element("SE", scan_parameters)
+    scanlist.add_scanlist_element("SE copy", scan_parameters)
+    scanlist.add_scanlist_element("Not scanned", {**scan_parameters, "TE_ms": 30.0})
+    for index in (0, 1):
+        scanlist.active_idx = index
+        scanner.scan()
+        scanner.active_scan_item.status = ScanItemStatusEnum.COMPLETE
+    file_path = tmp_path / "round_trip.exam"
+    save_examination(scanner.examination, file_path)
+
+    header = read_examination_header(file_path)
+    assert header["name"] == "Round trip"
+    assert header["scanlist"][0]["series"] == header["scanlist"][1]["series"] # the shared series is stored once
+    assert header["scanlist"][2]["series"] is None
+
+    examination = load_examination(file_path, model)
+    assert examination.scanlist.active_idx == scanlist.active_idx
+    assert all(isinstance(loaded.peek_acquired_data(), np.memmap) for loaded in examination.scanlist.scanlist_elements[:2]) # the series are read when they are accessed
+    for saved, loaded in zip(scanlist.scanlist_elements, examination.scanlist.scanlist_elements, strict=True):
+        assert loaded.name == saved.name
+        assert loaded.scan_item.scan_parameters == saved.scan_item.scan_parameters
+        assert loaded.scan_item.status == saved.scan_item.status
+        if saved.acquired_data is None:
+            assert loaded.acquired_data is None
+        else:
+            assert np.array_equal(loaded.acquired_data, saved.acquired_data)
+    examination.close()
+    scanner.stop_examination()
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from simulator.geometry import BOX_EDGES, ImageGeometry, box_corners_LPS, intersect_box_with_image
+
+
+def _rotation(angles_deg):
+    # Rotation around L, then P, then S
+    rotation = np.eye(3)
+    for axis, angle_rad in enumerate(np.deg2rad(angles_deg)):
+        cos, sin = np.cos(angle_rad), np.sin(angle_rad)
+        other_axes = [other for other in range(3) if other != axis]
+        axis_rotation = np.eye(3)
+        axis_rotation[np.ix_(other_axes, other_axes)] = [[cos, -sin], [sin, cos]]
+        rotation = axis_rotation @ rotation
+    return rotation
+
+
+def _intersect_edge_by_edge(corners_LPS, image_geometry):
+    # Reference: intersect each edge of the box with the plane of the image separately
+    points = []
+    for start, end in corners_LPS[BOX_EDGES]:
+        start_distance, end_distance = np.dot(start - image_geometry.origin_LPS, image_geometry.normal_LPS), np.dot(end - image_geometry.origin_LPS, image_geometry.normal_LPS)
+        if start_distance * end_distance < 0:
+            points.append(image_geometry.LPS_coords_to_pixmap_coords(start + start_distance / (start_distance - end_distance) * (end - start)))
+    return np.array(points).reshape(-1, 2)
+
+
+def _axial_image(offset_mm=0.0):
+    return ImageGeometry({"origin_LPS": (0.0, 0.0, offset_mm), "axisX_LPS": (1.0, 0.0, 0.0), "axisY_LPS": (0.0, 1.0, 0.0), "extentX_mm": 256.0, "extentY_mm": 256.0, "resX_mm": 2.0, "resY_mm": 2.0})
+
+
+@pytest.mark.parametrize("angles_deg", [(0, 0, 0), (20, 0, 0), (15, -30, 0), (10, 25, 40), (-35, 5, 80)])
+def test_batched_intersection_matches_the_edge_by_edge_intersection(angles_deg):
+    corners_LPS = box_corners_LPS(np.array([5.0, -10.0, 3.0]), _rotation(angles_deg), (120.0, 90.0, 40.0))
+    image_geometry = _axial_image(offset_mm=4.0)
+    polygon = intersect_box_with_image(corners_LPS, image_geometry)
+    reference = _intersect_edge_by_edge(corners_LPS, image_geometry)
+    assert len(polygon) == len(reference) >= 3
+    np.testing.assert_allclose(np.array(sorted(map(tuple, polygon))), np.array(sorted(map(tuple, reference))), atol=1e-9)
+    # The corners are ordered around the polygon: the angles around the centroid increase
+    offsets = polygon - polygon.mean(axis=0)
+    assert np.all(np.diff(np.arctan2(offsets[:, 1], offsets[:, 0])) > 0)
+
+
+def test_corners_on_the_plane_are_kept_once():
+    corners_LPS = box_corners_LPS(np.zeros(3), np.eye(3), (100.0, 80.0, 40.0))
+    polygon = intersect_box_with_image(corners_LPS, _axial_image(offset_mm=20.0)) # the top face of the box
+    assert len(polygon) == 4
+    np.testing.assert_allclose(np.array(sorted(map(tuple, polygon))), [(39.0, 44.0), (39.0, 84.0), (89.0, 44.0), (89.0, 84.0)])
+
+
+def test_box_beside_the_plane_does_not_intersect_it():
+    corners_LPS = box_corners_LPS(np.zeros(3), np.eye(3), (100.0, 80.0, 40.0))
+    assert intersect_box_with_image(corners_LPS, _axial_image(offset_mm=50.0)).shape == (0, 2)
+
+
+def test_pixmap_and_LPS_coordinates_convert_back_and_forth():
+    image_geometry = ImageGeometry({"origin_LPS": (3.0, -4.0, 5.0), "axisX_LPS": _rotation((10, 20, 30))[:, 0], "axisY_LPS": _rotation((10, 20, 30))[:, 1], "extentX_mm": 200.0, "extentY_mm": 150.0, "resX_mm": 0.5, "resY_mm": 1.5})
+    pixmap_coords = np.array([[0.0, 0.0], [12.5, 40.0], [400.0, 100.0]])
+    np.testing.assert_allclose(image_geometry.LPS_coords_to_pixmap_coords(image_geometry.pixmap_coords_to_LPS_coords(pixmap_coords)), pixmap_coords, atol=1e-9)
+    np.testing.assert_allclose(image_geometry.LPS_coords_to_pixmap_coords(image_geometry.origin_LPS), (200.0, 50.0))
@@ -0,0 +1,33 @@
+import numpy as np
+
+from simulator.kspace import acquire_kspace, kspace_settings
+from simulator.MRI_data_synthesiser import MRIDataSynthesiser
+
+
+def _signal(model, scan_parameters):
+    # Signal of eight central slices of the model
+    signal_calculator = MRIDataSynthesiser().signal_calculator_factory.create_signal_calculator(scan_parameters)
+    centre = model.PDmap.shape[2] // 2
+    return signal_calculator.calculate_signal(scan_parameters, model)[:, :, centre - 4:centre + 4]
+
+
+def test_full_model_at_full_resolution_is_returned_unchanged(model, scan_parameters):
+    signal = _signal(model, scan_parameters)
+    field_of_view = {"FOVPE_mm": signal.shape[0] * model.resolution_mm[0], "FOVFE_mm": signal.shape[1] * model.resolution_mm[1]}
+    assert kspace_settings({**scan_parameters, **field_of_view}, signal.shape, model.resolution_mm) is None
+    assert acquire_kspace(signal, scan_parameters, model.resolution_mm) is signal
+
+
+def test_small_phase_encoding_field_of_view_folds_the_anatomy_back(model, scan_parameters):
+    signal = _signal(model, scan_parameters)
+    images = acquire_kspace(signal, {**scan_parameters, "FOVPE_mm": signal.shape[0] / 2 * model.resolution_mm[0]}, model.resolution_mm)
+    assert images.shape == (signal.shape[0] // 2,) + signal.shape[1:]
+    np.testing.assert_allclose(images.sum(axis=0), signal.sum(axis=0), rtol=1e-4, atol=1e-4) # every column of the anatomy lands in the field of view
+
+
+def test_matrix_and_partial_fourier_keep_the_grid_of_the_field_of_view(model, scan_parameters):
+    signal = _signal(model, scan_parameters)
+    images = acquire_kspace(signal, {**scan_parameters, "MatrixPE": signal.shape[0] // 2, "MatrixFE": signal.shape[1] // 2, "PartialFourier": 0.6}, model.resolution_mm)
+    assert images.shape == signal.shape
+    assert images.dtype == np.float32
+    assert not np.allclose(images, signal) # lower resolution
@@ -0,0 +1,31 @@
+import numpy as np
+
+from simulator.map_fitting import fit_decay, fit_T1
+from simulator.MRI_data_synthesiser import MRIDataSynthesiser
+
+
+def _central_slab(model):
+    centre = model.PDmap.shape[2] // 2
+    return model.crop((slice(None), slice(None), slice(centre - 4, centre + 4)))
+
+
+def _signal_series(model, scan_parameters_list):
+    signal_calculator = MRIDataSynthesiser().signal_calculator_factory.create_signal_calculator(scan_parameters_list[0])
+    return signal_calculator, np.stack([signal_calculator.calculate_signal(scan_parameters, model) for scan_parameters in scan_parameters_list], axis=-1)
+
+
+def test_T2_fit_recovers_the_T2_map(model, scan_parameters):
+    slab = _central_slab(model)
+    echo_times_ms = (20.0, 40.0, 80.0, 160.0)
+    _, images = _signal_series(slab, [{**scan_parameters, "TE_ms": echo_time_ms} for echo_time_ms in echo_times_ms])
+    tissue = slab.PDmap > 0
+    np.testing.assert_allclose(fit_decay(images, echo_times_ms)[tissue], slab.T2map_ms[tissue], rtol=1e-3)
+    assert np.all(fit_decay(images, echo_times_ms)[~tissue] == 0)
+
+
+def test_T1_fit_recovers_the_T1_map(model, scan_parameters):
+    slab = _central_slab(model)
+    scan_parameters_list = [{**scan_parameters, "ScanTechnique": "IR", "TE_ms": 10.0, "TR_ms": 10000.0, "TI_ms": inversion_time_ms} for inversion_time_ms in (50.0, 200.0, 600.0, 1500.0, 4000.0)]
+    signal_calculator, images = _signal_series(slab, scan_parameters_list)
+    tissue = slab.PDmap > 0
+    np.testing.assert_allclose(fit_T1(images, scan_parameters_list, signal_calculator)[tissue], slab.T1map_ms[tissue], rtol=5e-3)
@@ -0,0 +1,36 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from simulator.model import MAP_ATTRIBUTES
+
+
+@pytest.mark.parametrize("backend", ["shared_memory", "memmap"])
+def test_attached_model_has_read_only_copies_of_the_maps(model, backend, tmp_path):
+    with model.share(backend, directory=tmp_path) as shared_model:
+        descriptor = pickle.loads(pickle.dumps(shared_model.descriptor)) # as sent to a worker process
+        attached = descriptor.attach()
+        for attribute in MAP_ATTRIBUTES:
+            array = getattr(attached, attribute)
+            assert np.array_equal(array, getattr(model, attribute)), attribute
+            assert not array.flags.writeable, attribute
+        del attached, array
+    assert shared_model.closed
+
+
+@pytest.mark.parametrize("backend", ["shared_memory", "memmap"])
+def test_maps_are_released_when_the_shared_model_is_closed(model, backend, tmp_path):
+    shared_model = model.share(backend, directory=tmp_path)
+    descriptor = shared_model.descriptor
+    shared_model.close()
+    shared_model.close() # closing twice has no effect
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(FileNotFoundError):
+        descriptor.attach()
+
+
+def test_invalid_backend_is_rejected(model):
+    with pytest.raises(ValueError):
+        model.share("pickle")
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from simulator.MRI_data_synthesiser import MRIDataSynthesiser
+from simulator.threads import set_worker_threads
+
+
+@pytest.fixture
+def worker_threads():
+    yield set_worker_threads
+    set_worker_threads(-1)
+
+
+def test_same_seed_gives_bit_identical_images_for_any_number_of_threads(model, scan_parameters, worker_threads):
+    scan_parameters["NoiseSeed"] = 1234
+    worker_threads(1)
+    single_threaded = MRIDataSynthesiser().synthesise_MRI_data(scan_parameters, model)
+    worker_threads(4)
+    multi_threaded = MRIDataSynthesiser().synthesise_MRI_data(scan_parameters, model)
+    assert single_threaded.tobytes() == multi_threaded.tobytes()
+
+
+def test_different_seeds_give_different_noise(model, scan_parameters):
+    first = MRIDataSynthesiser().synthesise_MRI_data({**scan_parameters, "NoiseSeed": 1}, model)
+    second = MRIDataSynthesiser().synthesise_MRI_data({**scan_parameters, "NoiseSeed": 2}, model)
+    assert not np.array_equal(first, second)
+
+
+def test_empty_seed_is_derived_from_the_scan_parameters(model, scan_parameters):
+    first = MRIDataSynthesiser().synthesise_MRI_data(scan_parameters, model)
+    second = MRIDataSynthesiser().synthesise_MRI_data(scan_parameters, model)
+    other_echo_time = MRIDataSynthesiser().synthesise_MRI_data({**scan_parameters, "TE_ms": scan_parameters["TE_ms"] + 1}, model)
+    assert np.array_equal(first, second)
+    assert not np.array_equal(first, other_echo_time)
+
+
+def test_more_averages_lower_the_noise(model, scan_parameters):
+    background = model.PDmap == 0
+    noise_levels = [MRIDataSynthesiser().synthesise_MRI_data({**scan_parameters, "NSA": nsa}, model)[background].mean() for nsa in (1, 4)]
+    assert noise_levels[1] == pytest.approx(noise_levels[0] / 2, rel=0.05)
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from simulator.load import load_model, load_model_catalogue
+from simulator.phantom import PHANTOM_TISSUES, SHEPP_LOGAN_ELLIPSOIDS, SHEPP_LOGAN_FOV_MM, ellipsoid_labels, shepp_logan_phantom
+
+
+def test_labels_fill_each_ellipsoid_with_its_tissue():
+    tissue_labels = {tissue: label for label, tissue in enumerate(PHANTOM_TISSUES)}
+    labels = ellipsoid_labels(64, [("scalp", (0.5, 0.25, 0.75), (0.0, 0.0, 0.0), (0.0, 0.0, 0.0)), ("lesion", (0.25, 0.125, 0.25), (0.25, 0.0, 0.0), (0.0, 0.0, 0.0))], tissue_labels)
+    assert labels.shape == (64, 64, 64) and labels.dtype == np.uint8
+    centres = (np.arange(64) + 0.5) / 32 - 1
+    x, y, z = np.meshgrid(centres, centres, centres, indexing="ij")
+    in_scalp = (x / 0.5)**2 + (y / 0.25)**2 + (z / 0.75)**2 <= 1
+    in_lesion = ((x - 0.25) / 0.25)**2 + (y / 0.125)**2 + (z / 0.25)**2 <= 1
+    expected = np.where(in_lesion, tissue_labels["lesion"], np.where(in_scalp, tissue_labels["scalp"], tissue_labels["background"])) # later ellipsoids on top of earlier ones
+    assert np.array_equal(labels, expected)
+
+
+def test_rotated_ellipsoid_matches_its_rotated_equation():
+    labels = ellipsoid_labels(48, [("scalp", (0.8, 0.3, 0.3), (0.0, 0.0, 0.0), (90.0, 0.0, 0.0))], {"scalp": 1})
+    assert np.array_equal(labels, ellipsoid_labels(48, [("scalp", (0.3, 0.8, 0.3), (0.0, 0.0, 0.0), (0.0, 0.0, 0.0))], {"scalp": 1}))
+
+
+@pytest.mark.parametrize("matrix_size", [32, 65])
+def test_phantom_has_the_matrix_size_and_tissues_of_the_catalogue_entry(matrix_size):
+    phantom = shepp_logan_phantom("SheppLogan", {"matrix_size": matrix_size})
+    assert phantom.PDmap.shape == (matrix_size,) * 3
+    assert phantom.resolution_mm == (SHEPP_LOGAN_FOV_MM / matrix_size,) * 3
+    tissue_values = {tuple(values) for values in np.stack([phantom.T1map_ms, phantom.T2map_ms, phantom.T2smap_ms, phantom.PDmap], axis=-1).reshape(-1, 4)}
+    assert tissue_values <= {tuple(np.float32(values)) for values in PHANTOM_TISSUES.values()}
+    assert len(tissue_values) >= len({tissue for tissue, *_ in SHEPP_LOGAN_ELLIPSOIDS}) # every tissue of the ellipsoids shows up
+
+
+def test_catalogue_phantoms_are_loaded_like_models(model):
+    catalogue = load_model_catalogue()
+    assert {"SheppLogan128", "SheppLogan256"} <= catalogue.keys()
+    assert model.PDmap.shape == (128, 128, 128)
+    with pytest.raises(ValueError):
+        load_model("Unknown", {"name": "Unknown", "phantom": "unknown"})
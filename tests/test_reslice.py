@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from simulator import reslice
+from simulator.model import Model
+from simulator.MRI_data_synthesiser import MRIDataSynthesiser
+
+
+def _axial(scan_parameters, thickness_mm, n_slices=1):
+    return {**scan_parameters, "ScanPlane": "Axial", "NSlices": n_slices, "SliceThickness_mm": thickness_mm, "SliceGap_mm": 0.0}
+
+
+def _signal(model, scan_parameters):
+    signal_calculator = MRIDataSynthesiser().signal_calculator_factory.create_signal_calculator(scan_parameters)
+    return signal_calculator, signal_calculator.calculate_signal(scan_parameters, model)
+
+
+def test_axial_slice_through_voxel_centres_images_the_plane_of_the_model(model, scan_parameters):
+    signal_calculator, signal = _signal(model, scan_parameters)
+    plane = {**_axial(scan_parameters, model.resolution_mm[2]), "OffCenterFH_mm": model.resolution_mm[2] / 2} # the centre of the model lies between two voxels
+    slices = reslice.calculate_slices(signal_calculator, plane, model)
+    np.testing.assert_allclose(slices[:, :, 0], signal[:, :, signal.shape[2] // 2], atol=1e-5)
+
+
+def test_angulated_slice_images_the_rotated_plane(model, scan_parameters):
+    # Proton density rises along the first axis of the model, so that the rotation of the slice shows
+    ramp = np.linspace(0.5, 1.5, model.PDmap.shape[0], dtype=np.float32)[:, None, None]
+    model = Model(model.name, model.description, model.T1map_ms, model.T2map_ms, model.T2smap_ms, model.PDmap * ramp, model.resolution_mm)
+    signal_calculator, signal = _signal(model, scan_parameters)
+    plane = {**_axial(scan_parameters, model.resolution_mm[2]), "OffCenterFH_mm": model.resolution_mm[2] / 2, "FHAngle_deg": 90.0}
+    slices = reslice.calculate_slices(signal_calculator, plane, model)
+    np.testing.assert_allclose(slices[:, :, 0], np.rot90(signal[:, :, signal.shape[2] // 2], -1), atol=1e-4)
+
+
+@pytest.mark.parametrize("thickness_voxels", [2, 4, 8])
+def test_thick_slice_is_the_mean_over_its_voxels(model, scan_parameters, thickness_voxels):
+    signal_calculator, signal = _signal(model, scan_parameters)
+    slices = reslice.calculate_slices(signal_calculator, _axial(scan_parameters, thickness_voxels * model.resolution_mm[2]), model)
+    centre = model.PDmap.shape[2] // 2 # the centre of the slice lies on the boundary between voxels centre - 1 and centre
+    expected = signal[:, :, centre - thickness_voxels // 2:centre + thickness_voxels // 2].mean(axis=2)
+    np.testing.assert_allclose(slices[:, :, 0], expected, atol=1e-5)
+
+
+def test_cost_per_pixel_does_not_depend_on_slice_thickness(model, scan_parameters, monkeypatch):
+    sampled_points = []
+
+    def counting_map_coordinates(array, coordinates, **kwargs):
+        sampled_points.append(coordinates[0].size)
+        return map_coordinates(array, coordinates, **kwargs)
+
+    map_coordinates = reslice.map_coordinates
+    monkeypatch.setattr(reslice, "map_coordinates", counting_map_coordinates)
+    signal_calculator = MRIDataSynthesiser().signal_calculator_factory.create_signal_calculator(scan_parameters)
+    points_per_thickness = []
+    for thickness_voxels in (1, 16):
+        sampled_points.clear()
+        reslice.calculate_slices(signal_calculator, _axial(scan_parameters, thickness_voxels * model.resolution_mm[2], n_slices=4), model)
+        points_per_thickness.append(sum(sampled_points))
+    assert points_per_thickness[0] == points_per_thickness[1]
+
+
+def test_slices_outside_the_model_are_zero(model, scan_parameters):
+    images = MRIDataSynthesiser().synthesise_MRI_data({**_axial(scan_parameters, 2.0), "OffCenterFH_mm": 1000.0, "NSA": 1e12}, model)
+    assert images.shape[2] == 1
+    assert np.all(images < 1e-3)
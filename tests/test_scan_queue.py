@@ -0,0 +1,69 @@
+import numpy as np
+
+from simulator.scanlist import ScanItemStatusEnum
+from simulator.scanner import Scanner
+
+
+def test_scan_all_scans_every_ready_item_as_a_single_scan_would(model, scan_parameters):
+    scanner = Scanner()
+    scanner.max_scan_workers = 2
+    scanner.start_examination("Scan all", model)
+    try:
+        for echo_time_ms in (14.0, 30.0):
+            scanner.scanlist.add_scanlist_element(f"TE {echo_time_ms}", {**scan_parameters, "TE_ms": echo_time_ms})
+        scan_queue = scanner.scan_all()
+        list(scan_queue.as_completed())
+        assert scan_queue.done
+
+        for index, scanlist_element in enumerate(scanner.scanlist.scanlist_elements):
+            assert scanlist_element.scan_item.status == ScanItemStatusEnum.COMPLETE
+            queued_data = np.array(scanlist_element.acquired_data)
+            scanlist_element.acquired_data = None
+            scanner.scanlist.active_idx = index
+            scanner.scan()
+            assert np.array_equal(scanlist_element.acquired_data, queued_data) # scanned in a worker process as in this process
+    finally:
+        scanner.stop_examination()
+
+
+def test_results_of_items_edited_while_queued_are_discarded(model, scan_parameters):
+    scanner = Scanner()
+    scanner.max_scan_workers = 2
+    scanner.start_examination("Scan all", model)
+    try:
+        for echo_time_ms in (14.0, 30.0):
+            scanner.scanlist.add_scanlist_element(f"TE {echo_time_ms}", {**scan_parameters, "TE_ms": echo_time_ms})
+        edited, unchanged = scanner.scanlist.scanlist_elements
+        scan_queue = scanner.scan_all()
+        edited.scan_item.validate_scan_parameters({**scan_parameters, "TE_ms": 100.0}) # edited and saved while it is queued
+        list(scan_queue.as_completed())
+
+        assert unchanged.scan_item.status == ScanItemStatusEnum.COMPLETE
+        assert edited.scan_item.status == ScanItemStatusEnum.READY_TO_SCAN
+        assert edited.acquired_data is None
+    finally:
+        scanner.stop_examination()
+
+
+def test_items_edited_before_sharing_a_series_acquired_before_keep_no_series(model, scan_parameters):
+    scanner = Scanner()
+    scanner.max_scan_workers = 1
+    scanner.start_examination("Scan all", model)
+    try:
+        scanner.scanlist.add_scanlist_element("First", dict(scan_parameters))
+        list(scanner.scan_all().as_completed())
+        scanner.scanlist.add_scanlist_element("Same parameters", dict(scan_parameters))
+        first, same = scanner.scanlist.scanlist_elements
+        scan_queue = scanner.scan_all()
+        same.scan_item.validate_scan_parameters({**scan_parameters, "TE_ms": 100.0}) # edited and saved before the results are collected
+        list(scan_queue.as_completed())
+
+        assert same.scan_item.status == ScanItemStatusEnum.READY_TO_SCAN
+        assert same.acquired_data is None
+
+        same.scan_item.validate_scan_parameters(dict(scan_parameters))
+        list(scanner.scan_all().as_completed())
+        assert same.scan_item.status == ScanItemStatusEnum.COMPLETE
+        assert np.array_equal(same.acquired_data, first.acquired_data)
+    finally:
+        scanner.stop_examination()
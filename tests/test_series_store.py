@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from simulator.series_store import SeriesStore
+
+
+def _series(value, n_bytes=4000):
+    return np.full(n_bytes // 4, value, dtype=np.float32)
+
+
+@pytest.fixture
+def series_store(tmp_path):
+    series_store = SeriesStore(memory_budget_bytes=10000, directory=tmp_path)
+    yield series_store
+    series_store.close()
+
+
+def test_least_recently_used_series_are_spilled_to_stay_within_the_budget(series_store):
+    keys = [series_store.put(_series(value)) for value in range(4)]
+    assert series_store.resident_bytes <= series_store.memory_budget_bytes
+    assert isinstance(series_store.peek(keys[0]), np.memmap) # spilled
+    assert not isinstance(series_store.peek(keys[3]), np.memmap)
+    for value, key in enumerate(keys):
+        assert np.array_equal(series_store.get(key), _series(value)) # read back transparently
+        assert series_store.resident_bytes <= series_store.memory_budget_bytes
+
+
+def test_stored_series_are_read_only(series_store):
+    key = series_store.put(_series(1))
+    with pytest.raises(ValueError):
+        series_store.get(key)[0] = 2
+
+
+def test_released_series_no_longer_count_against_the_budget(series_store):
+    keys = [series_store.put(_series(value)) for value in range(2)]
+    series_store.release(keys[0])
+    assert series_store.resident_bytes == _series(1).nbytes
+    with pytest.raises(KeyError):
+        series_store.get(keys[0])
+
+
+def test_close_deletes_the_spilled_series(series_store, tmp_path):
+    for value in range(4):
+        series_store.put(_series(value))
+    assert any(tmp_path.iterdir())
+    series_store.close()
+    series_store.close() # closing twice has no effect
+    assert not any(tmp_path.iterdir())
+    assert series_store.resident_bytes == 0
+
+
+def test_shared_series_is_removed_when_its_last_reference_is_released(series_store):
+    acquisition_key = ("SE", 14.0)
+    key = series_store.put(_series(1), acquisition_key)
+    assert series_store.find(acquisition_key) == key
+    assert series_store.share(key) == key
+    series_store.release(key)
+    assert np.array_equal(series_store.get(key), _series(1)) # still referenced
+    series_store.release(key)
+    assert series_store.find(acquisition_key) is None
+    assert series_store.resident_bytes == 0
+
+
+def test_releasing_a_spilled_series_deletes_its_temporary_file(series_store, tmp_path):
+    keys = [series_store.put(_series(value)) for value in range(4)]
+    assert isinstance(series_store.peek(keys[0]), np.memmap)
+    n_files = len(list(tmp_path.glob("*/*.npy")))
+    series_store.release(keys[0])
+    assert len(list(tmp_path.glob("*/*.npy"))) == n_files - 1
+
+
+def test_series_on_disk_when_stored_are_not_deleted_on_release(series_store, tmp_path):
+    file_path = tmp_path / "examination_series.npy"
+    np.save(file_path, _series(1))
+    key = series_store.put(np.load(file_path, mmap_mode="r"))
+    for value in range(4):
+        series_store.put(_series(value)) # so that the store has a temporary directory
+    series_store.release(key)
+    assert file_path.exists()
+
+
+def test_series_spilled_after_closing_get_a_new_temporary_directory(series_store, tmp_path):
+    for value in range(4):
+        series_store.put(_series(value))
+    series_store.close()
+    keys = [series_store.put(_series(value)) for value in range(4)]
+    for value, key in enumerate(keys):
+        assert np.array_equal(series_store.get(key), _series(value))
@@ -0,0 +1,77 @@
+import gc
+
+import numpy as np
+import pytest
+
+from simulator.echo_train import EchoTrainCalculator
+from simulator.model import Model
+from simulator.MRI_data_synthesiser import MRIDataSynthesiser, available_scan_techniques
+
+
+@pytest.fixture(scope="module")
+def slab(model):
+    '''Four central slices of the model, with the T2* map replaced by the T2 map, so that spin and gradient echo signals can be compared.'''
+    centre = model.PDmap.shape[2] // 2
+    crop = model.crop((slice(None), slice(None), slice(centre - 2, centre + 2)))
+    return Model("Slab", "", crop.T1map_ms, crop.T2map_ms, crop.T2map_ms, crop.PDmap, model.resolution_mm)
+
+
+def _calculate_signal(scan_parameters, model, synthesiser=None):
+    synthesiser = synthesiser or MRIDataSynthesiser()
+    return synthesiser.signal_calculator_factory.create_signal_calculator(scan_parameters).calculate_signal(scan_parameters, model)
+
+
+def test_every_scan_technique_gives_a_finite_non_negative_signal(model, slab, scan_parameters):
+    for scan_technique in available_scan_techniques(model):
+        signal = _calculate_signal({**scan_parameters, "ScanTechnique": scan_technique}, slab)
+        assert signal.shape == slab.PDmap.shape, scan_technique
+        assert np.all(np.isfinite(signal)) and np.all(signal >= 0), scan_technique
+        assert np.all(signal[slab.PDmap == 0] == 0), scan_technique
+
+
+def test_echo_train_matches_single_echo_scans(slab, scan_parameters):
+    echo_times_ms = (10.0, 20.0, 40.0, 80.0)
+    for scan_technique in ("SE", "GE", "TSE"):
+        parameters = {**scan_parameters, "ScanTechnique": scan_technique}
+        signal_calculator = MRIDataSynthesiser().signal_calculator_factory.create_signal_calculator(parameters)
+        echoes = EchoTrainCalculator(signal_calculator, echo_times_ms).calculate_signal(parameters, slab)
+        assert echoes.shape == slab.PDmap.shape + (len(echo_times_ms),)
+        for echo_idx, echo_time_ms in enumerate(echo_times_ms):
+            np.testing.assert_allclose(echoes[..., echo_idx], _calculate_signal({**parameters, "TE_ms": echo_time_ms}, slab), rtol=1e-5, atol=1e-6)
+
+
+def test_bloch_simulation_matches_the_steady_state_signal_equations(slab, scan_parameters):
+    spoiled = {**scan_parameters, "TE_ms": 5.0, "TR_ms": 30.0, "TI_ms": 0.0, "FA_deg": 30.0, "FlipAngleTrain_deg": "", "NPulses": 2000, "RFPhaseIncrement_deg": 0.0, "SpoilingEfficiency": 1.0}
+    np.testing.assert_allclose(_calculate_signal({**spoiled, "ScanTechnique": "Bloch"}, slab), _calculate_signal({**spoiled, "ScanTechnique": "GE"}, slab), atol=1e-5)
+    balanced = {**spoiled, "RFPhaseIncrement_deg": 180.0, "SpoilingEfficiency": 0.0}
+    np.testing.assert_allclose(_calculate_signal({**balanced, "ScanTechnique": "Bloch"}, slab), _calculate_signal({**balanced, "ScanTechnique": "bSSFP"}, slab), atol=1e-4)
+
+
+def test_scan_techniques_share_relaxation_terms(slab, scan_parameters):
+    synthesiser = MRIDataSynthesiser()
+    relaxation_cache = synthesiser.signal_calculator_factory.relaxation_cache
+    _calculate_signal({**scan_parameters, "ScanTechnique": "SE"}, slab, synthesiser)
+    n_bytes = relaxation_cache.n_bytes
+    _calculate_signal({**scan_parameters, "ScanTechnique": "TSE", "EchoTrainLength": 1.0, "EchoSpacing_ms": 0.0}, slab, synthesiser) # exp(-TR / T1) and exp(-TE / T2) as for SE
+    assert relaxation_cache.n_bytes == n_bytes
+
+
+def test_relaxation_terms_are_dropped_with_their_model(slab):
+    relaxation_cache = MRIDataSynthesiser().signal_calculator_factory.relaxation_cache
+    copy = Model("Copy", "", slab.T1map_ms.copy(), slab.T2map_ms.copy(), None, slab.PDmap.copy(), slab.resolution_mm)
+    relaxation_cache.decay(copy, "T1map_ms", 500.0)
+    assert relaxation_cache.n_bytes > 0
+    del copy
+    gc.collect()
+    assert relaxation_cache.n_bytes == 0
+
+
+def test_relaxation_terms_are_shared_between_crops_of_the_same_region(model):
+    relaxation_cache = MRIDataSynthesiser().signal_calculator_factory.relaxation_cache
+    region = (slice(10, 100), slice(20, 90), slice(60, 70))
+    first = relaxation_cache.decay(model.crop(region), "T1map_ms", 500.0)
+    assert relaxation_cache.decay(model.crop(region), "T1map_ms", 500.0) is first
+    mask = model.PDmap[region] > 0
+    masked = relaxation_cache.decay(model.crop(region).crop(mask), "T1map_ms", 500.0)
+    assert relaxation_cache.decay(model.crop(region).crop(mask.copy()), "T1map_ms", 500.0) is masked
+    assert relaxation_cache.decay(model.crop((slice(0, 100), slice(20, 90), slice(60, 70))), "T1map_ms", 500.0) is not first
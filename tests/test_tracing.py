@@ -0,0 +1,80 @@
+import pytest
+
+from events import EventEnum
+from simulator.scanlist import Scanlist
+from tracing import EventTracer, SpanTimer, event_tracer
+
+
+class RecordingObserver:
+    def __init__(self):
+        self.events = []
+
+    def update(self, event, **payload):
+        self.events.append(event)
+
+
+@pytest.fixture
+def tracer():
+    yield event_tracer
+    event_tracer.disable()
+    event_tracer.clear()
+
+
+def test_disabled_tracer_records_nothing(tracer):
+    scanlist = Scanlist()
+    observer = RecordingObserver()
+    scanlist.add_observer(observer)
+    scanlist.add_scanlist_element("SE", {"ScanTechnique": "SE"})
+    assert EventEnum.SCANLIST_ITEM_ADDED in observer.events
+    assert tracer.records == []
+
+
+def test_enabled_tracer_records_every_notification(tracer):
+    scanlist = Scanlist()
+    observer = RecordingObserver()
+    scanlist.add_observer(observer)
+    tracer.enable()
+    scanlist.add_scanlist_element("SE", {"ScanTechnique": "SE"})
+    assert [record.event for record in tracer.records] == observer.events
+    assert all(record.subject == "Scanlist" and record.observer == "RecordingObserver" for record in tracer.records)
+    assert sum(entry["count"] for entry in tracer.summary().values()) == len(observer.events)
+
+
+def test_ring_buffer_keeps_the_most_recent_records():
+    tracer = EventTracer(capacity=2, enabled=True)
+    observer = RecordingObserver()
+    for event in (EventEnum.SCANLIST_ITEM_ADDED, EventEnum.SCANLIST_ITEM_REMOVED, EventEnum.SCAN_ITEM_STATUS_CHANGED):
+        tracer.dispatch(object(), [observer], event)
+    assert [record.event for record in tracer.records] == [EventEnum.SCANLIST_ITEM_REMOVED, EventEnum.SCAN_ITEM_STATUS_CHANGED]
+
+
+def test_disabled_span_timer_records_nothing(tmp_path):
+    span_timer = SpanTimer(log_file_path=tmp_path / "timing.log")
+    with span_timer.span("scan"):
+        with span_timer.span("synthesis"):
+            pass
+    assert span_timer.records == []
+    assert span_timer.breakdown("scan") is None
+    assert span_timer.format_breakdown("scan") == ""
+    span_timer.close()
+    assert not any(tmp_path.iterdir()) # no empty log
+
+
+def test_breakdown_of_the_last_root_span(tmp_path):
+    log_file_path = tmp_path / "logs" / "timing.log"
+    span_timer = SpanTimer(enabled=True, log_file_path=str(log_file_path))
+    for _ in range(2):
+        with span_timer.span("scan"):
+            for stage in ("synthesis", "display", "synthesis"):
+                with span_timer.span(stage):
+                    with span_timer.span("nested"):
+                        pass
+    duration_ms, stages = span_timer.breakdown("scan")
+    assert list(stages) == ["synthesis", "display"] # stages nested directly in the root span, in the order in which they first started
+    assert sum(stages.values()) <= duration_ms
+    assert span_timer.format_breakdown("scan").startswith("Last scan: ")
+    assert [(record.name, record.depth) for record in span_timer.records[:3]] == [("nested", 2), ("synthesis", 1), ("nested", 2)]
+    span_timer.close()
+    log = log_file_path.read_text().splitlines()
+    assert sum(line.split()[-3] == "scan" for line in log if not line.startswith("#")) == 2
+    assert log[-1].startswith("# ") # the summary
@@ -0,0 +1,31 @@
+from simulator.scanlist import ScanItem, ScanItemStatusEnum
+from simulator.validation import load_validator, parse_float_list
+
+
+def test_default_scan_parameters_are_valid(scan_parameters):
+    assert load_validator().validate(scan_parameters) == {}
+
+
+def test_all_messages_are_returned_in_one_pass(scan_parameters):
+    scan_parameters.update({"TE_ms": 1000.0, "TR_ms": 500.0, "FA_deg": "ninety", "TI_ms": -1, "NSA": -1, "EchoTimes_ms": "10, 600"})
+    messages = load_validator().validate(scan_parameters)
+    assert messages.keys() == {"TE_ms", "FA_deg", "TI_ms", "NSA", "EchoTimes_ms"}
+
+
+def test_invalid_scan_item_keeps_the_messages(scan_parameters):
+    scan_item = ScanItem("SE", scan_parameters)
+    scan_item.validate_scan_parameters({**scan_parameters, "FA_deg": 270.0})
+    assert scan_item.status == ScanItemStatusEnum.INVALID
+    assert not scan_item.valid
+    assert scan_item.messages.keys() == {"FA_deg"}
+
+
+def test_echo_times_are_checked_elementwise(scan_parameters):
+    validator = load_validator()
+    assert "EchoTimes_ms" not in validator.validate({**scan_parameters, "EchoTimes_ms": "10, 20 40"})
+    assert "EchoTimes_ms" in validator.validate({**scan_parameters, "EchoTimes_ms": "10, -20"})
+
+
+def test_parse_float_list():
+    assert parse_float_list("10, 20 ,40") == (10.0, 20.0, 40.0)
+    assert parse_float_list(5) == (5.0,)
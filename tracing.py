@@ -0,0 +1,218 @@
+import os
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager, nullcontext
+
+EventTraceRecord = namedtuple("EventTraceRecord", ["timestamp", "event", "subject", "observer", "duration_ms"])
+EventTraceRecord.__doc__ = '''A single traced observer notification. The subject and observer are stored as class names so that tracing does not keep them alive and does not need to format their reprs.'''
+
+class EventTracer:
+    '''
+    Records the notifications sent by subjects (e.g., the scanlist and scan items) to their observers. For each notification the event, the subject, the observer and the time the observer took to handle the event are recorded in a ring buffer, which holds the most recent records only. 
+
+    Tracing is disabled by default. Subjects check the enabled attribute before dispatching an event, so when tracing is disabled the only cost is a single attribute lookup per dispatch. Tracing can be enabled in code with enable() or at start-up by setting the environment variable EDUMRISIM_TRACE_EVENTS to 1.'''
+
+    def __init__(self, capacity=1000, enabled=False):
+        self.enabled = enabled
+        self._records = deque(maxlen=capacity)
+
+    @property
+    def capacity(self):
+        return self._records.maxlen
+
+    def enable(self, capacity=None):
+        if capacity is not None and capacity != self.capacity:
+            self._records = deque(self._records, maxlen=capacity)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self._records.clear()
+
+    def dispatch(self, subject, observers, event, *args, **kwargs):
+        '''Notify each observer of the event and record how long each observer took to handle it.'''
+        subject_name = type(subject).__name__
+        for observer in observers:
+            start = time.perf_counter()
+            observer.update(event, *args, **kwargs)
+            duration_ms = (time.perf_counter() - start) * 1000
+            self._records.append(EventTraceRecord(time.time(), event, subject_name, type(observer).__name__, duration_ms))
+
+    @property
+    def records(self):
+        return list(self._records)
+
+    def summary(self):
+        '''
+        Summarise the recorded notifications per observer and event.
+
+        Returns:
+        dict: Maps (observer, event) tuples to dicts with the number of notifications and the total and maximum handling time in milliseconds, sorted by total handling time (slowest first).
+        '''
+        summary = {}
+        for record in self._records:
+            entry = summary.setdefault((record.observer, record.event), {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += record.duration_ms
+            entry["max_ms"] = max(entry["max_ms"], record.duration_ms)
+        return dict(sorted(summary.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+    def dump(self, file=None):
+        '''Write the recorded notifications, followed by the per observer summary, to file (default: stderr).'''
+        file = sys.stderr if file is None else file
+        for record in self._records:
+            file.write(f"{record.timestamp:.6f} {record.subject} -> {record.observer} {record.event.name} {record.duration_ms:.3f} ms\n")
+        for (observer, event), entry in self.summary().items():
+            file.write(f"{observer} {event.name}: {entry['count']} notifications, {entry['total_ms']:.3f} ms total, {entry['max_ms']:.3f} ms max\n")
+
+event_tracer = EventTracer(enabled=os.environ.get("EDUMRISIM_TRACE_EVENTS") == "1") # Shared by all subjects of the observer system.
+
+
+SpanRecord = namedtuple("SpanRecord", ["timestamp", "name", "depth", "duration_ms"])
+SpanRecord.__doc__ = '''A single timed span. The depth is the number of spans the span was nested in; spans at depth 0 are root spans.'''
+
+_NO_SPAN = nullcontext() # Returned by SpanTimer.span() when timing is disabled. nullcontext is reentrant, so one instance serves all spans.
+
+class SpanTimer:
+    '''
+    Times the stages of the hot paths of the application, e.g., a scan: the synthesis of the data, the scaling of the acquired series, observer dispatch, the windowing statistics and the conversion of the displayed slice. Each stage is wrapped in a span:
+
+        with span_timer.span("synthesis"):
+            ...
+
+    Spans can be nested. Each finished span is recorded in a ring buffer, which holds the most recent records only. When a root span finishes, it is kept together with the spans nested in it, so that breakdown() can report how the time of, e.g., the last scan was spent, and it is appended to the timing log of the session if a log file path is set.
+
+    Timing is disabled by default. span() then returns a shared no-op context manager, so the only cost is a method call and an attribute lookup per span. Timing can be enabled in code with enable() or at start-up by setting the environment variable EDUMRISIM_TRACE_SPANS to 1; the timing log is then written to EDUMRISIM_TIMING_LOG, or to timing_logs/session_<date>-<time>.log if that is not set. Spans are nested per thread.'''
+
+    def __init__(self, capacity=1000, enabled=False, log_file_path=None):
+        self.enabled = enabled
+        self.log_file_path = log_file_path
+        self._records = deque(maxlen=capacity)
+        self._local = threading.local() # the open spans of each thread
+        self._last_spans = {} # Name of a root span -> its records and those nested in it, in the order in which they started, of its last run
+        self._log_file = None
+        self._log_lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return self._records.maxlen
+
+    def enable(self, capacity=None, log_file_path=None):
+        if capacity is not None and capacity != self.capacity:
+            self._records = deque(self._records, maxlen=capacity)
+        if log_file_path is not None:
+            self.log_file_path = log_file_path
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self._records.clear()
+        self._last_spans.clear()
+
+    def span(self, name):
+        '''Return a context manager that times the block it wraps as a span called name.'''
+        if not self.enabled:
+            return _NO_SPAN
+        return self._span(name)
+
+    @contextmanager
+    def _span(self, name):
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth == 0:
+            local.spans = []
+        spans = local.spans
+        span_idx = len(spans)
+        spans.append(None) # reserved, so that the spans are in the order in which they started
+        local.depth = depth + 1
+        timestamp = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = SpanRecord(timestamp, name, depth, (time.perf_counter() - start) * 1000)
+            spans[span_idx] = record
+            self._records.append(record)
+            local.depth = depth
+            if depth == 0:
+                self._last_spans[name] = spans
+                self._write_log(spans)
+
+    @property
+    def records(self):
+        return list(self._records)
+
+    def breakdown(self, name):
+        '''
+        Break down the last run of the root span called name into its stages.
+
+        Returns:
+        tuple: (duration of the span in ms, dict that maps the names of the spans nested directly in it to their total duration in ms, in the order in which they first started), or None if no such span has finished.
+        '''
+        spans = self._last_spans.get(name)
+        if spans is None:
+            return None
+        stages = {}
+        for record in spans[1:]:
+            if record is not None and record.depth == 1:
+                stages[record.name] = stages.get(record.name, 0.0) + record.duration_ms
+        return spans[0].duration_ms, stages
+
+    def format_breakdown(self, name):
+        '''Return the breakdown of the last run of the root span called name as a single line, e.g., for a status bar, or an empty string if no such span has finished.'''
+        breakdown = self.breakdown(name)
+        if breakdown is None:
+            return ""
+        duration_ms, stages = breakdown
+        other_ms = duration_ms - sum(stages.values())
+        stage_texts = [f"{stage} {stage_ms:.0f} ms" for stage, stage_ms in stages.items()] + ([f"other {other_ms:.0f} ms"] if stages else [])
+        return f"Last {name}: {duration_ms:.0f} ms" + (f" ({', '.join(stage_texts)})" if stage_texts else "")
+
+    def summary(self):
+        '''
+        Summarise the recorded spans per name.
+
+        Returns:
+        dict: Maps span names to dicts with the number of spans and their total and maximum duration in milliseconds, sorted by total duration (slowest first).
+        '''
+        summary = {}
+        for record in self._records:
+            entry = summary.setdefault(record.name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += record.duration_ms
+            entry["max_ms"] = max(entry["max_ms"], record.duration_ms)
+        return dict(sorted(summary.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+    def _write_log(self, spans):
+        # Append a finished root span and the spans nested in it to the timing log, indented by depth. The log file is created when the first span finishes, so sessions without spans leave no empty logs behind.
+        if self.log_file_path is None:
+            return
+        with self._log_lock:
+            if self._log_file is None:
+                log_dir = os.path.dirname(self.log_file_path)
+                if log_dir:
+                    os.makedirs(log_dir, exist_ok=True)
+                self._log_file = open(self.log_file_path, "a", buffering=1)
+                self._log_file.write(f"# Session started {time.strftime('%Y-%m-%d %H:%M:%S')}, process {os.getpid()}\n")
+            for record in spans:
+                if record is not None:
+                    self._log_file.write(f"{record.timestamp:.6f} {'  ' * record.depth}{record.name} {record.duration_ms:.3f} ms\n")
+
+    def close(self):
+        '''Append the per name summary to the timing log and close it.'''
+        with self._log_lock:
+            if self._log_file is None:
+                return
+            for name, entry in self.summary().items():
+                self._log_file.write(f"# {name}: {entry['count']} spans, {entry['total_ms']:.3f} ms total, {entry['max_ms']:.3f} ms max\n")
+            self._log_file.close()
+            self._log_file = None
+
+_spans_enabled = os.environ.get("EDUMRISIM_TRACE_SPANS") == "1"
+span_timer = SpanTimer(enabled=_spans_enabled, log_file_path=os.environ.get("EDUMRISIM_TIMING_LOG") or (time.strftime("timing_logs/session_%Y%m%d-%H%M%S.log") if _spans_enabled else None)) # Shared by the hot paths of the application
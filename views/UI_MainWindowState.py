@@ -17,6 +17,7 @@ class ExamState(UI_MainWindowState):
         context.addScanItemButton.setEnabled(True)
         context.startScanButton.setEnabled(False)
         context.stopScanButton.setEnabled(False)
+        context.scanAllButton.setEnabled(True)
         context.parameterFormLayout.setReadOnly(True)
         context.scanParametersCancelChangesButton.setEnabled(False) 
         context.scanParametersSaveChangesButton.setEnabled(False)
@@ -41,6 +42,7 @@ class BeingModifiedState(ExamState):
         context.addScanItemButton.setEnabled(False)
         context.startScanButton.setEnabled(False)
         context.stopScanButton.setEnabled(False)
+        context.scanAllButton.setEnabled(False)
         context.parameterFormLayout.setReadOnly(False)
         context.scanParametersCancelChangesButton.setEnabled(True)
         context.scanParametersResetButton.setEnabled(True) 
@@ -71,6 +73,7 @@ class IdleState(UI_MainWindowState):
         context.addScanItemButton.setVisible(False)
         context.startScanButton.setEnabled(False)
         context.stopScanButton.setEnabled(False)
+        context.scanAllButton.setEnabled(False)
         context.parameterFormLayout.setReadOnly(True)
         context.parameterFormLayout.clearForm() 
         context.scanParametersCancelChangesButton.setEnabled(False) 
@@ -80,7 +83,6 @@ class IdleState(UI_MainWindowState):
 
 class MRIfortheBrainState(UI_MainWindowState):
     def update_UI(self, context) -> None:
-        context.loadExaminationButton.setVisible(False)
         context.stopScanButton.setVisible(False)
         context.scanningModeButton.setVisible(False)
         context.viewingModeButton.setVisible(False)
\ No newline at end of file
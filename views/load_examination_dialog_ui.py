@@ -1,6 +1,57 @@
-from PyQt5.QtWidgets import  QDialog
+from PyQt5.QtWidgets import  QDialog, QFileDialog, QFormLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QVBoxLayout
 
 class LoadExaminationDialog(QDialog):
     def __init__(self):
         super().__init__()
-        self.setWindowTitle("Load examination")
\ No newline at end of file
+        self.setWindowTitle("Load examination")
+        self.layout = QVBoxLayout()
+
+        self._createExamFileForm()
+        self._loadExaminationOkButton = QPushButton("OK")
+        self._loadExaminationCancelButton = QPushButton("Cancel")
+
+        self.layout.addLayout(self.examFileForm)
+
+        horizontal_layout = QHBoxLayout()
+        horizontal_layout.addWidget(self._loadExaminationOkButton)
+        horizontal_layout.addWidget(self._loadExaminationCancelButton)
+        self.layout.addLayout(horizontal_layout)
+
+        self.setLayout(self.layout)
+
+        # remove help button hint from dialog
+        self.setWindowFlag(0x00040000) # Qt::WindowContextHelpButtonHint = 0x00040000
+
+        self._browseButton.clicked.connect(self.browse)
+
+    @property
+    def loadExaminationOkButton(self):
+        return self._loadExaminationOkButton
+
+    @property
+    def loadExaminationCancelButton(self):
+        return self._loadExaminationCancelButton
+
+    @property
+    def examFileLineEdit(self):
+        return self._examFileLineEdit
+
+    @property
+    def examinationInfoLabel(self):
+        return self._examinationInfoLabel
+
+    def _createExamFileForm(self):
+        self.examFileForm = QFormLayout()
+        horizontal_layout = QHBoxLayout()
+        self._examFileLineEdit = QLineEdit()
+        self._browseButton = QPushButton("Browse")
+        horizontal_layout.addWidget(self._examFileLineEdit)
+        horizontal_layout.addWidget(self._browseButton)
+        self.examFileForm.addRow("Examination file:", horizontal_layout)
+        self._examinationInfoLabel = QLabel() # Shows the name, model and number of scan items of the selected examination
+        self.examFileForm.addRow(self._examinationInfoLabel)
+
+    def browse(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Load examination", self._examFileLineEdit.text(), "Examinations (*.exam)")
+        if file_path:
+            self._examFileLineEdit.setText(file_path)
@@ -2,7 +2,7 @@ from PyQt5.QtCore import Qt, QObject, pyqtSignal, QPoint, QPointF
 from PyQt5.QtWidgets import   (QComboBox, QFormLayout, QFrame, QGraphicsScene, QGraphicsView, QGraphicsPixmapItem, QGridLayout, QHBoxLayout, QLabel,
                              QLineEdit, QListView, QListWidget, QListWidgetItem, QMainWindow, QProgressBar, QPushButton, QSizePolicy,
                              QStackedLayout, QTabWidget, QVBoxLayout, QWidget, QSpacerItem, QGraphicsTextItem, QMenu, QAction, QScrollArea)
-from PyQt5.QtGui import QContextMenuEvent, QPainter, QPixmap, QImage, QResizeEvent, QColor, QDragEnterEvent, QDragMoveEvent, QDropEvent, QFont, QIcon
+from PyQt5.QtGui import QContextMenuEvent, QPainter, QPixmap, QImage, QResizeEvent, QColor, QDragEnterEvent, QDragMoveEvent, QDropEvent, QFont, QIcon, QTransform
 
 import numpy as np
 
@@ -12,6 +12,7 @@ from views.UI_MainWindowState import IdleState
 from views.styled_widgets import SegmentedButtonFrame, SegmentedButton, PrimaryActionButton, SecondaryActionButton, TertiaryActionButton, DestructiveActionButton, InfoFrame, HeaderLabel
 
 from events import EventEnum
+from tracing import span_timer
 
 @contextmanager
 def block_signals(widgets):
@@ -94,6 +95,10 @@ class Ui_MainWindow(QMainWindow):
     def viewModelButton(self):
         return self._examinationInfoFrame.section2_view_button
     
+    @property
+    def saveExaminationButton(self):
+        return self._examinationInfoFrame.section1_save_button
+
     @property
     def stopExaminationButton(self):
         return self._examinationInfoFrame.section1_stop_button
@@ -118,6 +123,10 @@ class Ui_MainWindow(QMainWindow):
     def stopScanButton(self):
         return self._scanProgressInfoFrame.stopScanButton
 
+    @property
+    def scanAllButton(self):
+        return self._scanProgressInfoFrame.scanAllButton
+
     @property
     def editingStackedLayout(self):
         return self._editingStackedLayout 
@@ -141,6 +150,10 @@ class Ui_MainWindow(QMainWindow):
     @property
     def examCardListView(self):
         return self._examCardTab.examCardListView
+
+    @property
+    def examCardSearchLineEdit(self):
+        return self._examCardTab.examCardSearchLineEdit
     
     @property
     def scannedImageFrame(self):
@@ -293,16 +306,18 @@ class ScanlistInfoFrame(QFrame):
     def scanlistListWidget(self):
         return self._scanlistListWidget
 
-class ScanlistListWidget(QListWidget):
+class ScanlistListWidget(QListView):
+    '''Displays the scanlist. The rows are provided by a ScanlistModel (see views/qmodels.py), which is set by the controller when an examination is started.'''
     dropEventSignal = pyqtSignal(list)
-    itemDeletedSignal = pyqtSignal(QListWidgetItem)
-    itemDuplicatedSignal = pyqtSignal(QListWidgetItem)
+    itemDeletedSignal = pyqtSignal(int)
+    itemDuplicatedSignal = pyqtSignal(int)
+    fitMapSignal = pyqtSignal(int, str) # row, and "T1" or "T2" (see simulator.map_fitting)
     def __init__(self):
         super().__init__()
         self.setStyleSheet("border: none;")
         self.hover_color = "#e5f3ff"
         self.setStyleSheet(f"""
-            QListWidget::item:hover {{
+            QListView::item:hover {{
                 background-color: {self.hover_color}; /* Set the hover color */
             }}
         """)
@@ -312,18 +327,10 @@ class ScanlistListWidget(QListWidget):
         #self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu) # Enable the custom context menu
         #self.customContextMenuRequested.connect(self.showContextMenu) # Connect the customContextMenuRequested signal to the showContextMenu method
 
-    # def mousePressEvent(self, event):
-    #     if event.button() == Qt.MouseButton.RightButton:
-    #         item = self.itemAt(event.pos())
-    #         if item is not None:
-    #             print("item is not None")
-    #             brush = item.background()
-    #             color = brush.color()
-    #             print(color.name())
-    #             item.setBackground(QColor(self.hover_color))
-    #         self.showContextMenu(event.pos())
-    #     else:
-    #         super().mousePressEvent(event)    
+    def clear(self):
+        # Remove all rows from the view by detaching the scanlist from the model.
+        if self.model() is not None:
+            self.model().set_scanlist(None)
 
     def keyPressEvent(self, event):
         # Check if the pressed key is Up or Down
@@ -335,10 +342,10 @@ class ScanlistListWidget(QListWidget):
             super().keyPressEvent(event)
 
     def mouseDoubleClickEvent(self, event):
-        item = self.itemAt(event.pos())
-        if item is not None:
-            self.setCurrentItem(item)
-            self.itemDoubleClicked.emit(item)  # Manually emit the itemDoubleClicked signal
+        index = self.indexAt(event.pos())
+        if index.isValid():
+            self.setCurrentIndex(index)
+            self.doubleClicked.emit(index)  # Manually emit the doubleClicked signal
 
     def dragEnterEvent(self, e: QDragEnterEvent) -> None:
         e.accept()
@@ -353,9 +360,7 @@ class ScanlistListWidget(QListWidget):
         if widget == self:
             # get index of the item that is being dragged
             index = widget.currentIndex()
-            # get list item corresponding to the index
-            item = widget.itemFromIndex(index)
-            self.itemDuplicatedSignal.emit(item)
+            self.itemDuplicatedSignal.emit(index.row())
         else:    
             selected_indexes = widget.selectedIndexes()
             self.dropEventSignal.emit(selected_indexes)
@@ -363,10 +368,10 @@ class ScanlistListWidget(QListWidget):
 
     def contextMenuEvent(self, event : QContextMenuEvent):
         pos = event.pos()
-        item = self.itemAt(pos) 
-        if item is not None:
+        index = self.indexAt(pos) 
+        if index.isValid():
 
-            self.itemClicked.emit(item) # Manually emit the itemClicked signal. This is so that the right clicked item will become the active scan item. 
+            self.clicked.emit(index) # Manually emit the clicked signal. This is so that the right clicked item will become the active scan item. 
 
             menu = QMenu()
 
@@ -390,36 +395,27 @@ class ScanlistListWidget(QListWidget):
             menu.addAction(duplicate_action)
             menu.addAction(delete_action)
 
+            # Relaxation-time maps are fitted to this scan item and the complete scan items that only differ from it in TE, or in TI, TR and flip angle (see simulator.map_fitting)
+            menu.addSeparator()
+            fit_T1_action = menu.addAction("Fit T1 map")
+            fit_T2_action = menu.addAction("Fit T2/T2* map")
+            fit_T1_action.triggered.connect(lambda: self.fitMapSignal.emit(index.row(), "T1"))
+            fit_T2_action.triggered.connect(lambda: self.fitMapSignal.emit(index.row(), "T2"))
+
            # Connect the actions to their respective slots
-            rename_action.triggered.connect(lambda: self.renameItem(item))
-            duplicate_action.triggered.connect(lambda: self.itemDuplicatedSignal.emit(item))
-            delete_action.triggered.connect(lambda: self.deleteItem(item))
+            rename_action.triggered.connect(lambda: self.renameItem(index))
+            duplicate_action.triggered.connect(lambda: self.itemDuplicatedSignal.emit(index.row()))
+            delete_action.triggered.connect(lambda: self.deleteItem(index))
 
             # Show the context menu at the specified position
             menu.exec_(self.viewport().mapToGlobal(pos))
 
-            # set background color to white
-            item.setBackground(QColor("white"))
-
-
-
-    def renameItem(self, item):
-        item.setFlags(item.flags() | Qt.ItemIsEditable)
-        self.editItem(item)
-
-
-    def deleteItem(self, item):
-        # remove the item from the list widget
-        self.itemDeletedSignal.emit(item)
-        self.takeItem(self.row(item))
-
-
-    # def duplicateItem(self, item, menu):
-    #     print("duplicate action clicked on menu")
-    #     # exit the menu
-    #     menu.close()
-    #     self.itemDuplicatedSignal.emit(item)
+    def renameItem(self, index):
+        self.edit(index)
 
+    def deleteItem(self, index):
+        # The row is removed from the view by the model once the scanlist element has been removed from the scanlist.
+        self.itemDeletedSignal.emit(index.row())
 
 
 class ScanProgressInfoFrame(QFrame):
@@ -448,6 +444,10 @@ class ScanProgressInfoFrame(QFrame):
     @property
     def stopScanButton(self):
         return self._stopScanButton
+
+    @property
+    def scanAllButton(self):
+        return self._scanAllButton
  
     def _createProgressBar(self):
         scanProgressBarLayout = QHBoxLayout()   
@@ -476,6 +476,9 @@ class ScanProgressInfoFrame(QFrame):
         
         self._startScanButton = SecondaryActionButton("Start Scan")
         scanButtonsLayout.addWidget(self._startScanButton)
+
+        self._scanAllButton = SecondaryActionButton("Scan All") # Scans every scan item that is ready to scan
+        scanButtonsLayout.addWidget(self._scanAllButton)
         
         self._stopScanButton = DestructiveActionButton("Stop Scan")
         scanButtonsLayout.addWidget(self._stopScanButton)
@@ -547,7 +550,12 @@ class ExamCardTab(QWidget):
         super().__init__()
         self.layout = QVBoxLayout()
         self.setLayout(self.layout)
+        self._examCardSearchLineEdit = QLineEdit()
+        self._examCardSearchLineEdit.setPlaceholderText("Search exam cards")
+        self._examCardSearchLineEdit.setClearButtonEnabled(True)
+        self.layout.addWidget(self._examCardSearchLineEdit)
         self._examCardListView = QListView()
+        self._examCardListView.setUniformItemSizes(True) # lets the view lay out long lists without measuring every row
         self._examCardListView.setDragDropMode(QListView.DragOnly)
         self._examCardListView.setSelectionMode(QListView.ExtendedSelection)
         self._examCardListView.setEditTriggers(QListView.NoEditTriggers) #This is a flag provided by PyQt, which is used to specify that no editing actions should trigger item editing in the list view. It essentially disables editing for the list view, preventing users from directly editing the items displayed in the list.
@@ -557,6 +565,10 @@ class ExamCardTab(QWidget):
     def examCardListView(self):
         return self._examCardListView
 
+    @property
+    def examCardSearchLineEdit(self):
+        return self._examCardSearchLineEdit
+
 class ScanParametersTabWidget(QTabWidget):
     def __init__(self):
         super().__init__()
@@ -595,11 +607,15 @@ class ParameterTab(QScrollArea):
     
 class ParameterFormLayout(QVBoxLayout):
     formActivatedSignal = pyqtSignal()
+    invalid_editor_style_sheet = "border: 1px solid #d9534f;"
 
     def __init__(self):
         super().__init__()
         self.isReadOnly = True
         self.editors = {}
+        self.default_values = {} # Values the editors show when a scan item does not have the parameter, e.g., because its exam card predates the parameter
+        self.validator = None # Validates the parameters in the form as they are edited (see simulator.validation). The form is not validated if it is None.
+        self._invalid_keys = set() # Keys of the parameters whose editors are highlighted as invalid
 
     def createForm(self, parameters : dict) -> None:
         # Create form elements based on the data in "parameters".
@@ -620,6 +636,7 @@ class ParameterFormLayout(QVBoxLayout):
                 parameter_layout.addWidget(editor, 1, 0, Qt.AlignLeft)
                 parameter_layout.addWidget(HeaderLabel(unit), 1, 1, Qt.AlignLeft)
                 editor.textChanged.connect(lambda: self.formActivatedSignal.emit())
+                editor.textChanged.connect(self.show_validation_messages)
             elif editor_type == "QComboBox":
                 editor = QComboBox()
                 editor.addItems(default_value)
@@ -627,6 +644,7 @@ class ParameterFormLayout(QVBoxLayout):
                 parameter_layout.addWidget(QLabel(name), 0, 0, Qt.AlignLeft)
                 parameter_layout.addWidget(editor, 1, 0, Qt.AlignLeft)
                 editor.currentIndexChanged.connect(lambda: self.formActivatedSignal.emit())
+                editor.currentIndexChanged.connect(self.show_validation_messages)
             else:
                 raise ValueError(f"Unknown editor type: {editor_type}") # Raise an error if the editor type is unknown. If the error is raised, the program will stop executing. 
             
@@ -644,6 +662,7 @@ class ParameterFormLayout(QVBoxLayout):
 
             # Store the editor widget in the dictionary for later access.
             self.editors[parameter_key] = editor
+            self.default_values[parameter_key] = default_value if editor_type == "QLineEdit" else default_value[0]
 
     def get_parameters(self):
         # Create a dictionary to store the current values of the editor widgets.
@@ -672,6 +691,18 @@ class ParameterFormLayout(QVBoxLayout):
                         index = editor.findText(str(value))
                         if index != -1:
                             editor.setCurrentIndex(index)        
+        self.show_validation_messages()
+
+    def show_validation_messages(self):
+        # Highlight the editors of invalid parameters and show the reason in their tooltips. Only editors whose validity changed are restyled, so this can run on every keystroke.
+        if self.validator is None:
+            return
+        messages = self.validator.validate(self.get_parameters()) if not self.isReadOnly else {}
+        for key in self._invalid_keys.union(messages):
+            if key in self.editors:
+                self.editors[key].setStyleSheet(self.invalid_editor_style_sheet if key in messages else "")
+                self.editors[key].setToolTip(messages.get(key, ""))
+        self._invalid_keys = set(messages)
 
     def setReadOnly(self, bool : bool):
         for editor in self.editors.values():
@@ -680,6 +711,7 @@ class ParameterFormLayout(QVBoxLayout):
             if isinstance(editor, (QComboBox)):
                 editor.setEnabled(not bool)
         self.isReadOnly = bool
+        self.show_validation_messages()
 
     def setScanTechniqueComboBox(self, scan_techniques):
         with block_signals(self.editors.values()):
@@ -693,6 +725,7 @@ class ParameterFormLayout(QVBoxLayout):
                     editor.clear()
                 elif isinstance(editor, QComboBox):
                     editor.setCurrentIndex(0)
+        self.show_validation_messages()
 """ 
 class CustomPolygonItem(QGraphicsPolygonItem):        
     '''Represents the intersection of the scan volume with the image in the viewer as a polygon. The polygon is movable and sends an update to the observers when it has been moved. '''
@@ -1265,10 +1298,14 @@ class ImageLabel(QGraphicsView):
         # Initialize array attribute to None
         self.array = None
         self._current_slice = None
+        self._current_echo = 0 # Displayed echo of an echo stack, i.e., an array with the echoes along a fourth axis
 
         self._window_width = None
         self._window_level = None
 
+        # Stride with which the displayed slice is sampled (see _calculate_display_stride). A stride of 1 means the slice is displayed at full resolution.
+        self._display_stride = 1
+
         self.observers = []
 
         self.middle_mouse_button_pressed = False
@@ -1309,6 +1346,7 @@ class ImageLabel(QGraphicsView):
             self._displaying = False
             self.array = None
             self.current_slice = None
+            self.current_echo = 0
             self.window_width = None
             self.window_level = None
             self.text_item.setPlainText("")
@@ -1323,6 +1361,24 @@ class ImageLabel(QGraphicsView):
     def current_slice(self, value):
         self._current_slice = value
 
+    @property
+    def current_echo(self):
+        return self._current_echo
+
+    @current_echo.setter
+    def current_echo(self, value):
+        self._current_echo = value
+
+    @property
+    def displayed_volume(self):
+        # The slices of the displayed echo. The array itself if it is not an echo stack.
+        if self.array.ndim == 3:
+            return self.array
+        return self.array[:, :, :, self.current_echo]
+
+    def _displayed_echo_count(self):
+        return 1 if self.array.ndim == 3 else self.array.shape[3]
+
     @property
     def window_width(self):
         return self._window_width
@@ -1344,11 +1400,14 @@ class ImageLabel(QGraphicsView):
         self._window_level = window_level
         self.notify_observers(window_width, window_level)
 
-    # This method is called whenever the graphics view is resized. It ensures that the image is always scaled to fit the view.
+    # This method is called whenever the graphics view is resized. It ensures that the image is always scaled to fit the view. If the on-screen size of the image changed enough to require a different sampling stride, the slice is rendered again at the new resolution.
     def resizeEvent(self, event: QResizeEvent):
         super().resizeEvent(event)
-        self.fitInView(self.sceneRect(), Qt.KeepAspectRatio)
-        self.reposition_items()
+        if self.displaying == True and self._display_stride != self._calculate_display_stride(self.array.shape[0], self.array.shape[1]):
+            self.displayArray()
+        else:
+            self.fitInView(self.sceneRect(), Qt.KeepAspectRatio)
+            self.reposition_items()
 
     # overriden method from QGraphicsView. QGraphicsView has inherited QWidget's wheelEvent method. QGraphicsView is a child of QWidget. 
     def wheelEvent(self, event):
@@ -1357,7 +1416,10 @@ class ImageLabel(QGraphicsView):
             # Do nothing and return
             return
 
-        delta = event.angleDelta().y() 
+        delta = event.angleDelta().y() or event.angleDelta().x() # some platforms turn the wheel into a horizontal one while Shift is held
+        if event.modifiers() & Qt.ShiftModifier and self._displayed_echo_count() > 1: # Shift + wheel steps through the echoes of an echo stack
+            self.current_echo = int(max(0, min(self.current_echo + (delta > 0) - (delta < 0), self._displayed_echo_count() - 1)))
+            delta = 0
         current_slice = getattr(self, 'current_slice', 0)
         if delta > 0:
             new_slice = max(0, min(current_slice + 1, self.array.shape[2] - 1))
@@ -1369,12 +1431,12 @@ class ImageLabel(QGraphicsView):
         self.displayArray()
 
         if self.pixmap_item.isUnderMouse():
-            pixmap_coords = self.pixmap_item.mapFromScene(self.mapToScene(event.pos()))
-            x = int(pixmap_coords.x())
-            y = int(pixmap_coords.y())
-            # check if the pixmap coordinates are within the image array
+            scene_coords = self.mapToScene(event.pos()) # scene coordinates are in units of array pixels, also when the pixmap is displayed at a reduced resolution
+            x = int(scene_coords.x())
+            y = int(scene_coords.y())
+            # check if the scene coordinates are within the image array
             if 0 <= x < self.array.shape[1] and 0 <= y < self.array.shape[0]:
-                signal_value = self.array[y, x, self.current_slice]
+                signal_value = self.displayed_volume[y, x, self.current_slice]
                 self.update_signal_value_text_item(f"{signal_value:.1f}")
             else:
                 self.update_signal_value_text_item("")
@@ -1408,26 +1470,41 @@ class ImageLabel(QGraphicsView):
         if array is not None:
             self.displaying = True
             self.current_slice = array.shape[2] // 2    
-            window_width, window_level = self.calculate_window_width_level(method='percentile')
+            self.current_echo = 0
+            with span_timer.span("windowing"):
+                window_width, window_level = self.calculate_window_width_level(method='percentile')
             self.set_window_width_level(window_width, window_level) 
         else:
             self.displaying = False
            
     def displayArray(self):
+        with span_timer.span("display"):
+            self._displayArray()
+
+    def _displayArray(self):
         width, height = 0, 0
         if self.displaying == True:
-            windowed_array = self.apply_window_width_level()
+            height, width = self.array.shape[0], self.array.shape[1]
+
+            # Sample the displayed slice at (roughly) the resolution at which it appears on screen. Strided slicing is a view on the array, so windowing and conversion below only touch the pixels that are actually displayed.
+            self._display_stride = self._calculate_display_stride(height, width)
+            displayed_slice = self.displayed_volume[::self._display_stride, ::self._display_stride, self.current_slice]
+
+            windowed_array = self.apply_window_width_level(displayed_slice)
             array_8bit = (windowed_array * 255).astype(np.uint8)
 
             # Convert the array to QImage for display. This is because you cannot directly set a QPixmap from a NumPy array. You need to convert the array to a QImage first.
-            image = np.ascontiguousarray(np.array(array_8bit))
-            height, width = image.shape
-            qimage = QImage(image.data, width, height, width, QImage.Format_Grayscale8)
+            image = np.ascontiguousarray(array_8bit)
+            image_height, image_width = image.shape
+            qimage = QImage(image.data, image_width, image_height, image_width, QImage.Format_Grayscale8)
 
             # Create a QPixmap - a pixmap which can be displayed in a GUI
             pixmap = QPixmap.fromImage(qimage)
             self.pixmap_item.setPixmap(pixmap)
 
+            # Scale the pixmap item so that it covers the full-resolution extent of the slice. This way scene coordinates are always in units of array pixels, regardless of the stride with which the slice was sampled.
+            self.pixmap_item.setTransform(QTransform.fromScale(width / image_width, height / image_height))
+
             self.update_text_item()
             self.update_signal_value_text_item("")
 
@@ -1438,6 +1515,8 @@ class ImageLabel(QGraphicsView):
             black_image.fill(Qt.black)
             pixmap = QPixmap.fromImage(black_image)
             self.pixmap_item.setPixmap(pixmap)           
+            self.pixmap_item.setTransform(QTransform())
+            self._display_stride = 1
 
         self.fitInView(self.sceneRect(), Qt.KeepAspectRatio)
 
@@ -1447,9 +1526,28 @@ class ImageLabel(QGraphicsView):
         self.centerOn(width / 2, height / 2)
         self.reposition_items()
 
+    def _calculate_display_stride(self, height, width):
+        '''
+        Calculate the stride with which a slice of the given size is sampled for display. 
+
+        The slice is fitted into the viewport, so a slice that is larger than the viewport is shown scaled down. Rendering it at full resolution would only cause Qt to throw most of the pixels away again. Instead, every n-th row and column is displayed, with n chosen such that the rendered image still has at least as many pixels as the area it occupies on screen. When the slice is displayed at or above its native size (i.e., it is zoomed in), the stride is 1 and the slice is displayed at full resolution.
+
+        Returns:
+        int: The sampling stride.
+        '''
+        viewport_rect = self.viewport().rect()
+        if height == 0 or width == 0 or viewport_rect.width() <= 1 or viewport_rect.height() <= 1:
+            return 1
+        on_screen_scale = min(viewport_rect.width() / width, viewport_rect.height() / height) # scale applied by fitInView with Qt.KeepAspectRatio
+        if on_screen_scale >= 1:
+            return 1
+        return max(1, int(1 / on_screen_scale))
+
     def update_text_item(self):
         # set text
         text = f"Slice: {self.current_slice + 1}\nWW: {round(self.window_width)}\nWL: {round(self.window_level)}"
+        if self._displayed_echo_count() > 1:
+            text = f"Echo: {self.current_echo + 1}/{self._displayed_echo_count()}\n" + text
         self.text_item.setPlainText(text) # setPlainText() sets the text of the text item to the specified text.
         self.reposition_items()
 
@@ -1465,7 +1563,7 @@ class ImageLabel(QGraphicsView):
 
     def calculate_window_width_level(self, method='std', **kwargs):
         """
-        Calculate window width and level based on signal intensity distribution of middle slice of signal array.
+        Calculate window width and level based on signal intensity distribution of middle slice of signal array. For echo stacks, the middle slice of the displayed echo is used.
 
         Parameters:
         method (str): Method to calculate WW and WL ('std' or 'percentile').
@@ -1475,7 +1573,7 @@ class ImageLabel(QGraphicsView):
         tuple: (window_width, window_level)
         """        
 
-        array = self.array[:,:,self.array.shape[2] // 2] # window width and level will be calculate based on middle slice of array 
+        array = self.displayed_volume[:,:,self.array.shape[2] // 2] # window width and level will be calculate based on middle slice of array 
 
         if method == 'std':
             std_multiplier = kwargs.get('std_multiplier', 2)
@@ -1496,14 +1594,19 @@ class ImageLabel(QGraphicsView):
 
         return window_width, window_level
 
-    def apply_window_width_level(self):
+    def apply_window_width_level(self, displayed_slice=None):
         """
         Apply window width and level to the displayed slice of the signal array.
 
+        Parameters:
+        displayed_slice (numpy.ndarray): The (possibly downsampled) slice to window. Defaults to the full-resolution current slice.
+
         Returns:
         numpy.ndarray: The windowed array of the displayed slice (normalized).
         """
-        windowed_array = np.clip(self.array[:,:,self.current_slice], self.window_level - self.window_width / 2, self.window_level + self.window_width / 2)
+        if displayed_slice is None:
+            displayed_slice = self.displayed_volume[:,:,self.current_slice]
+        windowed_array = np.clip(displayed_slice, self.window_level - self.window_width / 2, self.window_level + self.window_width / 2)
         windowed_array = (windowed_array - (self.window_level - self.window_width / 2)) / self.window_width
         return windowed_array
 
@@ -1539,12 +1642,12 @@ class ImageLabel(QGraphicsView):
             self.set_window_width_level(window_width, window_level)
             self.displayArray()
         else: 
-            pixmap_coords = self.pixmap_item.mapFromScene(self.mapToScene(event.pos()))
-            x = int(pixmap_coords.x())
-            y = int(pixmap_coords.y())
-            # check if the pixmap coordinates are within the image array
+            scene_coords = self.mapToScene(event.pos()) # scene coordinates are in units of array pixels, also when the pixmap is displayed at a reduced resolution
+            x = int(scene_coords.x())
+            y = int(scene_coords.y())
+            # check if the scene coordinates are within the image array
             if 0 <= x < self.array.shape[1] and 0 <= y < self.array.shape[0]:
-                signal_value = self.array[y, x, self.current_slice]
+                signal_value = self.displayed_volume[y, x, self.current_slice]
                 self.update_signal_value_text_item(f"{signal_value:.1f}")
             else:
                 self.update_signal_value_text_item("")
@@ -1,4 +1,7 @@
-from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt5.QtGui import QStandardItemModel, QStandardItem, QIcon
+
+from simulator.scanlist import ScanItemStatusEnum
 
 class DictionaryModel(QStandardItemModel):
     def __init__(self, data):
@@ -19,4 +22,173 @@ class DictionaryModel(QStandardItemModel):
     def add_item(self, key, value):
         self.data[key] = value
         item = QStandardItem(key)
-        self.appendRow(item)
\ No newline at end of file
+        self.appendRow(item)
+
+class ExamCardListModel(QAbstractListModel):
+    '''
+    Item model that presents the exam cards of an ExamCardLibrary to the examCardListView. Rows are produced on demand from the library, so presenting the library costs the same regardless of the number of exam cards, and the model is only reset when the library was reloaded or the shown exam cards changed.
+
+    Exam cards can be narrowed down with a search query (see ExamCardLibrary.search) and to the exam cards whose scan technique is one of a set of scan techniques, e.g., to hide gradient echo exam cards for models without a T2* map. The scan techniques are compared by value, so setting the same ones again does not reset the model.'''
+
+    def __init__(self):
+        super().__init__()
+        self._library = None
+        self._generation = None # Generation of the library the rows were computed for
+        self._query = ""
+        self._scan_techniques = None # frozenset of the scan techniques of the shown exam cards, or None for all exam cards
+        self._rows = [] # Rows of the library that are shown, in library order
+
+    @property
+    def library(self):
+        return self._library
+
+    def set_library(self, library, scan_techniques=None):
+        scan_techniques = frozenset(scan_techniques) if scan_techniques is not None else None
+        if library is self._library and self._generation == library.generation and scan_techniques == self._scan_techniques:
+            return
+        self._library = library
+        self._scan_techniques = scan_techniques
+        self._update_rows()
+
+    def set_query(self, query):
+        if query == self._query:
+            return
+        self._query = query
+        self._update_rows()
+
+    def _update_rows(self):
+        self.beginResetModel()
+        if self._library is None:
+            self._rows = []
+            self._generation = None
+        else:
+            rows = self._library.search(self._query)
+            if self._scan_techniques is not None:
+                rows = [row for row in rows if self._library.cards[self._library.names[row]].get("ScanTechnique") in self._scan_techniques]
+            self._rows = rows
+            self._generation = self._library.generation
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        name = self.get_name(index)
+        if role == Qt.DisplayRole:
+            return name
+        if role == Qt.ToolTipRole:
+            card = self._library.cards[name]
+            return card.get("description") if isinstance(card, dict) else None
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+
+    def get_name(self, index):
+        return self._library.names[self._rows[index.row()]]
+
+    def get_data(self, index):
+        return self._library.cards[self.get_name(index)]
+
+class ScanlistModel(QAbstractListModel):
+    '''
+    Item model that presents the scanlist elements of a Scanlist to the scanlistListWidget. Each row shows the name of a scanlist element and an icon that represents the status of its scan item.
+
+    The model keeps a snapshot of the rows it has presented to the view. When sync() is called, the snapshot is compared with the scanlist and only the rows that were inserted, removed or changed are reported to the view. The view therefore never has to be rebuilt, e.g., just to re-highlight the active scanlist element.'''
+
+    status_icon_file_paths = {
+        ScanItemStatusEnum.READY_TO_SCAN: "resources/icons/checkmark-outline.png",
+        ScanItemStatusEnum.BEING_MODIFIED: "resources/icons/edit-outline.png",
+        ScanItemStatusEnum.INVALID: "resources/icons/alert-circle-outline.png",
+        ScanItemStatusEnum.COMPLETE: "resources/icons/checkmark-circle-2-outline.png",
+    }
+    _status_icons = None # Shared by all instances. Loaded on first use because QIcons can only be created once the QApplication exists.
+
+    def __init__(self):
+        super().__init__()
+        self._scanlist = None
+        self._rows = [] # Snapshot of the rows presented to the view. Each row is a (scanlist element, name, status) tuple.
+
+    @classmethod
+    def status_icon(cls, status):
+        if cls._status_icons is None:
+            cls._status_icons = {status: QIcon(file_path) for status, file_path in cls.status_icon_file_paths.items()}
+        return cls._status_icons.get(status)
+
+    @property
+    def scanlist(self):
+        return self._scanlist
+
+    def set_scanlist(self, scanlist):
+        self.beginResetModel()
+        self._scanlist = scanlist
+        self._rows = self._snapshot()
+        self.endResetModel()
+
+    def _snapshot(self):
+        if self._scanlist is None:
+            return []
+        return [(element, element.name, element.scan_item.status) for element in self._scanlist.scanlist_elements]
+
+    def sync(self):
+        '''Bring the rows presented to the view up to date with the scanlist. Rows that were removed or inserted are reported with row removal/insertion signals and rows whose name or status changed are reported with dataChanged. Unchanged rows are left alone.'''
+        new_rows = self._snapshot()
+        old_rows = self._rows
+
+        # Rows before the first and after the last insertion/removal are matched by scanlist element identity.
+        start = 0
+        while start < len(old_rows) and start < len(new_rows) and old_rows[start][0] is new_rows[start][0]:
+            start += 1
+        old_end, new_end = len(old_rows), len(new_rows)
+        while old_end > start and new_end > start and old_rows[old_end - 1][0] is new_rows[new_end - 1][0]:
+            old_end -= 1
+            new_end -= 1
+
+        if old_end > start:
+            self.beginRemoveRows(QModelIndex(), start, old_end - 1)
+            self._rows = old_rows[:start] + old_rows[old_end:]
+            self.endRemoveRows()
+        if new_end > start:
+            self.beginInsertRows(QModelIndex(), start, new_end - 1)
+            self._rows = self._rows[:start] + new_rows[start:new_end] + self._rows[start:]
+            self.endInsertRows()
+
+        for row, (old_row, new_row) in enumerate(zip(self._rows, new_rows)):
+            if old_row != new_row:
+                self._rows[row] = new_row
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole, Qt.DecorationRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        element, name, status = self._rows[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return name
+        if role == Qt.DecorationRole:
+            return self.status_icon(status)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable | Qt.ItemIsDragEnabled
+
+    def setData(self, index, value, role=Qt.EditRole):
+        # Executed when the user renames a scanlist element in the scanlistListWidget.
+        if role != Qt.EditRole or not index.isValid() or self._scanlist is None:
+            return False
+        self._scanlist.rename_scanlist_element(index.row(), value)
+        self.sync()
+        return True
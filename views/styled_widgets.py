@@ -260,10 +260,13 @@ class InfoFrame(QFrame):
         # reduce vertical space between header and text
         section1_text_layout.setContentsMargins(0, 0, 0, 0)
         section1_text_layout.setSpacing(0)
+        self.section1_save_button = SecondaryActionButton("Save")
+        self.section1_save_button.setFixedWidth(100)
         self.section1_stop_button = SecondaryActionButton("Stop")
         # change alignment of button
         self.section1_stop_button.setFixedWidth(100)
         section1_layout.addLayout(section1_text_layout)
+        section1_layout.addWidget(self.section1_save_button)
         section1_layout.addWidget(self.section1_stop_button)
         layout.addLayout(section1_layout)
 
@@ -16,9 +16,9 @@ class ModelViewLabel(ImageLabel):
     # override mouseMoveEvent
     def mouseMoveEvent(self, event: QMouseEvent) -> None:
         if self.pixmap_item.isUnderMouse():
-            coordinate_in_pixmap = self.pixmap_item.mapFromScene(self.mapToScene(event.pos()))
+            coordinate_in_scene = self.mapToScene(event.pos()) # scene coordinates are in units of model voxels, also when the pixmap is displayed at a reduced resolution
             # convert to model coordinates
-            self.mouse_moved_signal.emit(int(abs(coordinate_in_pixmap.y())), int(abs(coordinate_in_pixmap.x())), self.current_slice)
+            self.mouse_moved_signal.emit(int(abs(coordinate_in_scene.y())), int(abs(coordinate_in_scene.x())), self.current_slice)
         else:
             self.mouse_moved_signal.emit(-1, -1, -1) # signal that mouse is not over the pixmap
 
@@ -28,7 +28,7 @@ class ModelViewLabel(ImageLabel):
         self.text_item.setPlainText(text) # setPlainText() sets the text of the text item to the specified text.
 
         # set position of text
-        pixmap_rect = self.pixmap_item.boundingRect() # boundingRect() returns the bounding rectangle of the pixmap item in the pixmap's local coordinates.
+        pixmap_rect = self.pixmap_item.sceneBoundingRect() # sceneBoundingRect() returns the bounding rectangle of the pixmap item in scene coordinates, i.e., including the scaling applied when the pixmap is displayed at a reduced resolution.
         # set position of text to the bottom right corner of the pixmap
         text_rect = self.text_item.boundingRect() # boundingRect() returns the bounding rectangle of the text item in the text item's local coordinates.
         x = pixmap_rect.right() - text_rect.width() - 15 # Adjusted to the right by 10 pixels for padding
@@ -43,10 +43,10 @@ class ModelViewLabel(ImageLabel):
         if self.pixmap_item.isUnderMouse():
             # get current mouse position
             mouse_position = event.pos()
-            # get the position of the mouse in the pixmap item
-            coordinate_in_pixmap = self.pixmap_item.mapFromScene(self.mapToScene(mouse_position))
+            # get the position of the mouse in the scene
+            coordinate_in_scene = self.mapToScene(mouse_position)
             # convert to model coordinates
-            self.mouse_moved_signal.emit(int(abs(coordinate_in_pixmap.y())), int(abs(coordinate_in_pixmap.x())), self.current_slice)
+            self.mouse_moved_signal.emit(int(abs(coordinate_in_scene.y())), int(abs(coordinate_in_scene.x())), self.current_slice)
         else:
             self.mouse_moved_signal.emit(-1, -1, -1) # signal that mouse is not over the pixmap
 